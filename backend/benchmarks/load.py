@@ -0,0 +1,184 @@
+"""
+Workers de la commande bench_async_reads : chaque worker est un processus
+qui charge Django comme un serveur (ASGI ou WSGI) et y envoie ses propres
+clients simultanés, sans réseau.
+
+Les processus sont lancés en mode « spawn » : chacun charge l'application
+par config/asgi.py ou config/wsgi.py, qui choisissent le mode des lectures
+avant le chargement des URL.
+"""
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+import time
+
+
+def load_application(mode, cache):
+    """
+    Application ASGI ou WSGI du worker, celle de config/asgi.py ou de
+    config/wsgi.py.
+    """
+    if not cache:
+        os.environ['RESPONSE_CACHE_ENABLED'] = 'False'
+    if mode == 'asgi':
+        from config.asgi import application as app
+    else:
+        from config.wsgi import application as app
+
+    from django.conf import settings
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'localhost']
+    # Une ligne de journal par requête fausserait les durées (après django.setup())
+    logging.getLogger('config.performance').setLevel(logging.ERROR)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    return app
+
+
+def asgi_call(app, path, token):
+    """
+    Une requête GET sur l'application ASGI ; retourne le statut.
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 10000),
+        'server': ('localhost', 80),
+    }
+    response = {}
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Jamais de déconnexion pendant la réponse
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    async def call():
+        await app(scope, receive, send)
+        return response['status']
+
+    return call()
+
+
+def wsgi_call(app, path, token):
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    status = []
+    result = app(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        for _ in result:
+            pass
+    finally:
+        # Déclenche request_finished (fermeture des connexions), comme un serveur
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0]
+
+
+def run_asgi(app, calls, clients, duration, barrier):
+    latencies, statuses = [], {}
+
+    async def client(index, deadline):
+        position = index
+        while time.perf_counter() < deadline:
+            path, token = calls[position % len(calls)]
+            position += clients
+            start = time.perf_counter()
+            status = await asgi_call(app, path, token)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def main():
+        # Préchauffage : imports, URL, première connexion
+        for path, token in calls[:clients]:
+            await asgi_call(app, path, token)
+        await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client(index, deadline) for index in range(clients)))
+
+    asyncio.run(main())
+    return latencies, statuses
+
+
+def run_wsgi(app, calls, clients, duration, barrier, threads):
+    """
+    `threads` requêtes traitées à la fois (worker synchrone : 1, gthread :
+    davantage) ; les autres clients attendent leur tour, comme dans la file
+    d'attente du serveur.
+    """
+    capacity = threading.BoundedSemaphore(threads)
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    for path, token in calls[:clients]:
+        wsgi_call(app, path, token)
+    barrier.wait()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        position = index
+        while time.perf_counter() < deadline:
+            path, token = calls[position % len(calls)]
+            position += clients
+            start = time.perf_counter()
+            with capacity:
+                status = wsgi_call(app, path, token)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    workers = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, statuses
+
+
+def run_worker(mode, calls, clients, duration, threads, cache, barrier, results):
+    """
+    Point d'entrée d'un processus worker : résultats (durées en secondes,
+    statuts) envoyés dans la file `results`.
+    """
+    app = load_application(mode, cache)
+    if mode == 'asgi':
+        latencies, statuses = run_asgi(app, calls, clients, duration, barrier)
+    else:
+        latencies, statuses = run_wsgi(app, calls, clients, duration, barrier, threads)
+    results.put((latencies, statuses))
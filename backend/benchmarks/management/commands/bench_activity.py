@@ -0,0 +1,72 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from benchmarks.seed import is_seeded
+from benchmarks.utils import api_client, explain, measure
+from config.pagination import CreatedAtKeysetPagination
+from projects.models import Project
+from tasks.models import TaskEvent
+
+
+class Command(BaseCommand):
+    help = "Mesure le fil d'activité d'un projet (première page et page profonde) sur un gros journal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10000000, help="Événements à générer (réparti sur les projets existants)")
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--skip-seed', action='store_true', help="Réutiliser le journal déjà présent")
+
+    def handle(self, *args, **options):
+        project_ids = list(Project.objects.values_list('pk', flat=True))
+        if not project_ids:
+            raise CommandError("Aucun projet : lancer d'abord une commande bench_* qui génère les données")
+        if not options['skip_seed']:
+            # Journal en ajout seul : les événements générés ne s'effacent pas des fils
+            if not is_seeded():
+                raise CommandError("Les événements générés sont définitifs : base générée par seed_school uniquement")
+            self.seed(project_ids, options['events'], options['batch_size'])
+
+        busiest = Project.objects.annotate(n=Count('task_events')).order_by('-n').first()
+        self.stdout.write(f"{TaskEvent.objects.count()} événements ; projet {busiest.pk} : {busiest.n}")
+        client = api_client(busiest.owner)
+        url = f'/api/projects/{busiest.pk}/activity/'
+
+        first = measure(lambda: client.get(url, {'page_size': 50}), runs=options['runs'])
+        self.stdout.write(f"  première page     p50={first['p50_ms']} ms  p95={first['p95_ms']} ms")
+
+        # Page profonde : curseur construit sur l'événement du milieu du fil
+        feed = TaskEvent.objects.filter(project=busiest).order_by('-created_at', '-id')
+        paginator = CreatedAtKeysetPagination()
+        paginator.model = TaskEvent
+        cursor = paginator.encode_cursor(paginator.position_of(feed[busiest.n // 2]))
+        deep = measure(lambda: client.get(url, {'page_size': 50, 'cursor': cursor}), runs=options['runs'])
+        self.stdout.write(f"  page du milieu    p50={deep['p50_ms']} ms  p95={deep['p95_ms']} ms")
+
+        queryset = TaskEvent.objects.filter(project=busiest).order_by('-created_at', '-id')[:50]
+        self.stdout.write('    ' + explain(queryset).replace('\n', '\n    '))
+
+    def seed(self, project_ids, count, batch_size):
+        rng = random.Random(0)
+        now = timezone.now()
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            TaskEvent.objects.bulk_create([
+                TaskEvent(
+                    project_id=rng.choice(project_ids),
+                    task_id=rng.randint(1, 10 ** 6),
+                    task_title='Tâche générée',
+                    action='updated',
+                    changes={'status': ['todo', 'in_progress']},
+                    created_at=now - datetime.timedelta(seconds=rng.randint(0, 365 * 86400)),
+                )
+                for _ in range(size)
+            ])
+            created += size
+            if created % (batch_size * 50) == 0:
+                self.stdout.write(f"{created} événements")
@@ -0,0 +1,135 @@
+import json
+import multiprocessing
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from users.authentication import ClaimsRefreshToken
+
+from benchmarks.load import run_worker
+from benchmarks.utils import summarize
+from tasks.models import Task
+from users.models import CustomUser
+
+MODES = ('wsgi', 'asgi')
+
+
+def read_calls(users, seed):
+    """
+    Lectures mesurées pour chaque utilisateur : les routes servies en
+    asynchrone sous ASGI, sur un projet et une tâche qui le concernent.
+    """
+    calls = []
+    for user in users:
+        token = str(ClaimsRefreshToken.for_user(user).access_token)
+        task = (
+            Task.objects.filter(assigned_to=user, project__status='in_progress')
+            .select_related('project').order_by('pk').first()
+        )
+        paths = [
+            reverse('projects:api_project_list'),
+            reverse('projects:api_project_statistics'),
+            reverse('tasks:api_task_list'),
+            reverse('tasks:api_task_statistics'),
+            reverse('users:user-me'),
+        ]
+        if task is not None:
+            paths += [
+                reverse('projects:api_project_detail', args=[task.project_id]),
+                reverse('projects:project_tasks_list', args=[task.project_id]),
+                reverse('tasks:api_task_detail', args=[task.pk]),
+            ]
+        calls += [(path, token) for path in paths]
+    random.Random(seed).shuffle(calls)
+    return calls
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit des lectures de l'API sous WSGI (vues synchrones) et sous ASGI (ORM asynchrone) "
+        "à nombre de workers égal, avec des clients simultanés"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Processus par déploiement")
+        parser.add_argument('--clients', type=int, default=32, help="Clients simultanés au total")
+        parser.add_argument('--threads', type=int, default=1,
+                            help="Requêtes traitées à la fois par un worker WSGI (1 : worker synchrone)")
+        parser.add_argument('--duration', type=float, default=10, help="Durée de mesure par déploiement (s)")
+        parser.add_argument('--users', type=int, default=50, help="Étudiants dont les lectures sont rejouées")
+        parser.add_argument('--mode', choices=MODES, action='append', help="Déploiement à mesurer (répétable)")
+        parser.add_argument('--no-cache', action='store_true', help="Désactiver le cache des réponses")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+
+    def handle(self, *args, **options):
+        if options['clients'] < options['workers']:
+            raise CommandError("--clients doit être au moins égal à --workers")
+        users = list(
+            CustomUser.objects.filter(is_staff=False, is_superuser=False, assigned_tasks__isnull=False)
+            .distinct().order_by('pk')[:options['users']]
+        )
+        if not users:
+            raise CommandError("Pas de données : lancer d'abord manage.py seed_school")
+        calls = read_calls(users, options['seed'])
+        # Les workers ouvrent leurs propres connexions
+        connections.close_all()
+
+        results = []
+        for mode in options['mode'] or MODES:
+            result = self.measure(mode, calls, options)
+            results.append(result)
+            self.report(result)
+        if len(results) == 2 and results[0]['requests_per_second']:
+            ratio = results[1]['requests_per_second'] / results[0]['requests_per_second']
+            self.stdout.write(self.style.SUCCESS(f"ASGI / WSGI : x{ratio:.2f} requêtes par seconde"))
+
+        if options['output']:
+            report = {'options': {key: options[key] for key in (
+                'workers', 'clients', 'threads', 'duration', 'users', 'no_cache', 'seed'
+            )}, 'database': connections['default'].vendor, 'results': results}
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def measure(self, mode, calls, options):
+        # spawn : chaque worker charge Django par le point d'entrée du déploiement
+        context = multiprocessing.get_context('spawn')
+        workers = options['workers']
+        barrier = context.Barrier(workers)
+        queue = context.Queue()
+        share, extra = divmod(options['clients'], workers)
+        processes = [
+            context.Process(target=run_worker, args=(
+                mode, calls[index::workers], share + (index < extra), options['duration'],
+                options['threads'], not options['no_cache'], barrier, queue,
+            ))
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outputs = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        latencies = [latency for worker_latencies, _ in outputs for latency in worker_latencies]
+        statuses = {}
+        for _, worker_statuses in outputs:
+            for status, count in worker_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+        return {
+            'mode': mode,
+            'requests': len(latencies),
+            'requests_per_second': round(len(latencies) / options['duration'], 1),
+            'errors': sum(count for status, count in statuses.items() if status >= 400),
+            'statuses': statuses,
+            **(summarize(latencies) if latencies else {}),
+        }
+
+    def report(self, result):
+        self.stdout.write(
+            f"{result['mode'].upper():<5} {result['requests_per_second']:>9} req/s  "
+            f"p50={result.get('p50_ms')} ms  p95={result.get('p95_ms')} ms  p99={result.get('p99_ms')} ms  "
+            f"erreurs={result['errors']}"
+        )
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from benchmarks.utils import summarize
+from users.authentication import ClaimsRefreshToken
+from users.avatars import avatar_processing, get_pool, process_avatar
+from users.models import CustomUser
+
+PREFIX = 'bench-avatars'
+
+
+def phone_photo(width, height):
+    """
+    JPEG d'appareil photo : bruit sur un dégradé (se compresse comme une photo) et EXIF.
+    """
+    image = Image.merge('RGB', [
+        Image.linear_gradient('L').resize((width, height)),
+        Image.effect_noise((width, height), 12).convert('L'),
+        Image.radial_gradient('L').resize((width, height)),
+    ])
+    exif = Image.Exif()
+    exif[0x010F] = 'Appareil'
+    exif[0x0112] = 6
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=85, exif=exif.tobytes())
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure l'envoi d'avatars (POST /api/users/me/avatar/) par des clients simultanés : latence de l'envoi, "
+        "durée d'un traitement, délai jusqu'à la dernière variante et refus du pool (503)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=32, help="Clients simultanés (un compte chacun)")
+        parser.add_argument('--uploads', type=int, default=4, help="Envois par client")
+        parser.add_argument('--size', default='4032x3024', help="Dimensions des photos envoyées")
+        parser.add_argument('--workers', type=int, help="Threads de traitement (AVATAR_WORKERS)")
+        parser.add_argument('--queue', type=int, help="Traitements en attente avant refus (AVATAR_QUEUE)")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+
+    def handle(self, *args, **options):
+        # Une ligne de journal par requête (et par refus) fausserait les durées
+        logging.getLogger('config.performance').setLevel(logging.ERROR)
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        pool = {
+            'AVATAR_WORKERS': options['workers'] if options['workers'] is not None else settings.AVATAR_WORKERS,
+            'AVATAR_QUEUE': options['queue'] if options['queue'] is not None else settings.AVATAR_QUEUE,
+        }
+        width, height = (int(value) for value in options['size'].split('x'))
+        photo = phone_photo(width, height)
+        self.stdout.write(f"{os.cpu_count()} cœurs, pool : {pool['AVATAR_WORKERS']} threads, "
+                          f"{pool['AVATAR_QUEUE']} en attente ; photo {width}x{height} de {len(photo) // 1024} Kio")
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media, **pool):
+            users = self.create_users(options['clients'])
+            try:
+                result = {'processing_ms': self.processing_time(users[0], photo), **self.measure(users, photo, options)}
+            finally:
+                CustomUser.objects.filter(username__startswith=PREFIX).delete()
+        self.report(result)
+
+        if options['output']:
+            report = {'options': {key: options[key] for key in ('clients', 'uploads', 'size')},
+                      'cpu_count': os.cpu_count(), **pool, 'results': [result]}
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def create_users(self, count):
+        CustomUser.objects.filter(username__startswith=PREFIX).delete()
+        password = make_password(None)
+        return CustomUser.objects.bulk_create(
+            CustomUser(username=f'{PREFIX}-{index}', password=password) for index in range(count)
+        )
+
+    def processing_time(self, user, photo):
+        """
+        Durée d'un traitement seul (décodage, variantes, écriture), hors pool.
+        """
+        name = default_storage.save(f'avatars/user_{user.pk}/upload-bench.jpg', BytesIO(photo))
+        CustomUser.objects.filter(pk=user.pk).update(avatar=name)
+        start = time.perf_counter()
+        process_avatar(user.pk, name)
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    def measure(self, users, photo, options):
+        path = reverse('users:user-avatar')
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+
+        def client(user):
+            http = Client(HTTP_HOST='localhost',
+                          HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+            try:
+                for _ in range(options['uploads']):
+                    upload = SimpleUploadedFile('photo.jpg', photo, content_type='image/jpeg')
+                    start = time.perf_counter()
+                    response = http.post(path, {'avatar': upload})
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code == 503:
+                        time.sleep(float(response['Retry-After']))
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        uploaded = time.perf_counter() - start
+        # Jusqu'à la dernière variante
+        while get_pool().pending:
+            time.sleep(0.01)
+        drained = time.perf_counter() - start
+
+        processed = sum(
+            1 for name, variants in CustomUser.objects.filter(username__startswith=PREFIX).values_list('avatar', 'avatar_variants')
+            if name and not avatar_processing(name, variants)
+        )
+        return {
+            'uploads': statuses.get(202, 0),
+            'rejected': statuses.get(503, 0),
+            'errors': sum(count for status, count in statuses.items() if status not in (202, 503)),
+            'statuses': statuses,
+            'upload_seconds': round(uploaded, 2),
+            'last_variant_seconds': round(drained, 2),
+            'avatars_processed': processed,
+            **summarize(latencies),
+        }
+
+    def report(self, result):
+        self.stdout.write(
+            f"traitement seul {result['processing_ms']} ms ; envois p50={result['p50_ms']} ms  "
+            f"p95={result['p95_ms']} ms  p99={result['p99_ms']} ms  acceptés={result['uploads']}  "
+            f"refus={result['rejected']}  erreurs={result['errors']}\n"
+            f"envois terminés en {result['upload_seconds']} s, dernière variante à {result['last_variant_seconds']} s, "
+            f"{result['avatars_processed']} comptes avec leurs variantes"
+        )
@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from benchmarks.utils import api_client
+from projects.models import Project
+from tasks.models import Task
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Compare le débit de création/mise à jour de tâches : une requête par tâche contre /api/tasks/bulk/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options['operations']
+        teacher, _ = CustomUser.objects.get_or_create(
+            username='bench_bulk_teacher', defaults={'is_staff': True, 'role': 'teacher'}
+        )
+        project = Project.objects.create(name='bench bulk', description='Débit des écritures', owner=teacher)
+        client = api_client(teacher)
+
+        def post(url, payload, method='post'):
+            response = getattr(client, method)(url, json.dumps(payload), content_type='application/json')
+            assert response.status_code < 300, response.content
+            return response
+
+        def task(index):
+            return {'title': f'Tâche {index}', 'description': 'bench', 'project': project.pk}
+
+        try:
+            start = time.perf_counter()
+            for index in range(count):
+                post(reverse('projects:project_tasks_create', args=[project.pk]), task(index))
+            single_create = time.perf_counter() - start
+
+            ids = list(Task.objects.filter(project=project).values_list('pk', flat=True))
+            start = time.perf_counter()
+            for pk in ids:
+                post(reverse('tasks:api_task_update', args=[pk]), {'status': 'in_progress'}, method='patch')
+            single_update = time.perf_counter() - start
+
+            start = time.perf_counter()
+            post(reverse('tasks:api_task_bulk'), {'create': [task(index) for index in range(count)]})
+            bulk_create = time.perf_counter() - start
+
+            ids = list(Task.objects.filter(project=project, status='todo').values_list('pk', flat=True))
+            start = time.perf_counter()
+            post(reverse('tasks:api_task_bulk'), {'update': [{'id': pk, 'status': 'in_progress'} for pk in ids]})
+            bulk_update = time.perf_counter() - start
+        finally:
+            project.delete()
+
+        self.stdout.write(f"{count} opérations par scénario")
+        for label, single, bulk in (
+            ('création', single_create, bulk_create),
+            ('changement de statut', single_update, bulk_update),
+        ):
+            self.stdout.write(
+                f"  {label:<22} unitaire {count / single:>9.0f} op/s   "
+                f"bulk {count / bulk:>9.0f} op/s   (x{single / bulk:.1f})"
+            )
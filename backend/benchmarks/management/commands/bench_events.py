@@ -0,0 +1,151 @@
+import asyncio
+import json
+import resource
+import threading
+import time
+import tracemalloc
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from users.authentication import ClaimsRefreshToken
+
+from benchmarks.utils import summarize
+from config.events import get_broker
+from users.models import CustomUser
+
+PREFIX = 'bench-events'
+
+
+def rss_mb():
+    # ru_maxrss est exprimé en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Connection:
+    """
+    Client SSE simulé branché directement sur l'application ASGI (sans
+    réseau) : mesure ce que coûte un abonné au worker lui-même.
+    """
+
+    def __init__(self, app, path, token, index):
+        self.app = app
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            # En-tête Authorization (clients hors navigateur) : pas de ticket à demander
+            'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream'),
+                        (b'authorization', f'Bearer {token}'.encode())],
+            'client': ('127.0.0.1', 10000 + index),
+            'server': ('localhost', 80),
+        }
+        self.requested = False
+        self.disconnected = asyncio.Event()
+        self.connected = asyncio.Event()
+        self.status = None
+        self.on_event = None
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message.get('body'):
+            self.connected.set()
+            for line in message['body'].split(b'\n'):
+                if line.startswith(b'data: ') and self.on_event:
+                    self.on_event(json.loads(line[6:]))
+
+    async def run(self):
+        await self.app(self.scope, self.receive, self.send)
+        self.connected.set()
+
+
+class Command(BaseCommand):
+    help = "Mesure le nombre d'abonnés SSE simultanés tenus par un worker ASGI et la latence de diffusion"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=100, help="Utilisateurs distincts se partageant les connexions")
+        parser.add_argument('--events', type=int, default=20)
+
+    def handle(self, *args, **options):
+        users = self.ensure_users(options['users'])
+        tokens = [str(ClaimsRefreshToken.for_user(user).access_token) for user in users]
+        asyncio.run(self.run(users, tokens, options))
+
+    def ensure_users(self, count):
+        existing = set(CustomUser.objects.filter(username__startswith=PREFIX).values_list('username', flat=True))
+        missing = [
+            CustomUser(username=f'{PREFIX}-{index}', password='!')
+            for index in range(count)
+            if f'{PREFIX}-{index}' not in existing
+        ]
+        CustomUser.objects.bulk_create(missing, batch_size=1000)
+        return list(CustomUser.objects.filter(username__startswith=PREFIX).order_by('pk')[:count])
+
+    async def run(self, users, tokens, options):
+        app = get_asgi_application()
+        path = reverse('api_events')
+        broker = get_broker()
+        count = options['subscribers']
+
+        tracemalloc.start()
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        connections = [Connection(app, path, tokens[index % len(tokens)], index) for index in range(count)]
+        tasks = [asyncio.create_task(connection.run()) for connection in connections]
+        await asyncio.gather(*(connection.connected.wait() for connection in connections))
+        setup = time.perf_counter() - start
+        refused = sum(1 for connection in connections if connection.status != 200)
+        current, _ = tracemalloc.get_traced_memory()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{count} abonnés ({len(users)} utilisateurs)"))
+        self.stdout.write(f"  connexion de tous les abonnés  {round(setup, 2)} s (refusées : {refused})")
+        self.stdout.write(f"  mémoire Python par abonné      {round(current / max(count, 1) / 1024, 1)} Ko (tracemalloc)")
+        self.stdout.write(f"  RSS                            {round(rss_before, 1)} -> {round(rss_mb(), 1)} Mo")
+        tracemalloc.stop()
+
+        # Diffusion depuis un autre thread, comme le signal d'une vue synchrone
+        received, done = {}, {}
+        user_ids = [user.pk for user in users]
+
+        def on_event(event):
+            if event.get('type') != 'bench':
+                return
+            seq = event['seq']
+            received[seq] = received.get(seq, 0) + 1
+            if received[seq] == count - refused:
+                done[seq].set_result(time.perf_counter() - event['sent'])
+
+        for connection in connections:
+            connection.on_event = on_event
+
+        latencies = []
+        loop = asyncio.get_running_loop()
+        for seq in range(options['events']):
+            done[seq] = loop.create_future()
+            event = {'type': 'bench', 'seq': seq, 'sent': time.perf_counter()}
+            threading.Thread(target=broker.publish, args=(event, user_ids)).start()
+            latencies.append(await asyncio.wait_for(done[seq], timeout=60))
+        timings = summarize(latencies)
+        self.stdout.write(
+            f"  diffusion à tous les abonnés   p50={timings['p50_ms']} ms  p95={timings['p95_ms']} ms  max={timings['max_ms']} ms"
+        )
+
+        for connection in connections:
+            connection.disconnected.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.stdout.write(f"  abonnements restants après déconnexion : {len(broker.subscriber_ids())}")
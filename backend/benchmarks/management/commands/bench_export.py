@@ -0,0 +1,94 @@
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from benchmarks.seed import seed_school
+from benchmarks.utils import api_client
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from users.models import CustomUser
+
+
+def peak_rss_mb():
+    # ru_maxrss est exprimé en kilo-octets sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps jusqu'au premier octet, la durée totale et la mémoire des exports en flux"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10000)
+        parser.add_argument('--tasks', type=int, default=1000000)
+        parser.add_argument('--teachers', type=int, default=100)
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--skip-seed', action='store_true', help="Réutiliser les données déjà présentes")
+        parser.add_argument('--compare', action='store_true',
+                            help="Mesurer aussi la sérialisation complète en mémoire (ancienne approche)")
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            self.stdout.write("Génération des données...")
+            seed_school(
+                teachers=options['teachers'],
+                students=options['students'],
+                projects=options['projects'],
+                tasks=options['tasks'],
+                log=self.stdout.write,
+            )
+
+        # Superuser : l'export des tâches les couvre toutes
+        admin = CustomUser.objects.filter(username='bench-export').first()
+        if admin is None:
+            admin = CustomUser.objects.create_superuser(username='bench-export', password='bench-password')
+        teacher = CustomUser.objects.filter(is_staff=True, is_superuser=False).annotate(n=Count('owned_projects')).order_by('-n').first()
+        if teacher is None:
+            raise CommandError("Aucune donnée : relancer sans --skip-seed")
+
+        for user, url, output in (
+            (admin, reverse('tasks:api_task_export'), 'csv'),
+            (admin, reverse('tasks:api_task_export'), 'ndjson'),
+            (teacher, reverse('projects:api_project_export'), 'csv'),
+        ):
+            client = api_client(user)
+            self.report(f"{url}?output={output} ({user.username})", lambda: self.stream(client, url, output))
+
+        if options['compare']:
+            self.report('TaskSerializer(many=True).data', lambda: self.materialize())
+
+    def stream(self, client, url, output):
+        start = time.perf_counter()
+        response = client.get(url, {'output': output})
+        first_byte, size, rows = 0, 0, 0
+        for chunk in response.streaming_content:
+            if not first_byte:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+            rows += chunk.count(b'\n')
+        return first_byte, size, rows
+
+    def materialize(self):
+        start = time.perf_counter()
+        data = TaskSerializer(Task.objects.order_by('pk'), many=True).data
+        return time.perf_counter() - start, None, len(data)
+
+    def report(self, label, function):
+        tracemalloc.start()
+        start = time.perf_counter()
+        first_byte, size, rows = function()
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+        self.stdout.write(f"  lignes            {rows}")
+        if size is not None:
+            self.stdout.write(f"  taille            {round(size / 1024 / 1024, 1)} Mo")
+        self.stdout.write(f"  premier octet     {round(first_byte * 1000, 1)} ms")
+        self.stdout.write(f"  durée totale      {round(total, 2)} s")
+        self.stdout.write(f"  pic Python        {round(peak / 1024 / 1024, 1)} Mo (tracemalloc)")
+        self.stdout.write(f"  pic RSS processus {peak_rss_mb()} Mo")
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from benchmarks.utils import summarize
+from users.models import CustomUser
+
+PREFIX = 'bench-login'
+PASSWORD = 'Motdepasse!2025'
+
+# Valeurs de PASSWORD_HASHER et algorithme des hashs produits
+ALGORITHMS = {'scrypt': 'scrypt', 'argon2': 'argon2', 'pbkdf2': 'pbkdf2_sha256'}
+
+
+def preferred_hashers(name):
+    """
+    PASSWORD_HASHERS du projet avec le hasher `name` en tête.
+    """
+    preferred = [path for path in settings.PASSWORD_HASHERS if import_string(path).algorithm == ALGORITHMS[name]]
+    return preferred + [path for path in settings.PASSWORD_HASHERS if path not in preferred]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit des connexions (POST /api/token/) avec des clients simultanés : connexions par seconde, "
+        "par seconde de CPU (un cœur occupé), latences et refus du pool de hachage (503)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasher', choices=ALGORITHMS, action='append',
+                            help="Hasher des mots de passe (répétable ; par défaut PASSWORD_HASHER)")
+        parser.add_argument('--clients', type=int, default=16, help="Clients simultanés")
+        parser.add_argument('--duration', type=float, default=10, help="Durée de mesure par hasher (s)")
+        parser.add_argument('--users', type=int, default=200, help="Comptes créés pour la mesure")
+        parser.add_argument('--workers', type=int, help="Threads du pool de hachage (PASSWORD_HASHING_WORKERS)")
+        parser.add_argument('--queue', type=int, help="Hachages en attente avant refus (PASSWORD_HASHING_QUEUE)")
+        parser.add_argument('--legacy', action='store_true',
+                            help="Comptes enregistrés en PBKDF2 : chaque première connexion rehache le mot de passe")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+
+    def handle(self, *args, **options):
+        # Une ligne de journal par requête (et par refus) fausserait les durées
+        logging.getLogger('config.performance').setLevel(logging.ERROR)
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        pool = {
+            'PASSWORD_HASHING_WORKERS': options['workers'] or settings.PASSWORD_HASHING_WORKERS,
+            'PASSWORD_HASHING_QUEUE': options['queue'] if options['queue'] is not None else settings.PASSWORD_HASHING_QUEUE,
+        }
+        self.stdout.write(f"{os.cpu_count()} cœurs, pool : {pool['PASSWORD_HASHING_WORKERS']} threads, "
+                          f"{pool['PASSWORD_HASHING_QUEUE']} en attente")
+
+        results = []
+        try:
+            for name in options['hasher'] or [settings.PASSWORD_HASHER]:
+                with override_settings(PASSWORD_HASHERS=preferred_hashers(name), **pool):
+                    usernames = self.create_users(options['users'], 'pbkdf2_sha256' if options['legacy'] else 'default')
+                    result = {'hasher': name, 'legacy': options['legacy'], **self.measure(usernames, options)}
+                    if options['legacy']:
+                        result['rehashed'] = CustomUser.objects.filter(
+                            username__in=usernames, password__startswith=f'{ALGORITHMS[name]}$'
+                        ).count()
+                results.append(result)
+                self.report(result)
+        finally:
+            CustomUser.objects.filter(username__startswith=PREFIX).delete()
+
+        if options['output']:
+            report = {'options': {key: options[key] for key in ('clients', 'duration', 'users', 'legacy')},
+                      'cpu_count': os.cpu_count(), **pool, 'results': results}
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def create_users(self, count, hasher):
+        CustomUser.objects.filter(username__startswith=PREFIX).delete()
+        # Un seul hachage pour tous les comptes : seule la mesure doit coûter
+        password = make_password(PASSWORD, hasher=hasher)
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'{PREFIX}-{index}', password=password) for index in range(count)
+        )
+        return [user.username for user in users]
+
+    def measure(self, usernames, options):
+        path = reverse('token_obtain_pair')
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def client(index):
+            http = Client(HTTP_HOST='localhost')
+            position = index
+            try:
+                while time.perf_counter() < deadline:
+                    username = usernames[position % len(usernames)]
+                    position += options['clients']
+                    start = time.perf_counter()
+                    response = http.post(path, {'username': username, 'password': PASSWORD})
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code == 503:
+                        # Client qui respecte Retry-After : nouvel essai après le délai conseillé
+                        time.sleep(float(response['Retry-After']))
+            finally:
+                connection.close()
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        threads = [threading.Thread(target=client, args=(index,)) for index in range(options['clients'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+        logins = statuses.get(200, 0)
+        return {
+            'logins': logins,
+            'logins_per_second': round(logins / wall, 1),
+            # Connexions par seconde de CPU consommée : débit d'un cœur entièrement occupé
+            'logins_per_core_second': round(logins / cpu, 1) if cpu else None,
+            'cpu_utilization': round(cpu / wall, 2),
+            'rejected': statuses.get(503, 0),
+            'errors': sum(count for status, count in statuses.items() if status not in (200, 503)),
+            'statuses': statuses,
+            **(summarize(latencies) if latencies else {}),
+        }
+
+    def report(self, result):
+        self.stdout.write(
+            f"{result['hasher']:<7} {result['logins_per_second']:>7} connexions/s  "
+            f"{result['logins_per_core_second']} /s/cœur  CPU x{result['cpu_utilization']}  "
+            f"p50={result.get('p50_ms')} ms  p95={result.get('p95_ms')} ms  "
+            f"refus={result['rejected']}  erreurs={result['errors']}"
+            + (f"  rehachés={result['rehashed']}" if result['legacy'] else '')
+        )
@@ -0,0 +1,55 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from benchmarks.seed import BENCH_PREFIX, is_seeded, seed_school
+from benchmarks.utils import explain
+from tasks.models import Task, TaskReminder
+from tasks.reminders import pending_reminders, reminder_windows, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Mesure la durée et la mémoire d'un passage de send_due_reminders sur un gros volume de tâches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10000)
+        parser.add_argument('--tasks', type=int, default=1000000)
+        parser.add_argument('--teachers', type=int, default=100)
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--skip-seed', action='store_true', help="Réutiliser les données déjà présentes")
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            self.stdout.write("Génération des données...")
+            seed_school(
+                teachers=options['teachers'],
+                students=options['students'],
+                projects=options['projects'],
+                tasks=options['tasks'],
+                log=self.stdout.write,
+            )
+        # Les passages marquent comme envoyés tous les rappels dus : sur une
+        # autre base, les vrais destinataires ne les recevraient jamais
+        if not is_seeded():
+            raise CommandError("send_due_reminders enregistre des rappels : base générée par seed_school uniquement")
+        TaskReminder.objects.filter(task__project__owner__username__startswith=f'{BENCH_PREFIX}_').delete()
+        today, windows = timezone.localdate(), reminder_windows()
+        self.stdout.write(f"{Task.objects.count()} tâches, fenêtres {windows}")
+        self.stdout.write('    ' + explain(pending_reminders(today, windows)).replace('\n', '\n    '))
+
+        # Backend factice : on mesure la sélection et l'enregistrement, pas l'envoi
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.dummy.EmailBackend'):
+            for label in ('premier passage', 'relance'):
+                tracemalloc.start()
+                start = time.perf_counter()
+                messages, tasks = send_due_reminders(today=today, windows=windows)
+                duration = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"  {label:<16} {messages} courriels / {tasks} tâches  {round(duration, 2)} s  "
+                    f"pic Python {round(peak / 1024 / 1024, 1)} Mo"
+                )
@@ -0,0 +1,193 @@
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from users.authentication import ClaimsRefreshToken
+
+from benchmarks.routes import EXCLUDED_ROUTES, SCENARIOS, BenchContext, named_routes
+from benchmarks.seed import is_seeded
+from benchmarks.utils import summarize
+from projects.models import Project
+from tasks.models import Task
+from users.models import CustomUser
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Appelle chaque route de l'API avec le client de test (authentification JWT réelle) et mesure "
+        "latence p50/p95/p99, requêtes SQL et allocations ; résultats en JSON comparables d'un commit à l'autre"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help="Appels mesurés par scénario")
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', action='append', default=[],
+                            help="Ne mesurer que les routes contenant ce texte (répétable)")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+        parser.add_argument('--compare', help="Résultats JSON d'une exécution précédente à comparer")
+        parser.add_argument('--keep', action='store_true', help="Conserver les objets créés pendant la mesure")
+
+    def handle(self, *args, **options):
+        uncovered = named_routes() - {scenario.route for scenario in SCENARIOS} - set(EXCLUDED_ROUTES)
+        if uncovered:
+            raise CommandError(f"Routes sans scénario (benchmarks/routes.py) : {', '.join(sorted(uncovered))}")
+
+        if not is_seeded():
+            raise CommandError("Les scénarios modifient des données : base générée par seed_school uniquement")
+        context = BenchContext()
+        if not context.is_ready():
+            raise CommandError("Pas de données : lancer d'abord manage.py seed_school")
+
+        # Une ligne de journal par requête fausserait les durées
+        logging.getLogger('config.performance').setLevel(logging.ERROR)
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or any(text in scenario.route for text in options['only'])
+        ]
+        clients = {}
+        results = []
+        try:
+            for scenario in scenarios:
+                if scenario.role not in clients:
+                    clients[scenario.role] = self.client_for(context.user(scenario.role))
+                result = self.measure(scenario, context, clients[scenario.role], options['runs'], options['warmup'])
+                results.append(result)
+                self.report(result)
+        finally:
+            if not options['keep']:
+                context.cleanup()
+
+        report = {
+            'commit': git_commit(),
+            'date': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'runs': options['runs'],
+            'data': {
+                'users': CustomUser.objects.count(),
+                'projects': Project.objects.count(),
+                'tasks': Task.objects.count(),
+            },
+            'excluded': EXCLUDED_ROUTES,
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+        if options['compare']:
+            self.compare(results, options['compare'])
+
+    def client_for(self, user):
+        if user is None:
+            return Client(HTTP_HOST='localhost')
+        token = ClaimsRefreshToken.for_user(user).access_token
+        return Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def call(self, scenario, context, client):
+        """
+        Un appel : préparation hors chronométrage, puis requête et lecture
+        complète de la réponse (exports en flux compris).
+        """
+        args, data = scenario.build(context)
+        path = reverse(scenario.route, args=args)
+        if data is None:
+            kwargs = {}
+        elif scenario.method == 'get':
+            # Paramètres de la chaîne de requête
+            kwargs = {'data': data}
+        elif any(hasattr(value, 'read') for value in data.values()):
+            # Envoi de fichier : formulaire multipart
+            kwargs = {'data': data}
+        else:
+            kwargs = {'data': json.dumps(data), 'content_type': 'application/json'}
+        start = time.perf_counter()
+        response = getattr(client, scenario.method)(path, **kwargs)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response, time.perf_counter() - start
+
+    def measure(self, scenario, context, client, runs, warmup):
+        for _ in range(warmup):
+            self.call(scenario, context, client)
+
+        durations, queries, statuses = [], [], set()
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as captured:
+                response, duration = self.call(scenario, context, client)
+            durations.append(duration)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+
+        # Allocations mesurées à part : tracemalloc ralentit fortement l'appel
+        tracemalloc.start()
+        try:
+            self.call(scenario, context, client)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings = summarize(durations)
+        return {
+            'scenario': scenario.label,
+            'route': scenario.route,
+            'method': scenario.method.upper(),
+            'role': scenario.role,
+            'status': sorted(statuses),
+            'p50_ms': timings['p50_ms'],
+            'p95_ms': timings['p95_ms'],
+            'p99_ms': timings['p99_ms'],
+            'max_ms': timings['max_ms'],
+            'queries': int(statistics.median(queries)),
+            'queries_max': max(queries),
+            'alloc_peak_kb': round(peak / 1024, 1),
+        }
+
+    def report(self, result):
+        style = self.style.SUCCESS if all(code < 400 for code in result['status']) else self.style.ERROR
+        self.stdout.write(
+            f"{result['scenario']:<62} {style('/'.join(map(str, result['status'])))}  "
+            f"p50={result['p50_ms']:>8} ms  p95={result['p95_ms']:>8} ms  p99={result['p99_ms']:>8} ms  "
+            f"SQL={result['queries']:>3}  alloc={result['alloc_peak_kb']:>8} Ko"
+        )
+
+    def compare(self, results, path):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        previous = {result['scenario']: result for result in baseline['results']}
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nComparaison avec {path} (commit {baseline.get('commit')})"))
+        for result in results:
+            before = previous.get(result['scenario'])
+            if before is None:
+                self.stdout.write(f"{result['scenario']:<62} nouveau")
+                continue
+            change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            queries = result['queries'] - before['queries']
+            line = f"{result['scenario']:<62} p50 {change:+6.1f} %  SQL {queries:+d}"
+            self.stdout.write(self.style.ERROR(line) if queries > 0 or change > 20 else line)
@@ -0,0 +1,134 @@
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.http import QueryDict
+
+from benchmarks.seed import is_seeded, seed_school
+from benchmarks.utils import explain, measure
+from projects.models import Project
+from projects.visibility import visible_tasks
+from tasks.filters import filter_tasks
+from tasks.models import Task
+from tasks.statistics import OPEN_STATUSES, aggregate_task_statistics
+from users.models import CustomUser
+
+# Index évalués par --compare (retirés pour la mesure « avant », puis recréés)
+FILTER_INDEXES = {
+    Task: ('task_board_position_idx', 'task_assignee_status_idx', 'task_open_due_idx'),
+    Project: ('project_owner_status_idx',),
+}
+
+
+class Command(BaseCommand):
+    help = "Mesure plan et latence de chaque combinaison de filtres de la liste des tâches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10000)
+        parser.add_argument('--tasks', type=int, default=1000000)
+        parser.add_argument('--teachers', type=int, default=100)
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--skip-seed', action='store_true', help="Réutiliser les données déjà présentes")
+        parser.add_argument('--compare', action='store_true',
+                            help="Mesurer aussi sans les index de filtre (base générée par seed_school uniquement)")
+        parser.add_argument('--explain', action='store_true', help="Afficher les plans d'exécution")
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            self.stdout.write("Génération des données...")
+            seed_school(
+                teachers=options['teachers'],
+                students=options['students'],
+                projects=options['projects'],
+                tasks=options['tasks'],
+                log=self.stdout.write,
+            )
+
+        if options['compare'] and not is_seeded():
+            raise CommandError("--compare supprime des index : base générée par seed_school uniquement")
+
+        cases = self.build_cases()
+        if options['compare']:
+            before = self.run_without_indexes(cases, options)
+        after = self.run_cases(cases, options, 'avec index')
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nRésumé (p50, ms)"))
+        for label in after:
+            line = f"  {label:<55} {after[label]['p50_ms']:>10}"
+            if options['compare']:
+                line = f"  {label:<55} {before[label]['p50_ms']:>10} -> {after[label]['p50_ms']:>10}"
+            self.stdout.write(line)
+
+    def build_cases(self):
+        teacher = CustomUser.objects.filter(is_staff=True).annotate(n=Count('owned_projects')).order_by('-n').first()
+        student = CustomUser.objects.filter(is_staff=False).annotate(n=Count('assigned_tasks')).order_by('-n').first()
+        if teacher is None or student is None:
+            raise CommandError("Aucune donnée : relancer sans --skip-seed")
+        project = Project.objects.filter(owner=teacher).annotate(n=Count('tasks')).order_by('-n').first()
+        values = {'project': str(project.pk), 'status': 'in_progress', 'assigned_to': str(student.pk)}
+
+        cases = {}
+        for user, role in ((teacher, 'enseignant'), (student, 'étudiant')):
+            # Toutes les combinaisons de filtres acceptées par TasklistView
+            for size in range(len(values) + 1):
+                for names in combinations(values, size):
+                    params = QueryDict(mutable=True)
+                    params.update({name: values[name] for name in names})
+                    label = f"liste {role} [{', '.join(names) or 'aucun filtre'}]"
+                    cases[label] = filter_tasks(visible_tasks(user), params)
+
+        cases['urgent (ouvertes avec date limite)'] = Task.objects.filter(status__in=OPEN_STATUSES, due_date__isnull=False)
+        cases['statistiques étudiant + projet'] = (
+            lambda: aggregate_task_statistics(student, project.pk)
+        )
+        return cases
+
+    def run_cases(self, cases, options, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title} =="))
+        results = {}
+        for label, case in cases.items():
+            if callable(case):
+                results[label] = measure(case, runs=options['runs'])
+            else:
+                # .all() : nouveau queryset à chaque exécution (pas de cache de résultats)
+                results[label] = measure(lambda: list(case.all()), runs=options['runs'])
+                if options['explain']:
+                    self.stdout.write(f"{label}\n    " + explain(case).replace('\n', '\n    '))
+            self.stdout.write(f"  {label:<55} p50={results[label]['p50_ms']} ms")
+        return results
+
+    def run_without_indexes(self, cases, options):
+        """
+        Mesure « avant » dans une transaction annulée ensuite : les index
+        reviennent même si la commande est interrompue (DDL transactionnel de
+        PostgreSQL et SQLite). Sinon, ils sont recréés à la main.
+        """
+        if not connection.features.can_rollback_ddl:
+            self.set_indexes(present=False)
+            try:
+                return self.run_cases(cases, options, 'sans index')
+            finally:
+                self.set_indexes(present=True)
+
+        with transaction.atomic():
+            self.set_indexes(present=False)
+            try:
+                return self.run_cases(cases, options, 'sans index')
+            finally:
+                transaction.set_rollback(True)
+
+    def set_indexes(self, present):
+        # Éditeur utilisé hors de son bloc with (qui n'initialise que
+        # deferred_sql) : celui de SQLite refuse de s'ouvrir dans une
+        # transaction, où DROP/CREATE INDEX restent pourtant annulables
+        editor = connection.schema_editor()
+        editor.deferred_sql = []
+        for model, names in FILTER_INDEXES.items():
+            for index in model._meta.indexes:
+                if index.name in names:
+                    if present:
+                        editor.add_index(model, index)
+                    else:
+                        editor.remove_index(model, index)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+
+from benchmarks.load import asgi_call, wsgi_call
+from benchmarks.utils import explain, summarize
+from users.authentication import ClaimsRefreshToken
+from users.models import CustomUser
+from users.search import search_tiers
+
+PREFIX = 'bench-search'
+# Comptes générés reconnus à leur domaine : leurs noms d'utilisateur restent réalistes
+DOMAIN = f'{PREFIX}.example.com'
+SYLLABLES = ['a', 'ba', 'di', 'fa', 'ga', 'ka', 'la', 'ma', 'mou', 'na', 'ndi', 'o', 'ra', 'sa', 'se', 'ta', 'thi', 'wa', 'ye', 'za']
+
+
+def random_name(rng, syllables):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure /api/users/search/ (p50/p95/p99) sur un annuaire de --users comptes générés, "
+        "avec des recherches de 2 à 6 caractères tirées des noms existants ; requêtes envoyées à "
+        "l'application ASGI (config/asgi.py) ou WSGI (--wsgi), comme en production"
+    )
+    # Les vérifications chargeraient les URL avant que config/asgi.py ne choisisse le mode des lectures
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help="Comptes de l'annuaire (complété si besoin)")
+        parser.add_argument('--queries', type=int, default=500, help="Recherches mesurées par rôle")
+        parser.add_argument('--seed', type=int, default=0, help="Graine aléatoire : même graine, mêmes données")
+        parser.add_argument('--target-ms', type=float, default=50, help="Objectif de p99 (ms)")
+        parser.add_argument('--cleanup', action='store_true', help="Supprimer les comptes générés à la fin")
+        parser.add_argument('--wsgi', action='store_true', help="Mesurer l'application WSGI (config/wsgi.py)")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats")
+
+    def handle(self, *args, **options):
+        call = self.application(options['wsgi'])
+        rng = random.Random(options['seed'])
+        self.seed_users(options['users'], rng)
+        teacher, student = self.reference_users()
+
+        names = list(
+            CustomUser.objects.filter(email__endswith=DOMAIN)
+            .order_by('?').values_list('first_name', 'last_name', 'username')[:options['queries']]
+        )
+        queries = []
+        for first_name, last_name, username in names:
+            kind = rng.randrange(4)
+            if kind == 0:
+                queries.append(username[:rng.randint(2, 6)])
+            elif kind == 1:
+                queries.append(first_name[:rng.randint(2, 6)])
+            elif kind == 2:
+                queries.append(last_name[:rng.randint(2, 6)])
+            else:
+                queries.append(f'{first_name} {last_name[:rng.randint(1, 3)]}')
+
+        path = reverse('users:user-search')
+        results = []
+        try:
+            for role, user in (('teacher', teacher), ('student', student)):
+                token = str(ClaimsRefreshToken.for_user(user).access_token)
+                # Préchauffage : imports, URL, première connexion
+                call(f"{path}?{urlencode({'q': queries[0]})}", token)
+                durations, statuses = [], {}
+                for query in queries:
+                    start = time.perf_counter()
+                    status = call(f"{path}?{urlencode({'q': query})}", token)
+                    durations.append(time.perf_counter() - start)
+                    statuses[status] = statuses.get(status, 0) + 1
+                result = {'role': role, 'queries': len(queries), 'statuses': statuses, **summarize(durations)}
+                result['meets_target'] = result['p99_ms'] <= options['target_ms']
+                results.append(result)
+                self.stdout.write(
+                    f"{role:<8} p50={result['p50_ms']} ms  p95={result['p95_ms']} ms  p99={result['p99_ms']} ms  "
+                    f"max={result['max_ms']} ms  statuts={statuses}  "
+                    + (self.style.SUCCESS('objectif atteint') if result['meets_target']
+                       else self.style.ERROR(f"p99 > {options['target_ms']} ms"))
+                )
+            sample = queries[0] if queries else 'ab'
+            self.stdout.write(f"\nPlan pour q={sample!r} :\n" + explain(search_tiers(CustomUser.objects.all(), sample)[0].values("id")[:10]))
+        finally:
+            if options['cleanup']:
+                CustomUser.objects.filter(email__endswith=DOMAIN).delete()
+                CustomUser.objects.filter(username=f'{PREFIX}-teacher').delete()
+
+        if options['output']:
+            report = {'options': {key: options[key] for key in ('users', 'queries', 'seed', 'target_ms')},
+                      'database': connection.vendor, 'async_reads': not options['wsgi'] and settings.ASYNC_API_READS, 'results': results}
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def application(self, wsgi):
+        """
+        Appel d'une URL par l'application du déploiement, sans client de test
+        (qui exécuterait la vue asynchrone dans async_to_sync) ; retourne le statut.
+        """
+        if wsgi:
+            from config.wsgi import application as app
+
+            call = lambda path, token: wsgi_call(app, path, token)
+        else:
+            from config.asgi import application as app
+
+            loop = asyncio.new_event_loop()
+            call = lambda path, token: loop.run_until_complete(asgi_call(app, path, token))
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'localhost']
+        # Une ligne de journal par requête fausserait les durées (après django.setup())
+        logging.getLogger('config.performance').setLevel(logging.ERROR)
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        return call
+
+    def seed_users(self, count, rng):
+        existing = CustomUser.objects.filter(email__endswith=DOMAIN).count()
+        if existing >= count:
+            return
+        self.stdout.write(f"Génération de {count - existing} comptes...")
+        # Un seul hachage pour tous les comptes : seule la recherche doit coûter
+        password = make_password(None)
+        batch = []
+        for index in range(existing, count):
+            first_name, last_name = random_name(rng, rng.randint(2, 3)), random_name(rng, rng.randint(2, 4))
+            username = f'{first_name[0]}{last_name}.{index}'.lower()
+            # Un compte sur 50 inactif : exclu des résultats
+            batch.append(CustomUser(
+                username=username, first_name=first_name, last_name=last_name,
+                email=f'{username}@{DOMAIN}', password=password, is_active=index % 50 != 0,
+            ))
+            if len(batch) == 5000:
+                CustomUser.objects.bulk_create(batch)
+                batch = []
+        CustomUser.objects.bulk_create(batch)
+
+    def reference_users(self):
+        teacher, _ = CustomUser.objects.get_or_create(username=f'{PREFIX}-teacher', defaults={'is_staff': True})
+        student = CustomUser.objects.filter(email__endswith=DOMAIN, is_active=True).order_by('pk').first()
+        return teacher, student
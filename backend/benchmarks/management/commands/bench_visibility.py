@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+
+from benchmarks.seed import seed_school
+from benchmarks.utils import explain, measure
+from projects.models import Project
+from projects.visibility import visible_projects, visible_tasks
+from tasks.models import Task
+from users.models import CustomUser
+
+
+def legacy_projects(user):
+    # Ancienne requête : OR sur la jointure des membres puis DISTINCT
+    return Project.objects.filter(
+        Q(owner=user) | (Q(members=user) & ~Q(status='todo'))
+    ).distinct()
+
+
+def legacy_tasks(user):
+    return Task.objects.filter(
+        Q(project__owner=user) | Q(assigned_to=user) | Q(project__members=user)
+    ).distinct()
+
+
+class Command(BaseCommand):
+    help = "Compare (plans EXPLAIN et durées) la visibilité par OR + DISTINCT et par EXISTS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10000)
+        parser.add_argument('--tasks', type=int, default=1000000)
+        parser.add_argument('--teachers', type=int, default=100)
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--skip-seed', action='store_true', help="Réutiliser les données déjà présentes")
+        parser.add_argument('--no-explain', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            self.stdout.write("Génération des données...")
+            seed_school(
+                teachers=options['teachers'],
+                students=options['students'],
+                projects=options['projects'],
+                tasks=options['tasks'],
+                log=self.stdout.write,
+            )
+
+        # Utilisateurs les plus chargés : pire cas pour chaque requête
+        teacher = CustomUser.objects.filter(is_staff=True).annotate(n=Count('owned_projects')).order_by('-n').first()
+        student = CustomUser.objects.filter(is_staff=False).annotate(n=Count('projects')).order_by('-n').first()
+        if teacher is None or student is None:
+            raise CommandError("Aucune donnée : relancer sans --skip-seed")
+
+        cases = [
+            ('projets / enseignant', legacy_projects(teacher), visible_projects(teacher)),
+            ('projets / étudiant', legacy_projects(student), visible_projects(student)),
+            ('tâches / enseignant', legacy_tasks(teacher), visible_tasks(teacher)),
+            ('tâches / étudiant', legacy_tasks(student), visible_tasks(student)),
+        ]
+        for label, legacy, current in cases:
+            legacy_ids = set(legacy.values_list('pk', flat=True))
+            current_ids = set(current.values_list('pk', flat=True))
+            if legacy_ids != current_ids:
+                raise CommandError(f"{label} : résultats différents ({len(legacy_ids)} != {len(current_ids)})")
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label} ({len(current_ids)} lignes)"))
+            for name, queryset in (('OR + DISTINCT', legacy), ('EXISTS', current)):
+                timings = measure(lambda: list(queryset.values_list('pk', flat=True)), runs=options['runs'])
+                self.stdout.write(f"  {name:<14} p50={timings['p50_ms']} ms  max={timings['max_ms']} ms")
+                if not options['no_explain']:
+                    self.stdout.write('    ' + explain(queryset.values('pk')).replace('\n', '\n    '))
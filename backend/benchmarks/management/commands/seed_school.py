@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.seed import SEED_PASSWORD, seed_school
+
+
+class Command(BaseCommand):
+    help = "Génère un établissement synthétique (enseignants, étudiants, projets avec membres, tâches avec échéances)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=20)
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--projects', type=int, default=1000)
+        parser.add_argument('--tasks', type=int, default=20000)
+        parser.add_argument('--min-members', type=int, default=3, help="Étudiants membres par projet (minimum)")
+        parser.add_argument('--max-members', type=int, default=30, help="Étudiants membres par projet (maximum)")
+        parser.add_argument('--prefix', default='bench', help="Préfixe des noms d'utilisateur générés (commence par « bench »)")
+        parser.add_argument('--seed', type=int, default=0, help="Graine aléatoire : même graine, mêmes données")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['min_members'] > options['max_members']:
+            raise CommandError("--min-members doit être inférieur ou égal à --max-members")
+        if options['teachers'] < 1 or (options['tasks'] and options['projects'] < 1):
+            raise CommandError("Il faut au moins un enseignant, et au moins un projet pour créer des tâches")
+        start = time.perf_counter()
+        created = seed_school(
+            teachers=options['teachers'],
+            students=options['students'],
+            projects=options['projects'],
+            tasks=options['tasks'],
+            members_per_project=(options['min_members'], options['max_members']),
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Données générées en {round(time.perf_counter() - start, 1)} s "
+            f"({len(created['projects'])} projets). Mot de passe des comptes : {SEED_PASSWORD}"
+        ))
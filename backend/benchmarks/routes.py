@@ -0,0 +1,239 @@
+"""
+Scénarios de la commande bench_routes : au moins un appel par route nommée
+de config/urls.py, avec l'utilisateur et les données qui lui conviennent.
+"""
+import time
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import Count
+from django.urls import URLResolver, get_resolver
+from PIL import Image
+from users.authentication import ClaimsRefreshToken
+
+from projects.models import Project
+from tasks.models import Task
+from users.models import CustomUser, RosterImport
+from users.roster import get_pool as get_roster_pool
+
+from .seed import SEED_PASSWORD
+
+# Préfixe des objets créés pendant la mesure (supprimés à la fin)
+PREFIX = 'bench-routes'
+
+# Routes volontairement non mesurées ici, avec la raison
+EXCLUDED_ROUTES = {
+    'api_events': "flux SSE sans fin : voir bench_events",
+}
+
+TASK_STATUSES = ['todo', 'in_progress', 'done']
+
+
+def named_routes(patterns=None, namespace=''):
+    """
+    Noms complets ('app:nom') des routes de l'URLconf, hors administration.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names |= named_routes(pattern.url_patterns, prefix)
+        elif pattern.name:
+            names.add(namespace + pattern.name)
+    return names
+
+
+class BenchContext:
+    """
+    Utilisateurs et objets de référence d'une mesure : l'enseignant qui
+    possède le plus de projets, une tâche assignée dans l'un de ses projets
+    en cours (et son étudiant) et un administrateur temporaire. Les champs
+    modifiés par les scénarios sont relevés pour être rétablis par cleanup().
+    """
+
+    def __init__(self):
+        self.teacher = (
+            CustomUser.objects.filter(is_staff=True, is_superuser=False)
+            .annotate(n=Count('owned_projects')).order_by('-n').first()
+        )
+        self.task = (
+            Task.objects.filter(
+                project__owner=self.teacher, project__status='in_progress',
+                assigned_to__is_staff=False, assigned_to__is_superuser=False,
+            )
+            .select_related('project', 'assigned_to').order_by('pk').first()
+        )
+        self.project = self.task.project if self.task else None
+        self.student = self.task.assigned_to if self.task else None
+        # Authentifié par jeton JWT : aucun mot de passe utilisable
+        CustomUser.objects.filter(username=f'{PREFIX}-admin').delete()
+        self.admin = CustomUser.objects.create_superuser(
+            username=f'{PREFIX}-admin', email=f'{PREFIX}-admin@example.com', password=None
+        )
+        self.saved = [
+            (obj, fields, {field: getattr(obj, field) for field in fields})
+            for obj, fields in (
+                (self.task, ['status', 'position']),
+                (self.project, ['description']),
+                (self.student, ['first_name', 'avatar', 'avatar_variants']),
+            )
+            if obj is not None
+        ]
+        self.counter = 0
+        self.imports = RosterImport.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    def is_ready(self):
+        return self.task is not None
+
+    def user(self, role):
+        return getattr(self, role) if role else None
+
+    def unique(self, label):
+        self.counter += 1
+        return f'{PREFIX}-{label}-{self.counter}'
+
+    def new_task(self, **fields):
+        return Task.objects.create(
+            title=self.unique('tache'), description='Tâche de mesure', project=self.project,
+            assigned_to=self.student, **fields
+        )
+
+    def task_data(self):
+        return {
+            'title': self.unique('tache'), 'description': 'Tâche de mesure',
+            'project': self.project.pk, 'assigned_to': self.student.pk,
+        }
+
+    def wait_for_imports(self):
+        # Imports acceptés (202) traités en arrière-plan : terminés hors chronométrage
+        while get_roster_pool().pending:
+            time.sleep(0.01)
+
+    def roster_data(self):
+        self.wait_for_imports()
+        return {
+            'students': [{'username': self.unique('eleve'), 'password': SEED_PASSWORD} for _ in range(10)],
+            'projects': [self.project.pk],
+        }
+
+    def roster_import(self):
+        return RosterImport.objects.create(created_by=self.teacher, status='done', rows=0,
+                                           result={'created': 0, 'existing': 0, 'errors': 0, 'rows': []})
+
+    def next_status(self, task):
+        task.refresh_from_db(fields=['status'])
+        return TASK_STATUSES[(TASK_STATUSES.index(task.status) + 1) % len(TASK_STATUSES)]
+
+    def cleanup(self):
+        self.wait_for_imports()
+        RosterImport.objects.filter(pk__gt=self.imports).delete()
+        Task.objects.filter(title__startswith=PREFIX).delete()
+        Project.objects.filter(name__startswith=PREFIX).delete()
+        CustomUser.objects.filter(username__startswith=PREFIX).delete()
+        # Par save() : compteurs, caches et positions suivent
+        for obj, fields, values in self.saved:
+            obj.refresh_from_db(fields=fields)
+            for field, value in values.items():
+                setattr(obj, field, value)
+            obj.save(update_fields=fields)
+
+
+class Scenario:
+    """
+    Un appel mesuré : `build(context)` retourne les arguments de l'URL et le
+    corps JSON (les paramètres de requête pour un GET, un formulaire multipart
+    s'il contient un fichier) ; il est exécuté avant chaque appel, hors chronométrage (il
+    peut créer l'objet à supprimer, par exemple).
+    """
+
+    def __init__(self, route, method='get', role='teacher', build=None, label=None):
+        self.route = route
+        self.method = method
+        self.role = role
+        self.build = build or (lambda context: ([], None))
+        self.label = label or f"{method.upper()} {route} ({role or 'anonyme'})"
+
+
+def account_data(context):
+    username = context.unique('compte')
+    return [], {'username': username, 'email': f'{username}@example.com', 'password': SEED_PASSWORD, 'password2': SEED_PASSWORD}
+
+
+def avatar_data(context):
+    # Photo de téléphone réduite (1600x1200) : seul l'envoi est mesuré, pas le traitement
+    output = BytesIO()
+    Image.effect_noise((1600, 1200), 64).convert('RGB').save(output, 'JPEG', quality=85)
+    return [], {'avatar': SimpleUploadedFile('photo.jpg', output.getvalue(), content_type='image/jpeg')}
+
+
+SCENARIOS = [
+    # Authentification
+    Scenario('token_obtain_pair', 'post', None,
+             lambda c: ([], {'username': c.student.username, 'password': SEED_PASSWORD})),
+    Scenario('token_refresh', 'post', None, lambda c: ([], {'refresh': str(ClaimsRefreshToken.for_user(c.student))})),
+
+    # Projets
+    Scenario('projects:api_project_list', role='teacher'),
+    Scenario('projects:api_project_list', role='student'),
+    Scenario('projects:api_project_list', 'post', 'teacher', lambda c: ([], {
+        'name': c.unique('projet'), 'description': 'Projet de mesure',
+        'members': list(c.project.members.values_list('pk', flat=True)[:10]),
+    })),
+    Scenario('projects:api_project_detail', 'get', 'student', lambda c: ([c.project.pk], None)),
+    Scenario('projects:api_project_detail', 'patch', 'teacher',
+             lambda c: ([c.project.pk], {'description': c.unique('description')})),
+    Scenario('projects:api_project_detail', 'delete', 'teacher', lambda c: ([Project.objects.create(
+        name=c.unique('projet'), description='Projet de mesure', owner=c.teacher).pk], None)),
+    Scenario('projects:api_project_statistics', role='teacher'),
+    Scenario('projects:api_project_statistics', role='student'),
+    Scenario('projects:api_project_export', role='teacher'),
+    Scenario('projects:project_tasks_list', 'get', 'teacher', lambda c: ([c.project.pk], None)),
+    Scenario('projects:project_tasks_create', 'post', 'teacher', lambda c: ([c.project.pk], c.task_data())),
+    Scenario('projects:project_activity', 'get', 'teacher', lambda c: ([c.project.pk], None)),
+
+    # Tâches
+    Scenario('tasks:api_task_list', role='teacher'),
+    Scenario('tasks:api_task_list', role='student'),
+    Scenario('tasks:api_task_list', 'post', 'teacher', lambda c: ([], c.task_data())),
+    Scenario('tasks:api_task_create', 'post', 'teacher', lambda c: ([c.project.pk], c.task_data())),
+    Scenario('tasks:api_task_detail', 'get', 'student', lambda c: ([c.task.pk], None)),
+    Scenario('tasks:api_task_detail', 'patch', 'student',
+             lambda c: ([c.task.pk], {'status': c.next_status(c.task)})),
+    Scenario('tasks:api_task_update', 'patch', 'student',
+             lambda c: ([c.task.pk], {'status': c.next_status(c.task)})),
+    Scenario('tasks:api_task_move', 'post', 'student',
+             lambda c: ([c.task.pk], {'status': c.next_status(c.task)})),
+    Scenario('tasks:api_task_delete', 'delete', 'student', lambda c: ([c.new_task().pk], None)),
+    Scenario('tasks:api_task_bulk', 'post', 'teacher',
+             lambda c: ([], {'create': [c.task_data() for _ in range(50)]})),
+    Scenario('tasks:api_task_statistics', role='teacher'),
+    Scenario('tasks:api_task_statistics', role='student'),
+    Scenario('tasks:api_task_export', role='student'),
+
+    # Utilisateurs
+    Scenario('api_cache_metrics', role='admin'),
+    Scenario('api_events_ticket', 'post', 'student'),
+    Scenario('users:api-root', role='admin'),
+    Scenario('users:user-list', role='admin'),
+    Scenario('users:user-list', role='student'),
+    Scenario('users:user-detail', 'get', 'admin', lambda c: ([c.student.pk], None)),
+    Scenario('users:user-students', role='teacher'),
+    Scenario('users:user-search', 'get', 'teacher', lambda c: ([], {'q': c.student.first_name[:3]})),
+    Scenario('users:user-search', 'get', 'student', lambda c: ([], {'q': c.student.username[:4]})),
+    Scenario('users:user-me', role='student'),
+    Scenario('users:user-me', 'patch', 'student', lambda c: ([], {'first_name': c.unique('prenom')[:150]})),
+    Scenario('users:user-avatar', 'post', 'student', avatar_data),
+    # Après l'envoi : fichiers supprimés
+    Scenario('users:user-avatar', 'delete', 'student'),
+    Scenario('users:register-student', 'post', None, account_data),
+    Scenario('users:user-register-student', 'post', None, account_data),
+    Scenario('users:create-teacher', 'post', 'admin', account_data),
+    Scenario('users:user-create-teacher', 'post', 'admin', account_data),
+    # Import accepté (202) : le coût mesuré est celui de la requête, pas du traitement
+    Scenario('users:roster-import', 'post', 'teacher', lambda c: ([], c.roster_data())),
+    Scenario('users:roster-import-detail', 'get', 'teacher', lambda c: ([c.roster_import().pk], None)),
+]
@@ -0,0 +1,165 @@
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from projects.models import Project
+from tasks.counters import rebuild_counters
+from tasks.models import Task
+from tasks.positions import key_after
+from users.models import CustomUser
+
+# Mot de passe commun à tous les comptes générés (haché une seule fois)
+SEED_PASSWORD = 'bench-password'
+# Début des noms des comptes générés et des comptes temporaires des commandes
+BENCH_PREFIX = 'bench'
+
+
+class SeedError(CommandError):
+    """
+    Base refusée par seed_school() ; affichée telle quelle par les commandes.
+    """
+
+
+def is_seeded(prefix=BENCH_PREFIX):
+    """
+    Vrai si la base ne contient que des données de mesure : comptes générés
+    par seed_school et comptes temporaires des commandes (« bench-... »).
+    Les commandes qui suppriment des index ou modifient des lignes existantes
+    refusent toute autre base.
+    """
+    users = CustomUser.objects.all()
+    return users.exists() and not users.exclude(username__startswith=prefix).exists()
+
+
+def check_seed_target(prefix=BENCH_PREFIX):
+    """
+    Refuse de générer des données dans une base qui contient d'autres
+    comptes que ceux des mesures (base de développement ou réelle), ou qui
+    contient déjà des comptes `prefix`_* (noms d'utilisateur en double).
+    """
+    if not prefix.startswith(BENCH_PREFIX):
+        raise SeedError(f"Le préfixe doit commencer par « {BENCH_PREFIX} » (comptes reconnus par les commandes bench_*)")
+    if CustomUser.objects.exists() and not is_seeded():
+        raise SeedError("La base contient des comptes qui ne viennent pas de seed_school : utiliser une base dédiée aux mesures")
+    if CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+        raise SeedError(
+            f"Des comptes {prefix}_* existent déjà : relancer avec --skip-seed, changer de préfixe "
+            "ou repartir d'une base vide (manage.py flush)"
+        )
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed_school(teachers=20, students=500, projects=1000, tasks=20000,
+                members_per_project=(3, 30), prefix=BENCH_PREFIX, seed=0,
+                batch_size=5000, log=None):
+    """
+    Génère un établissement synthétique : enseignants, étudiants, projets
+    (avec membres) et tâches (avec dates limites). Tout passe par des
+    bulk_create par lots ; les compteurs de tâches sont reconstruits à la fin
+    puisque les signaux ne sont pas déclenchés. SeedError si la base n'est
+    pas une base de mesure vide de ces comptes (check_seed_target()).
+    Retourne les identifiants des enseignants et des étudiants créés.
+    """
+    check_seed_target(prefix)
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    password = make_password(SEED_PASSWORD)
+    today = datetime.date.today()
+
+    def make_users(count, role, is_staff):
+        users = (
+            CustomUser(
+                username=f'{prefix}_{role}_{index}',
+                email=f'{prefix}_{role}_{index}@example.com',
+                first_name=f'{role.capitalize()}{index}',
+                last_name=prefix.capitalize(),
+                password=password,
+                role=role,
+                is_staff=is_staff,
+            )
+            for index in range(count)
+        )
+        ids = []
+        for batch in _batches(users, batch_size):
+            ids.extend(user.pk for user in CustomUser.objects.bulk_create(batch))
+        return ids
+
+    with transaction.atomic():
+        teacher_ids = make_users(teachers, 'teacher', True)
+        student_ids = make_users(students, 'student', False)
+        log(f"{len(teacher_ids)} enseignants, {len(student_ids)} étudiants")
+
+        statuses = [status for status, _ in Project.STATUS_CHOICES]
+        project_ids = []
+        new_projects = (
+            Project(
+                name=f'{prefix} projet {index}',
+                description='Projet généré',
+                owner_id=rng.choice(teacher_ids),
+                status=rng.choice(statuses),
+            )
+            for index in range(projects)
+        )
+        owners = {}
+        for batch in _batches(new_projects, batch_size):
+            for project in Project.objects.bulk_create(batch):
+                project_ids.append(project.pk)
+                owners[project.pk] = project.owner_id
+
+        Membership = Project.members.through
+        members = {}
+        low, high = members_per_project
+        rows = []
+        for project_id in project_ids:
+            chosen = rng.sample(student_ids, min(len(student_ids), rng.randint(low, high)))
+            members[project_id] = chosen
+            rows.append(Membership(project_id=project_id, customuser_id=owners[project_id]))
+            rows.extend(Membership(project_id=project_id, customuser_id=user_id) for user_id in chosen)
+        for batch in _batches(rows, batch_size):
+            Membership.objects.bulk_create(batch, ignore_conflicts=True)
+        log(f"{len(project_ids)} projets, {len(rows)} adhésions")
+
+        task_statuses = [status for status, _ in Task.STATUS_CHOICES]
+
+        # Dernière clé de position par colonne (projet, statut) : ajout en fin de colonne
+        positions = {}
+
+        def make_tasks():
+            for index in range(tasks):
+                project_id = rng.choice(project_ids)
+                has_due_date = rng.random() < 0.6
+                status = rng.choice(task_statuses)
+                positions[project_id, status] = key_after(positions.get((project_id, status)))
+                yield Task(
+                    title=f'Tâche {index}',
+                    description='Tâche générée',
+                    project_id=project_id,
+                    assigned_to_id=rng.choice(members[project_id]) if members[project_id] and rng.random() < 0.8 else None,
+                    status=status,
+                    due_date=today + datetime.timedelta(days=rng.randint(-30, 90)) if has_due_date else None,
+                    position=positions[project_id, status],
+                )
+
+        created = 0
+        for batch in _batches(make_tasks(), batch_size):
+            Task.objects.bulk_create(batch)
+            created += len(batch)
+            if created % (batch_size * 20) == 0:
+                log(f"{created} tâches")
+        log(f"{created} tâches")
+
+    rebuild_counters()
+    return {'teachers': teacher_ids, 'students': student_ids, 'projects': project_ids}
@@ -0,0 +1,110 @@
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from projects.models import Project
+from tasks.models import Task, TaskEvent, TaskReminder
+from users.models import CustomUser
+from .routes import EXCLUDED_ROUTES, PREFIX, SCENARIOS, named_routes
+
+
+class BenchRoutesTests(TestCase):
+    def test_every_route_has_a_scenario(self):
+        covered = {scenario.route for scenario in SCENARIOS} | set(EXCLUDED_ROUTES)
+        self.assertEqual(named_routes() - covered, set())
+        self.assertEqual({scenario.route for scenario in SCENARIOS} - named_routes(), set())
+
+    # Le client de la commande se présente comme localhost (autorisé d'office avec DEBUG seulement)
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_seed_then_bench_writes_comparable_json(self):
+        call_command('seed_school', teachers=2, students=10, projects=5, tasks=50, stdout=StringIO())
+        self.assertEqual((Project.objects.count(), Task.objects.count()), (5, 50))
+
+        before = list(Task.objects.order_by('pk').values_list('pk', 'status', 'position', 'project__description'))
+        students = list(CustomUser.objects.order_by('pk').values_list('pk', 'first_name', 'avatar'))
+
+        # Avatars envoyés écrits dans le dossier temporaire
+        with tempfile.TemporaryDirectory() as directory, override_settings(MEDIA_ROOT=directory):
+            path = os.path.join(directory, 'routes.json')
+            call_command('bench_routes', runs=1, warmup=0, output=path, stdout=StringIO())
+            with open(path) as output:
+                report = json.load(output)
+
+        self.assertEqual(len(report['results']), len(SCENARIOS))
+        failed = [result['scenario'] for result in report['results'] if max(result['status']) >= 400]
+        self.assertEqual(failed, [])
+        # Authentification sans requête SQL (users.authentication) : seules les routes sans lecture en base n'en comptent aucune
+        without_queries = {result['scenario'] for result in report['results'] if result['queries'] == 0}
+        self.assertEqual(without_queries, {'GET api_cache_metrics (admin)', 'GET users:api-root (admin)', 'POST api_events_ticket (student)'})
+        # Les objets créés par la mesure sont supprimés
+        self.assertFalse(Task.objects.filter(title__startswith=PREFIX).exists())
+        self.assertFalse(CustomUser.objects.filter(username__startswith=PREFIX).exists())
+        # Et les données générées retrouvent leur état
+        self.assertEqual(list(Task.objects.order_by('pk').values_list('pk', 'status', 'position', 'project__description')), before)
+        self.assertEqual(list(CustomUser.objects.order_by('pk').values_list('pk', 'first_name', 'avatar')), students)
+
+    def test_refuses_unseeded_database(self):
+        call_command('seed_school', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        CustomUser.objects.create_user(username='prof', password='x')
+        with self.assertRaises(CommandError):
+            call_command('bench_routes', runs=1, warmup=0, stdout=StringIO())
+        self.assertFalse(CustomUser.objects.filter(username__startswith=PREFIX).exists())
+
+
+class SeedSchoolTests(TestCase):
+    def test_refuses_existing_accounts_and_second_run(self):
+        CustomUser.objects.create_user(username='prof', password='x')
+        with self.assertRaisesMessage(CommandError, 'seed_school'):
+            call_command('seed_school', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        CustomUser.objects.all().delete()
+
+        call_command('seed_school', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, '--skip-seed'):
+            call_command('bench_visibility', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        self.assertEqual(Project.objects.count(), 1)
+
+
+class BenchActivityTests(TestCase):
+    def test_refuses_to_seed_unseeded_database(self):
+        call_command('seed_school', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        CustomUser.objects.create_user(username='prof', password='x')
+        with self.assertRaises(CommandError):
+            call_command('bench_activity', events=10, stdout=StringIO())
+        self.assertFalse(TaskEvent.objects.exists())
+
+
+class BenchRemindersTests(TestCase):
+    def test_refuses_unseeded_database(self):
+        call_command('seed_school', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        task = Task.objects.exclude(due_date=None).first() or Task.objects.first()
+        reminder = TaskReminder.objects.create(task=task, window=1, due_date=datetime.date.today())
+        CustomUser.objects.create_user(username='prof', password='x')
+        with self.assertRaises(CommandError):
+            call_command('bench_reminders', skip_seed=True, stdout=StringIO())
+        self.assertTrue(TaskReminder.objects.filter(pk=reminder.pk).exists())
+
+
+class BenchTaskFiltersTests(TestCase):
+    def index_names(self):
+        with connection.cursor() as cursor:
+            return set(connection.introspection.get_constraints(cursor, Task._meta.db_table))
+
+    def test_compare_refuses_unseeded_database(self):
+        call_command('seed_school', teachers=1, students=2, projects=1, tasks=5, stdout=StringIO())
+        CustomUser.objects.create_user(username='prof', password='x')
+        with self.assertRaises(CommandError):
+            call_command('bench_task_filters', skip_seed=True, compare=True, runs=1, stdout=StringIO())
+        self.assertIn('task_assignee_status_idx', self.index_names())
+
+    def test_compare_restores_indexes(self):
+        call_command('seed_school', teachers=2, students=10, projects=5, tasks=50, stdout=StringIO())
+        out = StringIO()
+        call_command('bench_task_filters', skip_seed=True, compare=True, runs=1, stdout=out)
+        self.assertIn('sans index', out.getvalue())
+        self.assertTrue({'task_board_position_idx', 'task_assignee_status_idx', 'task_open_due_idx'} <= self.index_names())
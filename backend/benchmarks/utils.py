@@ -0,0 +1,63 @@
+import statistics
+import time
+
+
+def percentile(values, fraction):
+    """
+    Percentile par rang le plus proche (values doit être non vide).
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(durations):
+    """
+    Résumé en millisecondes d'une série de durées mesurées en secondes.
+    """
+    milliseconds = [duration * 1000 for duration in durations]
+    return {
+        'runs': len(milliseconds),
+        'min_ms': round(min(milliseconds), 3),
+        'p50_ms': round(statistics.median(milliseconds), 3),
+        'p95_ms': round(percentile(milliseconds, 0.95), 3),
+        'p99_ms': round(percentile(milliseconds, 0.99), 3),
+        'max_ms': round(max(milliseconds), 3),
+    }
+
+
+def measure(function, runs=5, warmup=1):
+    """
+    Exécute `function` plusieurs fois et retourne le résumé des durées.
+    """
+    for _ in range(warmup):
+        function()
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def explain(queryset):
+    """
+    Plan d'exécution d'un queryset (ANALYZE sur PostgreSQL).
+    """
+    from django.db import connection
+
+    if connection.vendor == 'postgresql':
+        return queryset.explain(analyze=True, buffers=True)
+    return queryset.explain()
+
+
+def api_client(user):
+    """
+    Client de test Django authentifié par un vrai jeton JWT (chemin complet
+    d'authentification, comme le frontend).
+    """
+    from django.test import Client
+    from users.authentication import ClaimsRefreshToken
+
+    token = ClaimsRefreshToken.for_user(user).access_token
+    return Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
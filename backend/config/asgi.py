@@ -13,4 +13,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# Servie par un serveur ASGI (uvicorn, daphne), l'application tient les
+# connexions longues de /api/events/ sans bloquer un thread par client
 application = get_asgi_application()
+
+# Lectures de l'API par l'ORM asynchrone : décidé ici, avant que la première
+# requête ne charge les URL (config.async_views)
+from config.async_views import serve_async_reads  # noqa: E402
+
+serve_async_reads()
@@ -0,0 +1,234 @@
+"""
+Lectures asynchrones de l'API, servies par l'application ASGI.
+
+async_read_view() place une vue asynchrone devant une vue DRF existante :
+les GET courants sont traités avec l'ORM asynchrone (le worker n'immobilise
+pas de thread pendant les requêtes SQL) ; le reste est confié à la vue DRF
+synchrone, dans un thread :
+
+- les autres méthodes (écritures) ;
+- les lectures que le chemin asynchrone ne prend pas en charge (le
+  gestionnaire lève SyncFallback : ?since=, pagination, ?format=...).
+
+Un refus (jeton refusé, permission refusée, objet introuvable, paramètre
+invalide) est levé par le chemin asynchrone comme par DRF et converti par
+handle_exception() de la vue : la réponse d'erreur est celle de DRF, sans
+refaire la lecture dans la vue synchrone.
+
+Le gestionnaire reçoit une instance de la vue DRF préparée comme par
+APIView.initial() (requête DRF, utilisateur, rendu JSON) : get_queryset(),
+get_serializer() et les mixins de la vue servent tels quels, seules les
+lectures en base passent par l'ORM asynchrone.
+
+Le mode est choisi par le point d'entrée : config/asgi.py appelle
+serve_async_reads() avant le chargement des URL. Ailleurs (config/wsgi.py,
+runserver, commandes), async_read_view() retourne la vue synchrone : une vue
+asynchrone y serait exécutée dans une boucle d'événements créée pour chaque
+requête. ASYNC_API_READS=False les désactive aussi sous ASGI ; la suite de
+tests (TESTING) passe par le chemin asynchrone.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import ForcedAuthentication
+from users.authentication import ClaimsJWTAuthentication
+
+# Fixé par config/asgi.py, avant que les URL ne construisent leurs vues
+_served_by_asgi = False
+
+
+class SyncFallback(Exception):
+    """
+    Lecture non traitée par le chemin asynchrone : la vue DRF synchrone répond.
+    """
+
+
+class AsyncJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    ClaimsJWTAuthentication pour les vues asynchrones : un utilisateur
+    inconnu du cache est lu par l'ORM asynchrone.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+async def authenticate(request):
+    """
+    Authentifie la requête DRF par l'en-tête Authorization, comme
+    Request._authenticate() : utilisateur (AnonymousUser sans en-tête), jeton
+    et authentificateur retenu, lu par permission_denied(). Un jeton refusé
+    lève AuthenticationFailed.
+    """
+    # Client de test (force_authenticate()) : utilisateur fourni, sans lecture
+    forced = next((item for item in request.authenticators if isinstance(item, ForcedAuthentication)), None)
+    authenticator = forced or AsyncJWTAuthentication()
+    request._authenticator, request.user, request.auth = None, AnonymousUser(), None
+    result = forced.authenticate(request) if forced else await authenticator.aauthenticate(request)
+    if result is not None:
+        request._authenticator = authenticator
+        request.user, request.auth = result
+    return request.user
+
+
+def permission_denied(view, permission):
+    view.permission_denied(
+        view.request, message=getattr(permission, 'message', None), code=getattr(permission, 'code', None)
+    )
+
+
+def check_permissions(view):
+    """
+    Permissions de la vue (has_permission), comme APIView.check_permissions().
+    """
+    for permission in view.get_permissions():
+        if not permission.has_permission(view.request, view):
+            permission_denied(view, permission)
+
+
+async def check_object_permissions(view, obj):
+    """
+    Permissions sur l'objet : ahas_object_permission() quand la permission
+    en a une version asynchrone, sinon has_object_permission() dans un thread.
+    """
+    for permission in view.get_permissions():
+        check = getattr(permission, 'ahas_object_permission', None)
+        if type(permission).has_object_permission is BasePermission.has_object_permission:
+            # Pas de règle sur l'objet (IsAuthenticated...) : inutile de passer par un thread
+            continue
+        if check is not None:
+            allowed = await check(view.request, view, obj)
+        else:
+            allowed = await sync_to_async(permission.has_object_permission)(view.request, view, obj)
+        if not allowed:
+            permission_denied(view, permission)
+
+
+async def get_object(view):
+    """
+    Équivalent asynchrone de GenericAPIView.get_object() (Http404 comme
+    get_object_or_404() de DRF).
+    """
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    try:
+        obj = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+    except (queryset.model.DoesNotExist, TypeError, ValueError):
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+    await check_object_permissions(view, obj)
+    return obj
+
+
+def require_unpaginated(view):
+    """
+    Les pages (?cursor=, ?page_size=) sont servies par la vue synchrone.
+    """
+    paginator = view.paginator
+    if paginator is None:
+        return
+    params = view.request.query_params
+    requested = any(
+        getattr(paginator, param, None) in params for param in ('cursor_query_param', 'page_size_query_param')
+    )
+    if requested or not getattr(paginator, 'optional', False):
+        raise SyncFallback
+
+
+def json_response(data, status=200):
+    """
+    Réponse JSON identique à celle de la vue DRF (même rendu, même
+    Content-Type) ; `data` reste accessible comme sur une Response DRF.
+    """
+    response = HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+    response.data = data
+    return response
+
+
+def serve_async_reads():
+    """
+    Appelé par config/asgi.py : les vues des URL, construites ensuite,
+    servent leurs lectures par le chemin asynchrone.
+    """
+    global _served_by_asgi
+    _served_by_asgi = True
+
+
+def async_reads_enabled():
+    return getattr(settings, 'ASYNC_API_READS', True) and (_served_by_asgi or settings.TESTING)
+
+
+def prepare_view(sync_view, request, args, kwargs):
+    """
+    Instance de la vue DRF pour le gestionnaire asynchrone, comme après
+    APIView.initial() sans l'authentification (voir authenticate()) : requête
+    DRF, rendu JSON déjà négocié, en-têtes par défaut.
+    """
+    view = sync_view.cls(**sync_view.initkwargs)
+    actions = getattr(sync_view, 'actions', None)
+    if actions:
+        # Comme ViewSetMixin.as_view() : méthodes HTTP liées aux actions
+        view.action_map = actions
+        view.action = actions.get('get')
+        for method, action in actions.items():
+            setattr(view, method, getattr(view, action))
+    view.args, view.kwargs = args, kwargs
+    drf_request = view.initialize_request(request, *args, **kwargs)
+    drf_request.accepted_renderer = JSONRenderer()
+    drf_request.accepted_media_type = JSONRenderer.media_type
+    view.setup(drf_request, *args, **kwargs)
+    view.format_kwarg = None
+    view.headers = view.default_response_headers
+    return view
+
+
+def async_read_view(sync_view, handler):
+    """
+    Vue asynchrone devant `sync_view` (résultat de as_view() ou de
+    @api_view) : les GET JSON sont confiés à `handler(view, request, *args,
+    **kwargs)`, les autres requêtes et les SyncFallback à la vue synchrone.
+    """
+    if not async_reads_enabled():
+        return sync_view
+
+    async def view(request, *args, **kwargs):
+        # Négociation de DRF (rendu JSON uniquement) : tout autre cas passe par la vue DRF
+        if request.method == 'GET' and request.accepts(JSONRenderer.media_type) and 'format' not in request.GET:
+            drf_view = prepare_view(sync_view, request, args, kwargs)
+            try:
+                await authenticate(drf_view.request)
+                check_permissions(drf_view)
+                response = await handler(drf_view, drf_view.request, *args, **kwargs)
+            except SyncFallback:
+                pass
+            except (APIException, Http404, PermissionDenied) as exc:
+                # Réponse d'erreur de DRF (401, 403, 404, 400), rendue ici
+                response = drf_view.handle_exception(exc)
+                return drf_view.finalize_response(drf_view.request, response).render()
+            else:
+                # En-têtes ajoutés par APIView.finalize_response() (Allow, Vary)
+                return drf_view.finalize_response(drf_view.request, response)
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    # Attributs lus par la configuration des URL, le middleware CSRF et les budgets de requêtes
+    view.cls = sync_view.cls
+    view.initkwargs = sync_view.initkwargs
+    for attribute in ('actions', 'query_budget'):
+        if hasattr(sync_view, attribute):
+            setattr(view, attribute, getattr(sync_view, attribute))
+    view.csrf_exempt = True
+    view.sync_view = sync_view
+    view.__name__ = sync_view.__name__
+    view.__doc__ = sync_view.__doc__
+    return view
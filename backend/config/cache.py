@@ -0,0 +1,256 @@
+"""
+Cache des réponses par utilisateur, invalidé par numéros de version.
+
+Chaque entrée est rangée sous une clé qui contient les versions courantes
+de ses portées (l'utilisateur, éventuellement des portées globales) : pour
+invalider, on incrémente la version d'une portée et les anciennes entrées ne
+sont plus jamais lues (elles expirent d'elles-mêmes). Aucun parcours de
+clés, ce qui fonctionne avec n'importe quel backend du framework de cache
+(locmem par défaut, Redis ou Memcached partagé entre workers).
+
+Les versions sont lues avant le calcul de la réponse et incrémentées après
+la validation de la transaction qui modifie les données : une réponse
+calculée sur des données périmées est rangée sous d'anciennes versions.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.response import Response
+
+from .async_views import json_response
+
+DEFAULT_TIMEOUT = 300
+
+# Portée présente dans toutes les clés : invalidation complète (maintenance)
+ALL = 'all'
+
+METRIC_EVENTS = ('hits', 'misses')
+
+
+def cache_enabled():
+    return getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def cache_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _stamp_key(scope):
+    return f'stamp:{scope}'
+
+
+def _missing_stamp_keys(keys, found):
+    return [key for key in keys.values() if key not in found]
+
+
+def get_stamps(scopes):
+    """
+    Versions courantes des portées, en un aller-retour. Une version absente
+    (jamais créée ou évincée) démarre à l'horloge en nanosecondes, jamais à
+    une valeur déjà utilisée : une entrée ancienne ne peut pas redevenir valide.
+    """
+    cache = get_cache()
+    keys = {scope: _stamp_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    for key in _missing_stamp_keys(keys, found):
+        cache.add(key, time.time_ns(), timeout=None)
+        found[key] = cache.get(key)
+    return {scope: found[key] for scope, key in keys.items()}
+
+
+async def aget_stamps(scopes):
+    cache = get_cache()
+    keys = {scope: _stamp_key(scope) for scope in scopes}
+    found = await cache.aget_many(keys.values())
+    for key in _missing_stamp_keys(keys, found):
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        found[key] = await cache.aget(key)
+    return {scope: found[key] for scope, key in keys.items()}
+
+
+def bump(scopes):
+    cache = get_cache()
+    for scope in set(scopes):
+        key = _stamp_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(user_ids=(), scopes=()):
+    """
+    Invalide les réponses des utilisateurs (et des portées) données une
+    fois la transaction courante validée.
+    """
+    scopes = {user_scope(user_id) for user_id in user_ids if user_id is not None} | set(scopes)
+    if scopes:
+        transaction.on_commit(lambda: bump(scopes))
+
+
+def invalidate_all():
+    bump([ALL])
+
+
+def _metric_key(name, event):
+    return f'metrics:{name}:{event}'
+
+
+def record_metric(name, event):
+    cache = get_cache()
+    key = _metric_key(name, event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Première occurrence (ou compteur évincé) : course bénigne entre workers
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def arecord_metric(name, event):
+    cache = get_cache()
+    key = _metric_key(name, event)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def cache_metrics(names):
+    """
+    {nom: {'hits': n, 'misses': n, 'hit_ratio': r}} pour les réponses en cache.
+    """
+    keys = {(name, event): _metric_key(name, event) for name in names for event in METRIC_EVENTS}
+    found = get_cache().get_many(keys.values())
+    metrics = {}
+    for name in names:
+        counts = {event: found.get(keys[name, event], 0) for event in METRIC_EVENTS}
+        total = counts['hits'] + counts['misses']
+        metrics[name] = {**counts, 'hit_ratio': round(counts['hits'] / total, 3) if total else None}
+    return metrics
+
+
+def cache_key(request, name, stamps):
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = ':'.join([
+        request.get_full_path(),
+        getattr(renderer, 'format', ''),
+        *(f'{scope}={stamp}' for scope, stamp in sorted(stamps.items())),
+    ])
+    return f'response:{name}:{request.user.pk}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def _scopes(request, scopes):
+    return [ALL, user_scope(request.user.pk), *scopes]
+
+
+def _hit_response(request, entry, make_response):
+    response = None
+    if entry['etag']:
+        response = get_conditional_response(getattr(request, '_request', request), etag=entry['etag'])
+    if not isinstance(response, HttpResponseNotModified):
+        response = make_response(entry['data'])
+    for header, value in entry['headers'].items():
+        response[header] = value
+    return _mark(response, 'HIT')
+
+
+def _entry(response):
+    """
+    Entrée à garder pour une réponse calculée, ou None (seules les réponses 200 sont gardées).
+    """
+    if response.status_code != 200 or getattr(response, 'data', None) is None:
+        return None
+    headers = {header: response[header] for header in ('ETag', 'Cache-Control') if response.has_header(header)}
+    return {'data': response.data, 'etag': headers.get('ETag'), 'headers': headers}
+
+
+def _mark(response, status):
+    response['X-Cache'] = status
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def cached_response(request, name, compute, scopes=()):
+    """
+    Réponse DRF en cache pour l'utilisateur et l'URL complète (filtres,
+    pagination, représentation). `compute` n'est appelé qu'en cas d'absence ;
+    seules les réponses 200 sont gardées, avec leur ETag éventuel (une
+    requête conditionnelle reçoit alors 304 sans aucun calcul).
+    """
+    if not cache_enabled():
+        return compute()
+    key = cache_key(request, name, get_stamps(_scopes(request, scopes)))
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        record_metric(name, 'hits')
+        return _hit_response(request, entry, Response)
+
+    record_metric(name, 'misses')
+    response = compute()
+    entry = _entry(response)
+    if entry is not None:
+        cache.set(key, entry, cache_timeout())
+    return _mark(response, 'MISS')
+
+
+async def acached_response(request, name, compute, scopes=()):
+    """
+    cached_response() pour les vues asynchrones (config.async_views) :
+    `compute` est une coroutine et les réponses sont rendues par
+    json_response(). Les entrées sont partagées avec la version synchrone.
+    """
+    if not cache_enabled():
+        return await compute()
+    key = cache_key(request, name, await aget_stamps(_scopes(request, scopes)))
+    cache = get_cache()
+    entry = await cache.aget(key)
+    if entry is not None:
+        await arecord_metric(name, 'hits')
+        return _hit_response(request, entry, json_response)
+
+    await arecord_metric(name, 'misses')
+    response = await compute()
+    entry = _entry(response)
+    if entry is not None:
+        await cache.aset(key, entry, cache_timeout())
+    return _mark(response, 'MISS')
+
+
+class CachedListMixin:
+    """
+    Met en cache la liste d'une vue générique (cached_response), sous le
+    nom `cache_name` et avec les portées de get_cache_scopes() en plus de
+    celle de l'utilisateur.
+    """
+    cache_name = None
+
+    def get_cache_scopes(self):
+        return []
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, self.cache_name, lambda: super(CachedListMixin, self).list(request, *args, **kwargs),
+            self.get_cache_scopes(),
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        return await acached_response(
+            request, self.cache_name, lambda: super(CachedListMixin, self).alist(request, *args, **kwargs),
+            self.get_cache_scopes(),
+        )
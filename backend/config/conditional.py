@@ -0,0 +1,105 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .async_views import get_object, json_response, require_unpaginated
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnels (If-None-Match / If-Modified-Since) pour les vues
+    génériques dont le modèle a un champ `updated_at`.
+
+    - liste : ETag calculé par une seule agrégation (nombre de lignes et
+      Max('updated_at')) sur le queryset filtré ; une suppression change le
+      nombre de lignes, une création ou une modification le maximum ;
+    - détail : ETag et Last-Modified tirés de l'objet chargé.
+
+    La réponse 304 est renvoyée avant toute sérialisation. L'ETag dépend de
+    l'utilisateur et de l'URL complète (filtres, curseur, représentation).
+    alist() et aretrieve() sont les versions des lectures asynchrones
+    (config.async_views), sans pagination.
+    """
+    last_modified_field = 'updated_at'
+
+    def make_etag(self, *parts):
+        request = self.request
+        renderer = getattr(request, 'accepted_renderer', None)
+        key = ':'.join(str(part) for part in (
+            request.user.pk,
+            request.get_full_path(),
+            getattr(renderer, 'format', ''),
+            *parts,
+        ))
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def conditional_response(self, etag, last_modified=None):
+        """
+        Réponse 304 si les validateurs envoyés par le client correspondent,
+        sinon None.
+        """
+        # Last-Modified est à la seconde près
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(self.request._request, etag=etag, last_modified=timestamp)
+        if isinstance(response, HttpResponseNotModified):
+            return self.add_validators(response, etag, last_modified)
+        return None
+
+    def add_validators(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Le client doit revalider à chaque affichage ; réponses propres à l'utilisateur
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list_state(self):
+        return {'count': Count('pk'), 'last_modified': Max(self.last_modified_field)}
+
+    def list_etag(self, state):
+        return self.make_etag(state['count'], state['last_modified'] and state['last_modified'].isoformat())
+
+    def detail_etag(self, instance):
+        last_modified = getattr(instance, self.last_modified_field)
+        return self.make_etag(instance.pk, last_modified.isoformat()), last_modified
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = self.list_etag(queryset.order_by().aggregate(**self.list_state()))
+        not_modified = self.conditional_response(etag)
+        if not_modified is not None:
+            return not_modified
+        return self.add_validators(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.detail_etag(instance)
+        not_modified = self.conditional_response(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self.add_validators(Response(serializer.data), etag, last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        require_unpaginated(self)
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = self.list_etag(await queryset.order_by().aaggregate(**self.list_state()))
+        not_modified = self.conditional_response(etag)
+        if not_modified is not None:
+            return not_modified
+        objects = [obj async for obj in queryset]
+        return self.add_validators(json_response(self.get_serializer(objects, many=True).data), etag)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await get_object(self)
+        etag, last_modified = self.detail_etag(instance)
+        not_modified = self.conditional_response(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self.add_validators(json_response(serializer.data), etag, last_modified)
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'config.events.InProcessBroker'
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_TICKET_SECONDS = 30
+TICKET_SALT = 'config.events.ticket'
+
+# Événement envoyé à un abonné trop lent dont la file a débordé
+RESYNC = {'type': 'resync'}
+
+
+class Subscription:
+    """
+    Abonnement d'un client : file asyncio propre à la boucle de la connexion.
+    Une file pleine n'est pas agrandie : l'abonné reçoit RESYNC puis la
+    connexion est fermée (le client resynchronise via ?since=).
+    """
+
+    def __init__(self, broker, user_id, queue_size):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            # Vider la file pour laisser la place au signal de resynchronisation
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """
+        Prochain événement, ou None après `timeout` secondes sans événement.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Diffusion des événements aux abonnés du processus courant, par
+    utilisateur. publish() peut être appelé depuis n'importe quel thread
+    (vues synchrones, signaux) : la remise passe par la boucle de chaque
+    abonné. Avec plusieurs workers, le remplacer (setting EVENTS_BROKER) par
+    une implémentation de même interface adossée à un bus partagé.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, 'EVENTS_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def subscriber_ids(self):
+        with self._lock:
+            return set(self._subscriptions)
+
+    def publish(self, event, user_ids):
+        with self._lock:
+            targets = [
+                subscription
+                for user_id in user_ids
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Boucle fermée : la connexion est déjà terminée
+                self.unsubscribe(subscription)
+        return len(targets)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'EVENTS_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+def reset_broker():
+    """
+    Oublie le broker courant (tests, changement de EVENTS_BROKER).
+    """
+    global _broker
+    _broker = None
+
+
+def ticket_lifetime():
+    return getattr(settings, 'EVENTS_TICKET_SECONDS', DEFAULT_TICKET_SECONDS)
+
+
+def issue_ticket(user_id):
+    """
+    Ticket d'ouverture du flux d'événements, passé en ?ticket= (EventSource
+    ne permet pas d'en-tête) à la place du jeton JWT, qui n'apparaît ainsi
+    dans aucune URL journalisée. Signé, il n'ouvre que le flux et expire
+    après EVENTS_TICKET_SECONDS.
+    """
+    return signing.dumps({'user': user_id}, salt=TICKET_SALT)
+
+
+def read_ticket(ticket):
+    """
+    Identifiant de l'utilisateur du ticket, ou None (invalide ou expiré).
+    """
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=ticket_lifetime())['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+def format_sse(event, event_id=None):
+    """
+    Trame Server-Sent Events pour un événement (dictionnaire JSON).
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f"event: {event['type']}")
+    lines.append('data: ' + json.dumps(event, cls=DjangoJSONEncoder, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,106 @@
+import csv
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Taille des blocs envoyés au client : évite un write() par ligne
+BUFFER_SIZE = 64 * 1024
+
+
+class _Echo:
+    """
+    Pseudo-fichier pour csv.writer : write() retourne la ligne formatée
+    """
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ';'.join(str(item) for item in value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[column]) for column in columns])
+
+
+def _ndjson_lines(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode({column: row[column] for column in columns}) + '\n'
+
+
+def _buffered(lines):
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def _async_chunks(chunks):
+    """
+    Sous ASGI, Django lit un itérateur synchrone en entier avant d'envoyer
+    quoi que ce soit. Chaque bloc est produit par sync_to_async, dans le
+    thread de la vue (celui de la connexion et du curseur) : un aller-retour
+    par bloc, pas par ligne.
+    """
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def export_format(request, param='output'):
+    """
+    Format demandé via ?output=csv|ndjson (csv par défaut). Le paramètre
+    `format` est réservé par DRF à la négociation du rendu.
+    """
+    output = request.query_params.get(param, 'csv')
+    if output not in EXPORT_FORMATS:
+        raise ValidationError({param: f"Valeurs possibles : {', '.join(EXPORT_FORMATS)}"})
+    return output
+
+
+def stream_export(request, rows, columns, output, filename):
+    """
+    Réponse en flux à partir d'un itérable de dictionnaires (typiquement
+    QuerySet.values().iterator()) : la mémoire reste constante quel que soit
+    le nombre de lignes, sous WSGI comme sous ASGI (itérateur asynchrone).
+    """
+    lines = _csv_lines(columns, rows) if output == 'csv' else _ndjson_lines(columns, rows)
+    chunks = _buffered(lines)
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
+
+
+class StreamingExportMixin:
+    """
+    Vues d'export : la réponse est construite directement (CSV / NDJSON),
+    l'en-tête Accept du client ne doit donc pas provoquer de 406.
+    """
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
@@ -0,0 +1,227 @@
+"""
+Instrumentation des requêtes HTTP : nombre de requêtes SQL, temps passé en
+base, plan d'exécution des requêtes lentes et budget de requêtes par vue.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+
+logger = logging.getLogger('config.performance')
+
+DEFAULT_SLOW_QUERY_MS = 100
+DEFAULT_MAX_EXPLAINS = 5
+
+
+def query_budget(limit):
+    """
+    Déclare le nombre maximal de requêtes SQL d'une vue fonction (pour une
+    vue classe : attribut `query_budget`). `limit` est un entier ou un
+    dictionnaire par méthode HTTP ; une méthode absente n'a pas de budget.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def declared_budget(view_func, method):
+    """
+    Budget déclaré pour `method` par une vue telle que résolue par
+    l'URLconf, ou None.
+    """
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        # as_view() : DRF expose la classe dans `cls`, Django dans `view_class`
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(method.upper())
+    return budget
+
+
+class QueryRecorder:
+    """
+    execute_wrapper comptant les requêtes et leur durée ; garde le SQL des
+    requêtes dépassant `slow_ms` pour en demander le plan après la réponse.
+    """
+
+    def __init__(self, slow_ms, max_slow):
+        self.slow_ms = slow_ms
+        self.max_slow = max_slow
+        self.count = 0
+        self.duration = 0.0
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.duration += elapsed
+            if elapsed >= self.slow_ms and len(self.slow) < self.max_slow:
+                self.slow.append((context['connection'].alias, sql, params, many, elapsed))
+
+
+# Enregistreur de la requête HTTP en cours. Une variable de contexte et non un
+# execute_wrapper posé par requête : les connexions sont propres à chaque
+# thread, et sous ASGI l'ORM asynchrone exécute le SQL dans un autre thread
+# que le middleware (le contexte, lui, y est copié).
+_current_recorder = ContextVar('query_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@receiver(connection_created)
+def install_recorder_on_connect(sender, connection, **kwargs):
+    install_recorder(connection)
+
+
+@contextmanager
+def recording(recorder):
+    # Connexions du thread courant ouvertes avant l'import de ce module
+    for connection in connections.all(initialized_only=True):
+        install_recorder(connection)
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+def explain_query(alias, sql, params):
+    """
+    Plan d'exécution d'une requête SELECT déjà exécutée (sans ANALYZE : la
+    requête n'est pas rejouée).
+    """
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Mesure chaque requête HTTP : une ligne de journal structurée pour tous
+    (logger config.performance), un en-tête Server-Timing pour le staff, le
+    plan des requêtes lentes et un avertissement si la vue dépasse son budget.
+
+    Les requêtes exécutées pendant la lecture d'une réponse en flux (exports,
+    SSE) ne sont pas comptées : la réponse est déjà partie. Sous ASGI, le
+    middleware reste asynchrone (les requêtes de l'ORM asynchrone sont
+    comptées de la même façon) et les plans sont lus dans un thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.recorder(request)
+        start = time.perf_counter()
+        with recording(recorder):
+            response = self.get_response(request)
+        total = (time.perf_counter() - start) * 1000
+        self.finish(request, response, getattr(request, 'user', None), recorder, total, self.explain(recorder))
+        return response
+
+    async def __acall__(self, request):
+        recorder = self.recorder(request)
+        start = time.perf_counter()
+        with recording(recorder):
+            response = await self.get_response(request)
+        total = (time.perf_counter() - start) * 1000
+        plans = await sync_to_async(self.explain)(recorder) if recorder.slow else []
+        self.finish(request, response, await request_user(request), recorder, total, plans)
+        return response
+
+    def recorder(self, request):
+        request.query_budget = None
+        return QueryRecorder(
+            getattr(settings, 'PERFORMANCE_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS),
+            getattr(settings, 'PERFORMANCE_MAX_EXPLAINS', DEFAULT_MAX_EXPLAINS),
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = declared_budget(view_func, request.method)
+
+    def explain(self, recorder):
+        """
+        Plan d'exécution de chaque requête lente (None hors SELECT).
+        """
+        plans = []
+        for alias, sql, params, many, elapsed in recorder.slow:
+            plan = None
+            if not many and sql.lstrip()[:6].upper() == 'SELECT':
+                try:
+                    plan = explain_query(alias, sql, params)
+                except Exception as exc:  # le plan est un bonus : ne jamais faire échouer la réponse
+                    plan = f'EXPLAIN impossible : {exc}'
+            plans.append(plan)
+        return plans
+
+    def finish(self, request, response, user, recorder, total, plans):
+        if user is not None and user.is_staff:
+            # Valeur d'en-tête : ASCII uniquement
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration:.1f};desc="SQL x{recorder.count}", '
+                f'app;dur={total - recorder.duration:.1f}, total;dur={total:.1f}'
+            )
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration, 1),
+            'total_ms': round(total, 1),
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'query_budget': request.query_budget,
+        }
+        message = ' '.join(f'{key}={value}' for key, value in fields.items())
+        logger.info(message, extra={'performance': fields})
+
+        if request.query_budget is not None and recorder.count > request.query_budget:
+            logger.warning(f'Budget de requêtes dépassé : {message}', extra={'performance': fields})
+
+        for (alias, sql, params, many, elapsed), plan in zip(recorder.slow, plans):
+            logger.warning(
+                f'Requête lente ({elapsed:.1f} ms) sur {request.method} {request.path} : {sql}\n{plan or ""}'.rstrip(),
+                extra={'performance': {**fields, 'sql': sql, 'duration_ms': round(elapsed, 1), 'plan': plan}},
+            )
+
+
+async def request_user(request):
+    """
+    Utilisateur de la requête, sans évaluer dans la boucle d'événements
+    l'utilisateur de session paresseux de AuthenticationMiddleware (requête SQL).
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, LazyObject) and user._wrapped is empty and hasattr(request, 'auser'):
+        return await request.auser()
+    return user
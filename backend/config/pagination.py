@@ -0,0 +1,123 @@
+import base64
+import json
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur un tri composite terminé par une clé
+    unique, par exemple ('-updated_at', '-id'). La page suivante est obtenue
+    par un filtre « après la dernière ligne » plutôt que par un OFFSET : la
+    page N coûte autant que la page 1 tant qu'un index couvre le tri.
+
+    La pagination est optionnelle : sans paramètre `cursor` ni `page_size`,
+    la vue renvoie la liste complète comme auparavant (sauf `optional = False`).
+    """
+    ordering = ('-updated_at', '-id')
+    optional = True
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Curseur invalide'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.optional and self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.model = queryset.model
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(params.get(self.cursor_query_param))
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_position = self.position_of(rows[-1]) if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def position_of(self, obj):
+        return [
+            self.model._meta.get_field(name).value_to_string(obj)
+            for name, _ in self.fields()
+        ]
+
+    def after(self, position):
+        """
+        Construit la condition « ligne strictement après la position » :
+        (a > x) OR (a = x AND b > y) OR ... selon le sens de chaque champ.
+        """
+        conditions = []
+        fields = self.fields()
+        for index, (name, descending) in enumerate(fields):
+            equal = {field: value for (field, _), value in zip(fields[:index], position)}
+            lookup = 'lt' if descending else 'gt'
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': position[index]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            fields = self.fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+
+class UpdatedAtKeysetPagination(KeysetPagination):
+    ordering = ('-updated_at', '-id')
+
+
+class DateJoinedKeysetPagination(KeysetPagination):
+    ordering = ('-date_joined', '-id')
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    # Journaux volumineux : toujours paginés
+    ordering = ('-created_at', '-id')
+    optional = False
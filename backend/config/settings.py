@@ -13,8 +13,12 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from decouple import config
 import os   
+import sys
 from datetime import timedelta
 
+# Lancement via `manage.py test`
+TESTING = sys.argv[1:2] == ['test']
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,17 +55,20 @@ INSTALLED_APPS = [
     'users',
     'projects',
     'tasks',
+    'benchmarks', # commandes de génération de données et de mesure
     'rest_framework_simplejwt',# pour jwt
     'django_extensions', # pour les commandes django
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.instrumentation.QueryInstrumentationMiddleware',  # requêtes SQL par requête HTTP (journal, Server-Timing)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Ajout du middleware CORS
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tasks.middleware.TaskActivityMiddleware',  # journal d'activité des tâches, écrit en fin de requête
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # middleware pour Django Allauth
@@ -91,7 +98,7 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -101,12 +108,86 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Nombre maximal d'opérations par appel à /api/tasks/bulk/
+TASKS_BULK_MAX_OPERATIONS = 5000
+
+# Longueur des clés de position (ordre du tableau) au-delà de laquelle
+# la commande rebalance_positions réécrit la colonne
+TASKS_POSITION_MAX_LENGTH = 24
+
+# Rappels d'échéance (commande send_due_reminders) : fenêtres en jours avant
+# l'échéance ; chaque tâche reçoit au plus un rappel par fenêtre
+TASKS_REMINDER_WINDOWS = [7, 1, 0]
+
+# Synchronisation incrémentale (?since=) : recouvrement entre deux curseurs
+# (transactions validées en retard) et durée de conservation du journal des suppressions
+SYNC_OVERLAP_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Événements temps réel (/api/events/) : diffuseur, taille de file par client
+# (au-delà, le client reçoit "resync") et intervalle des pings
+EVENTS_BROKER = 'config.events.InProcessBroker'
+EVENTS_QUEUE_SIZE = 256
+EVENTS_HEARTBEAT_SECONDS = 15
+# Durée de validité d'un ticket d'ouverture du flux (POST /api/events/ticket/)
+EVENTS_TICKET_SECONDS = 30
+
+# Cache (locmem par défaut, un seul processus) ; en production, un backend
+# partagé entre workers, par ex. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# et CACHE_LOCATION=redis://127.0.0.1:6379
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='taskmanager'),
+    }
+}
+
+# Cache des réponses (config.cache) : statistiques et liste des projets par
+# utilisateur, invalidées par les signaux ; la durée n'est qu'un filet de sécurité.
+# Désactivé pendant les tests : le cache survivrait au rollback de chaque test
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool) and not TESTING
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Lectures de l'API par l'ORM asynchrone (config.async_views), servies par
+# l'application de config/asgi.py seulement ; False les désactive aussi sous ASGI
+ASYNC_API_READS = config('ASYNC_API_READS', default=True, cast=bool)
+
+# Instrumentation (config.instrumentation) : seuil au-delà duquel une requête
+# SQL est journalisée avec son plan d'exécution, et nombre de plans par requête HTTP
+PERFORMANCE_SLOW_QUERY_MS = 100
+PERFORMANCE_MAX_EXPLAINS = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Une ligne par requête HTTP ; seulement les avertissements pendant les tests
+        'config.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING' if TESTING else config('PERFORMANCE_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Jetons portant les droits de l'utilisateur (users.authentication)
+    'TOKEN_OBTAIN_SERIALIZER': 'users.authentication.ClaimsTokenObtainPairSerializer',
 }
 
+# Utilisateurs authentifiés sans requête SQL (users.authentication) : LRU par
+# processus, invalidé par les signaux ; la durée borne le délai de prise en
+# compte d'une modification faite par un autre processus
+TOKEN_USER_CACHE_SIZE = 10000
+TOKEN_USER_CACHE_TIMEOUT = 60
+
 # Configuration CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # URL de votre frontend Vite
@@ -170,6 +251,40 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hachage des mots de passe dans un pool borné (users.hashers). PASSWORD_HASHER
+# choisit le hasher des nouveaux mots de passe (scrypt, argon2 avec argon2-cffi,
+# pbkdf2) ; les autres vérifient les anciens, rehachés à la connexion suivante
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='scrypt')
+_PASSWORD_HASHERS = {
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'users.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    'users.hashers.PBKDF2SHA1PasswordHasher',
+]
+# Hachages simultanés (un par cœur par défaut) et en attente ; au-delà : 503
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=os.cpu_count() or 1, cast=int)
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=PASSWORD_HASHING_WORKERS * 16, cast=int)
+# Import de listes d'étudiants (users.roster) : lignes par import, processus
+# de hachage d'un import (distincts du pool des connexions), imports simultanés
+# par worker (0 : dans la requête) et en attente ; au-delà : 503
+ROSTER_IMPORT_MAX_ROWS = config('ROSTER_IMPORT_MAX_ROWS', default=10000, cast=int)
+ROSTER_IMPORT_PROCESSES = config('ROSTER_IMPORT_PROCESSES', default=os.cpu_count() or 1, cast=int)
+ROSTER_IMPORT_WORKERS = config('ROSTER_IMPORT_WORKERS', default=1, cast=int)
+ROSTER_IMPORT_QUEUE = config('ROSTER_IMPORT_QUEUE', default=4, cast=int)
+# Avatars (users.avatars) : côtés des variantes carrées (px), poids et pixels
+# maximaux d'un fichier envoyé, threads de traitement (la moitié des cœurs, le
+# reste pour les requêtes ; 0 : traitement dans la requête) et traitements en
+# attente ; au-delà : 503
+AVATAR_SIZES = (64, 128, 256)
+AVATAR_MAX_UPLOAD_SIZE = config('AVATAR_MAX_UPLOAD_SIZE', default=5 * 1024 * 1024, cast=int)
+AVATAR_MAX_PIXELS = config('AVATAR_MAX_PIXELS', default=40_000_000, cast=int)
+AVATAR_WORKERS = config('AVATAR_WORKERS', default=max(1, (os.cpu_count() or 1) // 2), cast=int)
+AVATAR_QUEUE = config('AVATAR_QUEUE', default=AVATAR_WORKERS * 32, cast=int)
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
 # Configuration de Allauth
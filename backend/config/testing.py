@@ -0,0 +1,56 @@
+"""
+Outils de test partagés par les applications.
+"""
+from contextlib import ContextDecorator
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .instrumentation import declared_budget
+
+
+class assert_query_budget(ContextDecorator):
+    """
+    Échoue si le bloc (ou le test décoré) exécute plus de `limit` requêtes
+    SQL ; le message liste les requêtes pour trouver celle de trop.
+
+        with assert_query_budget(3):
+            client.get(url)
+
+        @assert_query_budget(3)
+        def test_list(self): ...
+    """
+
+    def __init__(self, limit, using='default'):
+        self.limit = limit
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context.captured_queries)
+        if executed > self.limit:
+            queries = '\n'.join(
+                f'{index}. {query["sql"]}' for index, query in enumerate(self.context.captured_queries, start=1)
+            )
+            raise AssertionError(f'{executed} requêtes SQL exécutées, budget de {self.limit} :\n{queries}')
+        return False
+
+
+def assert_within_view_budget(client, method, path, *args, **kwargs):
+    """
+    Appelle `path` avec le client de test et vérifie que la vue respecte le
+    budget qu'elle déclare (query_budget). Retourne la réponse.
+    """
+    budget = declared_budget(resolve(path.split('?')[0]).func, method)
+    if budget is None:
+        raise AssertionError(f'Aucun budget de requêtes déclaré pour {method.upper()} {path}')
+    with assert_query_budget(budget):
+        return getattr(client, method.lower())(path, *args, **kwargs)
@@ -19,6 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from projects.views import event_stream, event_ticket, response_cache_metrics
 
 
 urlpatterns = [
@@ -28,6 +29,11 @@ urlpatterns = [
     path('api/', include('users.urls')),  # Inclut /api/users/ et /api/users/me/
     path('api/projects/', include('projects.urls')),
     path('api/tasks/', include('tasks.urls')),
+    # Flux Server-Sent Events (serveur ASGI)
+    path('api/events/', event_stream, name='api_events'),
+    path('api/events/ticket/', event_ticket, name='api_events_ticket'),
+    # Compteurs du cache des réponses (staff)
+    path('api/cache/metrics/', response_cache_metrics, name='api_cache_metrics'),
 
     # Routes administratives
     path('admin/', admin.site.urls),
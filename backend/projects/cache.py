@@ -0,0 +1,69 @@
+"""
+Invalidation des réponses en cache (config.cache) à partir des écritures :
+chaque fonction calcule les utilisateurs dont une réponse en cache peut
+changer et incrémente leur version à la validation de la transaction.
+
+- liste des projets : propriétaire et membres (la représentation contient
+  les membres et leurs profils) ;
+- statistiques des projets : propriétaire et membres, plus la portée
+  globale des enseignants (qui comptent tous les projets) quand un projet
+  est créé, supprimé ou change de statut ;
+- statistiques des tâches : propriétaire du projet et assigné, avant et
+  après la modification.
+"""
+from django.db.models import Q
+from django.utils import timezone
+
+from config.cache import invalidate_on_commit
+from .models import Project
+from .visibility import Membership
+
+# Statistiques des enseignants : calculées sur tous les projets
+TEACHER_PROJECT_STATISTICS = 'project-statistics'
+
+
+def invalidate_projects(projects, extra_user_ids=(), statistics=False):
+    """
+    Propriétaires et membres des projets, plus `extra_user_ids` (membres
+    retirés). `statistics` : le décompte global des projets a changé.
+    """
+    if not projects:
+        return
+    users = {project.owner_id for project in projects} | set(extra_user_ids)
+    users |= set(
+        Membership.objects.filter(project_id__in=[project.pk for project in projects])
+        .values_list('customuser_id', flat=True)
+    )
+    invalidate_on_commit(users, [TEACHER_PROJECT_STATISTICS] if statistics else [])
+
+
+def invalidate_tasks(tasks, previous_states=None):
+    """
+    Propriétaires des projets et assignés des tâches, dans leur état
+    courant et précédent (changement de projet ou d'assigné).
+    """
+    if not tasks:
+        return
+    previous_states = previous_states or [None] * len(tasks)
+    states = [task.tracked_state() for task in tasks] + [state for state in previous_states if state]
+    project_ids = {state['project_id'] for state in states}
+    users = {state['assigned_to_id'] for state in states}
+    users |= set(Project.objects.filter(pk__in=project_ids).values_list('owner_id', flat=True))
+    invalidate_on_commit(users)
+
+
+def invalidate_user_profile(user):
+    """
+    Le profil d'un utilisateur apparaît dans la liste des projets de tous
+    ceux qui partagent un projet avec lui. Ces projets avancent aussi leur
+    updated_at, comme pour un changement de membres : ETag, Last-Modified et
+    synchronisation incrémentale (?since=) en dépendent.
+    """
+    projects = Project.objects.filter(
+        Q(owner=user) | Q(pk__in=Membership.objects.filter(customuser=user).values('project_id'))
+    )
+    projects.update(updated_at=timezone.now())
+    users = projects.values_list('owner_id', flat=True).union(
+        Membership.objects.filter(project_id__in=projects.values('pk')).values_list('customuser_id', flat=True)
+    )
+    invalidate_on_commit({user.pk, *users})
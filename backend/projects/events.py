@@ -0,0 +1,120 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from config.events import get_broker
+from users.models import CustomUser
+from .models import Project
+from .visibility import Membership
+
+
+def project_audiences(project_ids):
+    """
+    {project_id: (owner_id, status, member_ids)} en deux requêtes.
+    """
+    projects = {
+        pk: (owner_id, status)
+        for pk, owner_id, status in Project.objects.filter(pk__in=project_ids).values_list('pk', 'owner_id', 'status')
+    }
+    members = defaultdict(set)
+    for project_id, user_id in Membership.objects.filter(project_id__in=projects).values_list('project_id', 'customuser_id'):
+        members[project_id].add(user_id)
+    return {pk: (owner_id, status, members[pk]) for pk, (owner_id, status) in projects.items()}
+
+
+def publish_on_commit(event, user_ids):
+    # Les abonnés ne doivent pas voir un changement annulé par un rollback
+    if user_ids:
+        broker = get_broker()
+        transaction.on_commit(lambda: broker.publish(event, user_ids))
+
+
+def project_event(action, project):
+    return {
+        'type': 'project',
+        'action': action,
+        'id': project.pk,
+        'status': project.status,
+        'updated_at': project.updated_at,
+    }
+
+
+def task_event(action, task):
+    return {
+        'type': 'task',
+        'action': action,
+        'id': task.pk,
+        'project': task.project_id,
+        'status': task.status,
+        'assigned_to': task.assigned_to_id,
+        'updated_at': task.updated_at,
+    }
+
+
+def notify_projects(action, projects, extra_user_ids=(), include_members=False):
+    """
+    Publie un événement par projet aux utilisateurs qui le voient : le
+    propriétaire, et les membres si le projet n'est pas "todo".
+    `include_members` prévient aussi les membres qui viennent de le perdre
+    (retour à "todo"), `extra_user_ids` les membres retirés.
+    Rien n'est calculé si aucun client n'est connecté.
+    """
+    if not projects or not get_broker().has_subscribers():
+        return
+    audiences = project_audiences([project.pk for project in projects])
+    for project in projects:
+        owner_id, status, member_ids = audiences.get(project.pk, (project.owner_id, project.status, set()))
+        users = {owner_id} | set(extra_user_ids)
+        if status != 'todo' or include_members:
+            users |= member_ids
+        publish_on_commit(project_event(action, project), users)
+
+
+def notify_deleted_projects(projects):
+    """
+    Suppression de projets : un seul événement par projet, qui vaut pour ses
+    tâches (aucun événement par tâche), publié à tous ceux qui voyaient le
+    projet ou l'une de ses tâches : propriétaire, membres, assignés,
+    superusers. À appeler avant la suppression.
+    """
+    if not projects or not get_broker().has_subscribers():
+        return
+    from tasks.models import Task
+
+    audiences = project_audiences([project.pk for project in projects])
+    assignees = defaultdict(set)
+    for project_id, user_id in (
+        Task.objects.filter(project__in=projects, assigned_to__isnull=False)
+        .order_by().values_list('project_id', 'assigned_to_id').distinct()
+    ):
+        assignees[project_id].add(user_id)
+    superusers = set(CustomUser.objects.filter(is_superuser=True).values_list('pk', flat=True))
+    for project in projects:
+        owner_id, _, member_ids = audiences.get(project.pk, (project.owner_id, None, set()))
+        publish_on_commit(project_event('deleted', project), {owner_id} | member_ids | assignees[project.pk] | superusers)
+
+
+def notify_tasks(action, tasks, previous_states=None):
+    """
+    Publie un événement par tâche aux utilisateurs qui la voient (voir
+    task_visibility) : propriétaire et membres du projet, assigné, superusers.
+    Si la tâche a changé de projet ou d'assigné, l'ancienne audience est
+    prévenue aussi.
+    """
+    if not tasks or not get_broker().has_subscribers():
+        return
+    previous_states = previous_states or [None] * len(tasks)
+    project_ids = {task.project_id for task in tasks}
+    project_ids |= {previous['project_id'] for previous in previous_states if previous}
+    audiences = project_audiences(project_ids)
+    superusers = set(CustomUser.objects.filter(is_superuser=True).values_list('pk', flat=True))
+
+    def audience(project_id, assigned_to_id):
+        owner_id, _, member_ids = audiences.get(project_id, (None, None, set()))
+        return ({owner_id, assigned_to_id} | member_ids) - {None}
+
+    for task, previous in zip(tasks, previous_states):
+        users = superusers | audience(task.project_id, task.assigned_to_id)
+        if previous:
+            users |= audience(previous['project_id'], previous['assigned_to_id'])
+        publish_on_commit(task_event(action, task), users)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from projects.models import Tombstone
+from projects.sync import tombstone_retention
+
+
+class Command(BaseCommand):
+    help = "Supprime les entrées du journal de synchronisation plus anciennes que SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        # Les curseurs plus anciens reçoivent 410 : le client recharge la liste complète
+        deleted, _ = Tombstone.objects.filter(created_at__lt=timezone.now() - tombstone_retention()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} entrée(s) supprimée(s)"))
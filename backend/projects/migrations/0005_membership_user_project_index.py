@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-17 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_updated_at_cursor_index'),
+    ]
+
+    # La table de liaison projects_project_members est créée automatiquement
+    # par le ManyToManyField : son index composite (project_id, customuser_id)
+    # vient de la contrainte d'unicité. On ajoute l'ordre inverse pour les
+    # recherches « projets d'un utilisateur » (EXISTS de visibilité, statistiques).
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX IF NOT EXISTS projects_members_user_project_idx '
+                'ON projects_project_members (customuser_id, project_id);'
+            ),
+            reverse_sql='DROP INDEX IF EXISTS projects_members_user_project_idx;',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-17 23:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_membership_user_project_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['owner', 'status'], name='project_owner_status_idx'),
+        ),
+    ]
@@ -17,5 +17,50 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Tri de la pagination par curseur
+            models.Index(fields=['-updated_at', '-id'], name='project_updated_id_idx'),
+            models.Index(fields=['owner', 'status'], name='project_owner_status_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut chargé : un retour à "todo" retire le projet aux membres (journal de synchronisation)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
+    def __str__(self):
+        return self.name
+
+
+class Tombstone(models.Model):
+    """
+    Journal des disparitions : suppression d'un projet ou d'une tâche, ou perte
+    de visibilité (membre retiré, projet repassé "à faire", tâche réassignée).
+    Sert à la synchronisation incrémentale des listes (?since=).
+    """
+    KIND_CHOICES = [
+        ('project', 'Projet'),
+        ('task', 'Tâche'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # Utilisateur qui voyait l'objet ; vide : tous (entrées antérieures au
+    # ciblage, lues jusqu'à leur purge)
+    user = models.ForeignKey(CustomUser, null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    # Projet supprimé : ses tâches, supprimées avec lui
+    task_ids = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'created_at'], name='tombstone_kind_created_idx'),
+            models.Index(fields=['user', 'kind', 'created_at'], name='tombstone_user_kind_idx'),
+        ]
+
     def __str__(self):
-        return self.name 
\ No newline at end of file
+        return f"{self.kind} {self.object_id}"
@@ -1,12 +1,89 @@
 from rest_framework import permissions
+from .models import Project
+
+
+class ProjectAccess:
+    """
+    Contexte d'autorisation d'un utilisateur pour la durée d'une requête.
+    Répond à « X est-il propriétaire / membre du projet Y » sans charger la
+    liste des membres : une requête EXISTS indexée par projet, mise en cache
+    jusqu'à la fin de la requête.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._members = {}
+        self._owners = {}
+
+    def is_owner(self, project):
+        return check_is_project_owner(self.user, project)
+
+    def owns_project(self, project_id):
+        """
+        Propriété d'un projet connu seulement par son identifiant (tâches)
+        """
+        if project_id not in self._owners:
+            self._owners[project_id] = (
+                Project.objects.filter(pk=project_id).values_list('owner_id', flat=True).first()
+            )
+        return self.user.pk is not None and self._owners[project_id] == self.user.pk
+
+    async def aowns_project(self, project_id):
+        if project_id not in self._owners:
+            self._owners[project_id] = await (
+                Project.objects.filter(pk=project_id).values_list('owner_id', flat=True).afirst()
+            )
+        return self.user.pk is not None and self._owners[project_id] == self.user.pk
+
+    def remember_project(self, project):
+        """
+        Enregistre le propriétaire d'un projet déjà chargé (évite une requête)
+        """
+        self._owners[project.pk] = project.owner_id
+
+    def is_member(self, project_id):
+        if self.user.pk is None:
+            return False
+        if project_id not in self._members:
+            self._members[project_id] = Project.members.through.objects.filter(
+                project_id=project_id,
+                customuser_id=self.user.pk,
+            ).exists()
+        return self._members[project_id]
+
+    async def ais_member(self, project_id):
+        if self.user.pk is None:
+            return False
+        if project_id not in self._members:
+            self._members[project_id] = await Project.members.through.objects.filter(
+                project_id=project_id,
+                customuser_id=self.user.pk,
+            ).aexists()
+        return self._members[project_id]
+
+
+def get_project_access(request):
+    """
+    Retourne le contexte d'autorisation associé à la requête (créé au premier appel).
+    Fonctionne avec une requête DRF comme avec une HttpRequest Django.
+    """
+    http_request = getattr(request, '_request', request)
+    access = getattr(http_request, '_project_access', None)
+    if access is None or access.user is not request.user:
+        access = ProjectAccess(request.user)
+        http_request._project_access = access
+    return access
+
 
 class IsProjectOwnerOrMember(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
+        access = get_project_access(request)
+
         # Le propriétaire a toujours tous les droits
-        if request.user == obj.owner:
+        if access.is_owner(obj):
             return True
             
         # Pour les projets "à faire", seul le propriétaire peut voir/modifier
@@ -15,13 +92,25 @@ class IsProjectOwnerOrMember(permissions.BasePermission):
             
         # Pour les projets "en cours", les membres peuvent voir
         if request.method in permissions.SAFE_METHODS:
-            return request.user in obj.members.all()
+            return access.is_member(obj.pk)
             
         # Modification/Suppression uniquement pour le propriétaire
         return False
 
+    async def ahas_object_permission(self, request, view, obj):
+        # Mêmes règles, appartenance vérifiée par l'ORM asynchrone (config.async_views)
+        access = get_project_access(request)
+        if access.is_owner(obj):
+            return True
+        if obj.status == 'todo':
+            return False
+        if request.method in permissions.SAFE_METHODS:
+            return await access.ais_member(obj.pk)
+        return False
+
 def check_is_project_owner(user, project):
     """
     Vérifie si l'utilisateur est le propriétaire du projet
+    (comparaison des identifiants, sans charger le propriétaire)
     """
-    return user == project.owner
\ No newline at end of file
+    return user.pk is not None and user.pk == project.owner_id
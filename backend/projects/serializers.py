@@ -1,8 +1,18 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Project
-from users.serializers import UserSerializer
+from users.serializers import UserSerializer, UserCompactSerializer
 from users.models import CustomUser
-from .permissions import check_is_project_owner
+from .permissions import get_project_access
+
+# Représentations possibles des membres (?members=full|compact|ids)
+# et colonnes utilisateur à charger pour chacune
+MEMBERS_REPRESENTATIONS = {
+    'full': ('id', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'avatar', 'avatar_variants'),
+    'compact': ('id', 'username', 'first_name', 'last_name', 'avatar_variants'),
+    'ids': ('id',),
+}
+
 
 class ProjectSerializer(serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
@@ -12,46 +22,87 @@ class ProjectSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+    # Modifications partielles de la liste des membres (PATCH)
+    add_members = serializers.ListField(
+        child=serializers.IntegerField(),
+        write_only=True,
+        required=False
+    )
+    remove_members = serializers.ListField(
+        child=serializers.IntegerField(),
+        write_only=True,
+        required=False
+    )
     is_owner = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
-        fields = ['id', 'name', 'description', 'status', 'owner', 'members', 'members_ids', 'is_owner', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'description', 'status', 'owner', 'members', 'members_ids', 'add_members', 'remove_members', 'is_owner', 'created_at', 'updated_at']
         read_only_fields = ['owner', 'created_at', 'updated_at']
 
+    def get_fields(self):
+        fields = super().get_fields()
+        mode = self.context.get('members_mode', 'full')
+        if mode == 'compact':
+            fields['members'] = UserCompactSerializer(many=True, read_only=True)
+        elif mode == 'ids':
+            fields['members'] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+        return fields
+
     def get_is_owner(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return check_is_project_owner(request.user, obj)
+            return get_project_access(request).is_owner(obj)
         return False
 
     def create(self, validated_data):
         members_ids = validated_data.pop('members_ids', [])
-        project = super().create(validated_data)
-        
-        # Toujours ajouter le propriétaire comme membre
-        project.members.add(project.owner)
-        
-        # Ajouter les autres membres spécifiés
-        if members_ids:
-            members = CustomUser.objects.filter(id__in=members_ids)
-            project.members.add(*members)
-        
+        add_members = validated_data.pop('add_members', [])
+        validated_data.pop('remove_members', None)
+
+        with transaction.atomic():
+            project = super().create(validated_data)
+            # Toujours ajouter le propriétaire comme membre, avec les membres spécifiés
+            self.update_members(project, set(members_ids) | set(add_members))
+
         return project
 
     def update(self, instance, validated_data):
         members_ids = validated_data.pop('members_ids', None)
-        old_status = instance.status
-        project = super().update(instance, validated_data)
-        
-        # Si members_ids est fourni, mettre à jour les membres
-        if members_ids is not None:
-            project.members.clear()
-            project.members.add(project.owner)  # S'assurer que le propriétaire reste membre
-            members = CustomUser.objects.filter(id__in=members_ids)
-            project.members.add(*members)
-        
+        add_members = validated_data.pop('add_members', [])
+        remove_members = validated_data.pop('remove_members', [])
+
+        with transaction.atomic():
+            project = super().update(instance, validated_data)
+
+            # Membres modifiés : liste complète (members_ids) et/ou deltas (add_members, remove_members)
+            if members_ids is not None or add_members or remove_members:
+                current = set(
+                    Project.members.through.objects.filter(project=project).values_list('customuser_id', flat=True)
+                )
+                desired = set(members_ids) if members_ids is not None else set(current)
+                desired = (desired | set(add_members)) - set(remove_members)
+                self.update_members(project, desired, current)
+
         # Si le projet passe de 'todo' à 'in_progress', les membres peuvent maintenant le voir
         # La visibilité est gérée dans la vue API par le queryset
-        
-        return project
\ No newline at end of file
+
+        return project
+
+    def update_members(self, project, desired, current=frozenset()):
+        """
+        Applique la différence entre les membres actuels et les membres
+        souhaités : un seul DELETE pour les retraits et un seul INSERT pour
+        les ajouts, au lieu de vider puis recréer toute la liste.
+        Les identifiants inconnus sont ignorés ; le propriétaire reste membre.
+        """
+        desired = set(desired) | {project.owner_id}
+        to_remove = set(current) - desired
+        to_add = desired - set(current)
+        if to_add:
+            to_add = set(CustomUser.objects.filter(id__in=to_add).values_list('id', flat=True))
+
+        if to_remove:
+            project.members.remove(*to_remove)
+        if to_add:
+            project.members.add(*to_add)
@@ -0,0 +1,121 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from config.events import get_broker
+from users.models import CustomUser
+from .cache import invalidate_projects, invalidate_user_profile
+from .events import notify_deleted_projects, notify_projects
+from .models import Project
+from .sync import record_deleted_projects, record_tombstones
+from .visibility import Membership
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def touch_projects_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    La liste des membres fait partie de la représentation d'un projet :
+    toute modification avance updated_at (validateurs ETag / Last-Modified).
+    """
+    if reverse:
+        # user.projects.add(...) : pk_set contient des projets
+        if action == 'pre_clear':
+            instance._cleared_project_ids = list(instance.projects.values_list('pk', flat=True))
+            return
+        if action == 'post_clear':
+            project_ids = getattr(instance, '_cleared_project_ids', [])
+        elif action in ('post_add', 'post_remove'):
+            project_ids = pk_set
+        else:
+            return
+        if project_ids:
+            Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+        return
+
+    if action == 'post_clear' or (action in ('post_add', 'post_remove') and pk_set):
+        instance.updated_at = timezone.now()
+        Project.objects.filter(pk=instance.pk).update(updated_at=instance.updated_at)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def record_removed_members(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Un membre retiré ne voit plus le projet (ni ses tâches) : entrée du
+    journal de synchronisation pour ce seul utilisateur.
+    """
+    if action == 'pre_clear' and not reverse:
+        instance._cleared_member_ids = list(instance.members.values_list('pk', flat=True))
+        return
+    if action == 'post_remove':
+        removed = pk_set
+    elif action == 'post_clear':
+        removed = getattr(instance, '_cleared_project_ids' if reverse else '_cleared_member_ids', [])
+    else:
+        return
+    if not removed:
+        return
+    if reverse:
+        record_tombstones('project', removed, user_ids=[instance.pk])
+    else:
+        record_tombstones('project', [instance.pk], user_ids=removed)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def notify_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Les membres retirés sont prévenus aussi : ils resynchronisent et reçoivent le tombstone
+    if action not in ('post_add', 'post_remove', 'post_clear') or not get_broker().has_subscribers():
+        return
+    removed = action != 'post_add'
+    if reverse:
+        project_ids = pk_set if action != 'post_clear' else getattr(instance, '_cleared_project_ids', [])
+        notify_projects('saved', list(Project.objects.filter(pk__in=project_ids or [])),
+                        extra_user_ids=[instance.pk] if removed else ())
+    else:
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_cleared_member_ids', [])
+        notify_projects('saved', [instance], extra_user_ids=pk_set if removed else ())
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        project_ids = pk_set if action != 'post_clear' else getattr(instance, '_cleared_project_ids', [])
+        invalidate_projects(list(Project.objects.filter(pk__in=project_ids or []).only('pk', 'owner_id')),
+                            extra_user_ids=[instance.pk])
+    else:
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_cleared_member_ids', [])
+        invalidate_projects([instance], extra_user_ids=pk_set or ())
+
+
+@receiver(post_save, sender=Project)
+def on_project_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Un projet repassé "à faire" n'est plus visible que par son propriétaire
+    previous = getattr(instance, '_loaded_status', None)
+    hidden = not created and previous is not None and previous != 'todo' and instance.status == 'todo'
+    if hidden:
+        record_tombstones('project', [instance.pk], Membership.objects.filter(project_id=instance.pk)
+                          .exclude(customuser_id=instance.owner_id).values_list('customuser_id', flat=True))
+    notify_projects('created' if created else 'saved', [instance], include_members=hidden)
+    invalidate_projects([instance], statistics=created or previous != instance.status)
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=Project)
+def notify_project_deleted(sender, instance, **kwargs):
+    # Avant la suppression : les membres et les tâches sont encore en base
+    notify_deleted_projects([instance])
+    invalidate_projects([instance], statistics=True)
+    record_deleted_projects([instance])
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_profile(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Connexion (last_login) : rien d'affiché ne change
+    if created or raw or (update_fields is not None and set(update_fields) <= {'last_login', 'password'}):
+        return
+    invalidate_user_profile(instance)
@@ -0,0 +1,46 @@
+from django.db.models import Count, Q
+from .models import Project
+from .visibility import membership
+
+
+def compute_project_statistics(user):
+    """
+    Calcule les statistiques des projets en une seule requête d'agrégation
+    conditionnelle. Le format de la réponse est identique à l'ancien calcul
+    en plusieurs COUNT.
+    """
+    queryset, aggregates = project_statistics_query(user)
+    return queryset.aggregate(**aggregates)
+
+
+async def acompute_project_statistics(user):
+    queryset, aggregates = project_statistics_query(user)
+    return await queryset.aaggregate(**aggregates)
+
+
+def project_statistics_query(user):
+    """
+    Projets comptés et agrégats des statistiques de l'utilisateur.
+    """
+    queryset = Project.objects.annotate(is_member=membership(user))
+
+    # Pour les enseignants : tous les projets
+    if user.role == 'teacher':
+        return queryset, dict(
+            total=Count('pk'),
+            todo=Count('pk', filter=Q(status='todo')),
+            in_progress=Count('pk', filter=Q(status='in_progress')),
+            done=Count('pk', filter=Q(status='done')),
+            my_projects=Count('pk', filter=Q(owner=user)),
+            supervised_projects=Count('pk', filter=Q(is_member=True) & ~Q(owner=user)),
+        )
+
+    # Pour les étudiants : projets dont ils sont propriétaires ou membres
+    return queryset.filter(Q(owner=user) | Q(is_member=True)), dict(
+        total=Count('pk'),
+        todo=Count('pk', filter=Q(owner=user, status='todo')),
+        in_progress=Count('pk', filter=Q(status='in_progress')),
+        done=Count('pk', filter=Q(status='done')),
+        my_projects=Count('pk', filter=Q(owner=user)),
+        member_projects=Count('pk', filter=Q(is_member=True) & ~Q(owner=user)),
+    )
@@ -0,0 +1,203 @@
+import base64
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from config.async_views import SyncFallback
+from users.models import CustomUser
+
+from .events import project_audiences
+from .models import Tombstone
+
+DEFAULT_OVERLAP_SECONDS = 5
+DEFAULT_RETENTION_DAYS = 30
+
+
+def sync_overlap():
+    return datetime.timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', DEFAULT_OVERLAP_SECONDS))
+
+
+def tombstone_retention():
+    return datetime.timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+
+
+class SyncExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Curseur expiré : recharger la liste complète"
+    default_code = 'sync_expired'
+
+
+def tombstone_rows(kind, object_ids, user_ids, task_ids=()):
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    return [
+        Tombstone(kind=kind, object_id=pk, user_id=user_id, task_ids=list(task_ids))
+        for pk in object_ids if pk is not None for user_id in user_ids
+    ]
+
+
+def record_tombstones(kind, object_ids, user_ids):
+    """
+    Enregistre la disparition d'objets pour les utilisateurs qui ont pu les
+    voir (`user_ids`) : les autres n'en apprennent pas les identifiants.
+    """
+    Tombstone.objects.bulk_create(tombstone_rows(kind, object_ids, user_ids))
+
+
+def superuser_ids():
+    # Les superusers voient toutes les tâches
+    return set(CustomUser.objects.filter(is_superuser=True).values_list('pk', flat=True))
+
+
+def record_task_tombstones(tasks, superusers=False):
+    """
+    Tombstones de tâches pour leur audience dans l'état donné : propriétaire
+    et membres du projet, assigné, et les superusers si `superusers` (la
+    tâche est supprimée). `tasks` : couples (id, état suivi).
+    """
+    tasks = [(pk, state) for pk, state in tasks if pk is not None]
+    if not tasks:
+        return
+    audiences = project_audiences({state['project_id'] for _, state in tasks})
+    extra = superuser_ids() if superusers else set()
+    rows = []
+    for pk, state in tasks:
+        owner_id, _, member_ids = audiences.get(state['project_id'], (None, None, set()))
+        rows += tombstone_rows('task', [pk], {owner_id, state['assigned_to_id']} | member_ids | extra)
+    Tombstone.objects.bulk_create(rows)
+
+
+def record_deleted_projects(projects):
+    """
+    À appeler avant la suppression (membres et tâches encore en base) : un
+    tombstone par projet pour son propriétaire, ses membres et les
+    superusers, avec les tâches supprimées avec lui ; les assignés hors du
+    projet reçoivent les tombstones de leurs tâches.
+    """
+    from tasks.models import Task
+
+    audiences = project_audiences([project.pk for project in projects])
+    tasks = defaultdict(list)
+    for pk, project_id, assigned_to_id in (
+        Task.objects.filter(project__in=projects).order_by('pk').values_list('pk', 'project_id', 'assigned_to_id')
+    ):
+        tasks[project_id].append((pk, assigned_to_id))
+    superusers = superuser_ids()
+    rows = []
+    for project in projects:
+        owner_id, _, member_ids = audiences.get(project.pk, (project.owner_id, None, set()))
+        audience = {owner_id} | member_ids | superusers
+        rows += tombstone_rows('project', [project.pk], audience, task_ids=[pk for pk, _ in tasks[project.pk]])
+        for pk, assigned_to_id in tasks[project.pk]:
+            if assigned_to_id not in audience:
+                rows += tombstone_rows('task', [pk], [assigned_to_id])
+    Tombstone.objects.bulk_create(rows)
+
+
+def encode_cursor(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        moment = datetime.datetime.fromisoformat(raw)
+    except Exception:
+        raise ValidationError({'since': 'Curseur invalide'})
+    if timezone.is_naive(moment):
+        raise ValidationError({'since': 'Curseur invalide'})
+    return moment
+
+
+def deleted_since(kind, user, since, visible):
+    """
+    Identifiants d'objets `kind` que l'utilisateur a pu voir, disparus depuis
+    `since` et absents de `visible`. Pour les tâches, un projet perdu ajoute
+    les tâches supprimées avec lui et celles, encore en base, qu'il ne voit
+    plus (sous-requête : pas de liste d'identifiants en mémoire).
+    """
+    entries = Tombstone.objects.filter(created_at__gte=since).filter(Q(user=user) | Q(user__isnull=True))
+    projects = entries.filter(kind='project')
+    if kind == 'project':
+        candidates = set(projects.values_list('object_id', flat=True))
+        lost = set()
+    else:
+        from tasks.models import Task
+        candidates = set(entries.filter(kind='task').values_list('object_id', flat=True))
+        for task_ids in projects.values_list('task_ids', flat=True):
+            candidates.update(task_ids)
+        lost = set(
+            Task.objects.filter(project_id__in=projects.values('object_id'))
+            .exclude(pk__in=visible.values('pk')).values_list('pk', flat=True)
+        )
+    if candidates:
+        candidates -= set(visible.filter(pk__in=candidates).values_list('pk', flat=True))
+    return candidates | lost
+
+
+class DeltaSyncMixin:
+    """
+    Mode synchronisation des listes : ?since=<curseur> renvoie les lignes
+    modifiées depuis le curseur, les identifiants disparus (supprimés, devenus
+    invisibles ou sortis des filtres) et un nouveau curseur.
+
+        {"results": [...], "deleted": [ids], "cursor": "..."}
+
+    `?since=` vide fait une première synchronisation complète. Les curseurs
+    se recouvrent de SYNC_OVERLAP_SECONDS : une ligne peut être renvoyée deux
+    fois, jamais manquée.
+    """
+    sync_query_param = 'since'
+    sync_kind = None
+
+    def get_sync_scope(self):
+        """
+        Objets visibles sans les filtres de la requête : une ligne modifiée
+        qui n'y répond plus doit être retirée côté client. None : la liste
+        n'a pas de filtres.
+        """
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if self.sync_query_param not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        # Le curseur suivant est pris avant les lectures
+        cursor = timezone.now()
+        queryset = self.filter_queryset(self.get_queryset())
+        raw = request.query_params[self.sync_query_param]
+        deleted = set()
+
+        if raw:
+            since = decode_cursor(raw)
+            if since < cursor - tombstone_retention():
+                raise SyncExpired()
+            since -= sync_overlap()
+
+            deleted |= deleted_since(self.sync_kind, request.user, since, queryset)
+            scope = self.get_sync_scope()
+            if scope is not None:
+                deleted |= set(
+                    scope.filter(updated_at__gte=since)
+                    .exclude(pk__in=queryset.values('pk'))
+                    .values_list('pk', flat=True)
+                )
+            queryset = queryset.filter(updated_at__gte=since)
+
+        serializer = self.get_serializer(queryset.order_by('updated_at', 'pk'), many=True)
+        return Response({
+            'results': serializer.data,
+            'deleted': sorted(deleted),
+            'cursor': encode_cursor(cursor),
+        })
+
+    async def alist(self, request, *args, **kwargs):
+        # La synchronisation incrémentale reste servie par la vue synchrone
+        if self.sync_query_param in request.query_params:
+            raise SyncFallback
+        return await super().alist(request, *args, **kwargs)
@@ -1,3 +1,699 @@
-from django.test import TestCase
+import asyncio
+import json
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from users.authentication import ClaimsRefreshToken
+from config.async_views import async_read_view
+from config.events import get_broker, reset_broker
+from config.testing import assert_query_budget, assert_within_view_budget
+from users.models import CustomUser
+from users.avatars import remove_avatar
+from tasks.models import Task
+from .models import Project, Tombstone
+from .permissions import get_project_access
+from .views import ProjectDetailAPIView, ProjectListCreateAPIView
+from .visibility import visible_projects
+
+
+class ProjectStatisticsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', role='teacher', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.other = CustomUser.objects.create_user(username='autre', password='x')
+
+        owned = Project.objects.create(name='A', description='', owner=self.student, status='todo')
+        owned.members.add(self.student)
+        shared = Project.objects.create(name='B', description='', owner=self.teacher, status='in_progress')
+        shared.members.add(self.teacher, self.student)
+        finished = Project.objects.create(name='C', description='', owner=self.teacher, status='done')
+        finished.members.add(self.teacher, self.student, self.other)
+        Project.objects.create(name='D', description='', owner=self.other, status='todo')
+
+    def test_teacher_statistics_single_query(self):
+        self.client.force_authenticate(self.teacher)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('projects:api_project_statistics'))
+        self.assertEqual(response.json(), {
+            'total': 4,
+            'todo': 2,
+            'in_progress': 1,
+            'done': 1,
+            'my_projects': 2,
+            'supervised_projects': 0,
+        })
+
+    def test_student_statistics_single_query(self):
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('projects:api_project_statistics'))
+        self.assertEqual(response.json(), {
+            'total': 3,
+            'todo': 1,
+            'in_progress': 1,
+            'done': 1,
+            'my_projects': 1,
+            'member_projects': 2,
+        })
+
+
+class ProjectListQueriesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.students = [CustomUser.objects.create_user(username=f'eleve{index}', password='x') for index in range(3)]
+        self.client.force_authenticate(self.teacher)
+
+    def create_projects(self, count):
+        for index in range(count):
+            project = Project.objects.create(name=f'P{index}', description='', owner=self.teacher)
+            project.members.add(self.teacher, *self.students)
+
+    def count_list_queries(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('projects:api_project_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()
+
+    def test_query_count_does_not_grow_with_projects(self):
+        self.create_projects(1)
+        few, _ = self.count_list_queries()
+        self.create_projects(10)
+        many, projects = self.count_list_queries()
+        self.assertEqual(few, many)
+        self.assertEqual(len(projects), 11)
+        self.assertTrue(all(project['is_owner'] for project in projects))
+
+    def test_members_representations(self):
+        self.create_projects(1)
+        _, projects = self.count_list_queries(members='ids')
+        self.assertCountEqual(projects[0]['members'], [self.teacher.pk] + [student.pk for student in self.students])
+
+        _, projects = self.count_list_queries(members='compact')
+        self.assertEqual(set(projects[0]['members'][0]), {'id', 'username', 'first_name', 'last_name', 'avatar'})
+
+        _, projects = self.count_list_queries()
+        self.assertIn('email', projects[0]['members'][0])
+
+        response = self.client.get(reverse('projects:api_project_list'), {'members': 'everything'})
+        self.assertEqual(response.status_code, 400)
+
+
+class VisibilityTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.member = CustomUser.objects.create_user(username='eleve', password='x')
+        self.outsider = CustomUser.objects.create_user(username='autre', password='x')
+        self.draft = Project.objects.create(name='todo', description='', owner=self.owner, status='todo')
+        self.active = Project.objects.create(name='actif', description='', owner=self.owner, status='in_progress')
+        for project in (self.draft, self.active):
+            project.members.add(self.owner, self.member)
+
+    def test_exists_visibility_matches_join_visibility(self):
+        for user in (self.owner, self.member, self.outsider):
+            legacy = Project.objects.filter(Q(owner=user) | (Q(members=user) & ~Q(status='todo'))).distinct()
+            self.assertCountEqual(visible_projects(user), legacy)
+
+        # Les membres ne voient pas les projets "à faire"
+        self.assertCountEqual(visible_projects(self.member), [self.active])
+
+
+class ProjectMembersUpdateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.students = [CustomUser.objects.create_user(username=f'eleve{index}', password='x') for index in range(4)]
+        self.project = Project.objects.create(name='P', description='', owner=self.owner, status='in_progress')
+        self.project.members.add(self.owner, *self.students[:3])
+        self.url = reverse('projects:api_project_detail', args=[self.project.pk])
+        self.client.force_authenticate(self.owner)
+
+    def membership_rows(self):
+        return dict(Project.members.through.objects.filter(project=self.project).values_list('customuser_id', 'pk'))
+
+    def test_members_ids_only_touches_changed_rows(self):
+        before = self.membership_rows()
+        members = [student.pk for student in self.students[1:]]
+        response = self.client.patch(self.url, {'members_ids': members}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        after = self.membership_rows()
+        self.assertEqual(set(after), {self.owner.pk, *members})
+        # Les lignes conservées ne sont ni supprimées ni recréées
+        for user_id in (self.owner.pk, self.students[1].pk, self.students[2].pk):
+            self.assertEqual(after[user_id], before[user_id])
+
+    def test_add_and_remove_members(self):
+        response = self.client.patch(self.url, {
+            'add_members': [self.students[3].pk, 999999],
+            'remove_members': [self.students[0].pk, self.owner.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.membership_rows()),
+            {self.owner.pk, self.students[1].pk, self.students[2].pk, self.students[3].pk},
+        )
+        self.assertEqual(len(response.json()['members']), 4)
+
+    def test_create_adds_owner_and_members(self):
+        response = self.client.post(reverse('projects:api_project_list'), {
+            'name': 'Nouveau', 'description': 'Projet', 'members_ids': [self.students[0].pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        project = Project.objects.get(pk=response.json()['id'])
+        self.assertCountEqual(project.members.values_list('pk', flat=True), [self.owner.pk, self.students[0].pk])
+
+
+class ProjectAccessTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.member = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='', owner=self.owner, status='in_progress')
+        self.project.members.add(self.owner, self.member)
+
+    def test_membership_lookup_is_cached_per_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.member
+        access = get_project_access(request)
+        with self.assertNumQueries(1):
+            self.assertTrue(access.is_member(self.project.pk))
+            self.assertTrue(get_project_access(request).is_member(self.project.pk))
+        self.assertFalse(access.is_owner(self.project))
+
+    def test_member_can_read_but_not_edit(self):
+        self.client.force_authenticate(self.member)
+        url = reverse('projects:api_project_detail', args=[self.project.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.patch(url, {'name': 'X'}, format='json').status_code, 403)
+
+
+class ProjectExportTests(TestCase):
+    def test_export_lists_members(self):
+        client = APIClient()
+        owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        student = CustomUser.objects.create_user(username='eleve', password='x')
+        project = Project.objects.create(name='P', description='', owner=owner)
+        project.members.add(owner, student)
+        client.force_authenticate(owner)
+
+        response = client.get(reverse('projects:api_project_export'), {'output': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows[0]['members'], sorted([owner.pk, student.pk]))
+
+
+class ProjectConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='d', owner=self.owner)
+        Project.objects.create(name='Q', description='d', owner=self.owner)
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('projects:api_project_list')
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return etag, response, queries
+
+    def test_unchanged_list_returns_304_with_one_query(self):
+        etag, response, queries = self.revalidate(self.url)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries), 1)
+
+    def test_delete_and_member_change_invalidate_list(self):
+        etag = self.client.get(self.url)['ETag']
+        Project.objects.filter(name='Q').delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(self.url)['ETag']
+        self.project.members.add(self.student)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_sends_last_modified(self):
+        url = reverse('projects:api_project_detail', args=[self.project.pk])
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.client.patch(url, {'name': 'P2'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def rename(self, user, first_name):
+        user.first_name = first_name
+        user.save()
+
+    def test_member_profile_change_invalidates_list_and_detail(self):
+        self.project.members.add(self.student)
+        detail = reverse('projects:api_project_detail', args=[self.project.pk])
+        for change in (
+            lambda: self.rename(self.student, 'Ada'),
+            # Avatar traité ou supprimé : update() sans signal
+            lambda: remove_avatar(self.student.pk),
+        ):
+            etags = {url: self.client.get(url)['ETag'] for url in (self.url, detail)}
+            change()
+            for url, etag in etags.items():
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProjectDeltaSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='d', owner=self.owner, status='in_progress')
+        self.project.members.add(self.owner, self.student)
+        self.other = Project.objects.create(name='Q', description='d', owner=self.owner, status='in_progress')
+        self.other.members.add(self.student)
+        self.url = reverse('projects:api_project_list')
+
+    def sync(self, user, cursor=''):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_member_removal_and_deletion_produce_tombstones(self):
+        first = self.sync(self.student)
+        self.assertEqual({row['id'] for row in first['results']}, {self.project.pk, self.other.pk})
+        self.assertEqual(first['deleted'], [])
+
+        self.client.force_authenticate(self.owner)
+        self.client.patch(reverse('projects:api_project_detail', args=[self.project.pk]), {'remove_members': [self.student.pk]}, format='json')
+        other_id = self.other.pk
+        self.other.delete()
+
+        delta = self.sync(self.student, first['cursor'])
+        self.assertEqual(delta['results'], [])
+        self.assertEqual(delta['deleted'], sorted([self.project.pk, other_id]))
+
+        # Le propriétaire voit toujours le projet modifié, sans tombstone
+        delta = self.sync(self.owner, first['cursor'])
+        self.assertEqual([row['id'] for row in delta['results']], [self.project.pk])
+        self.assertEqual(delta['deleted'], [other_id])
+
+    def test_deleted_project_not_revealed_to_outsiders(self):
+        outsider = CustomUser.objects.create_user(username='autre', password='x')
+        first = self.sync(outsider)
+        other_id = self.other.pk
+        self.other.delete()
+        self.assertEqual(self.sync(outsider, first['cursor'])['deleted'], [])
+        self.assertFalse(Tombstone.objects.filter(object_id=other_id, user__isnull=True).exists())
+
+    def test_hidden_project_tombstone_only_for_members(self):
+        outsider = CustomUser.objects.create_user(username='autre', password='x')
+        cursors = {user: self.sync(user)['cursor'] for user in (self.student, outsider)}
+        self.project.status = 'todo'
+        self.project.save()
+        self.assertEqual(self.sync(self.student, cursors[self.student])['deleted'], [self.project.pk])
+        self.assertEqual(self.sync(outsider, cursors[outsider])['deleted'], [])
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(self.url, {'since': 'pas-un-curseur'}).status_code, 400)
+
+
+class RecordingBroker:
+    """
+    Diffuseur de test : enregistre les publications.
+    """
+    published = []
+
+    def has_subscribers(self):
+        return True
+
+    def publish(self, event, user_ids):
+        self.published.append((event, set(user_ids)))
+
+
+@override_settings(EVENTS_BROKER='projects.tests.RecordingBroker')
+class ProjectEventAudienceTests(TestCase):
+    def setUp(self):
+        reset_broker()
+        RecordingBroker.published = []
+        self.addCleanup(reset_broker)
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.outsider = CustomUser.objects.create_user(username='autre', password='x')
+        self.project = Project.objects.create(name='P', description='d', owner=self.owner)
+        self.project.members.add(self.owner, self.student)
+
+    def publish(self, action):
+        RecordingBroker.published = []
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+        return RecordingBroker.published
+
+    def test_todo_project_events_only_reach_owner(self):
+        def rename():
+            self.project.name = 'P2'
+            self.project.save()
+        [(event, users)] = self.publish(rename)
+        self.assertEqual((event['type'], event['action'], event['id']), ('project', 'saved', self.project.pk))
+        self.assertEqual(users, {self.owner.pk})
+
+        self.project.status = 'in_progress'
+        [(_, users)] = self.publish(self.project.save)
+        self.assertEqual(users, {self.owner.pk, self.student.pk})
+
+    def test_task_events_follow_task_visibility(self):
+        from tasks.models import Task
+        [(event, users)] = self.publish(
+            lambda: Task.objects.create(title='t', description='d', project=self.project, assigned_to=self.outsider)
+        )
+        self.assertEqual((event['type'], event['action']), ('task', 'created'))
+        self.assertEqual(users, {self.owner.pk, self.student.pk, self.outsider.pk})
+
+    def test_project_deletion_publishes_one_event_for_its_tasks(self):
+        admin = CustomUser.objects.create_superuser(username='admin', password='x')
+        for index in range(3):
+            Task.objects.create(title=f't{index}', description='d', project=self.project, assigned_to=self.outsider)
+        [(event, users)] = self.publish(self.project.delete)
+        self.assertEqual((event['type'], event['action']), ('project', 'deleted'))
+        self.assertEqual(users, {self.owner.pk, self.student.pk, self.outsider.pk, admin.pk})
+
+    def test_removed_member_is_notified(self):
+        [(_, users)] = self.publish(lambda: self.project.members.remove(self.student))
+        self.assertEqual(users, {self.owner.pk, self.student.pk})
+
+    def test_rollback_publishes_nothing(self):
+        def rolled_back():
+            with transaction.atomic():
+                self.project.save()
+                transaction.set_rollback(True)
+        self.assertEqual(self.publish(rolled_back), [])
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        reset_broker()
+        self.addCleanup(reset_broker)
+        self.user = CustomUser.objects.create_user(username='prof', password='x')
+        self.token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+
+    def ticket(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.post(reverse('api_events_ticket'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    async def test_stream_delivers_published_events(self):
+        ticket = await sync_to_async(self.ticket)()
+        response = await self.async_client.get(reverse('api_events'), {'ticket': ticket})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+
+        get_broker().publish({'type': 'task', 'action': 'saved', 'id': 1}, [self.user.pk])
+        chunk = await anext(chunks)
+        self.assertTrue(chunk.startswith(b'event: task\ndata: {"type":"task"'))
+
+        # Déconnexion du client : le serveur ASGI annule la lecture en cours
+        pending = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(get_broker().has_subscribers())
+
+    async def test_stream_requires_ticket_or_header(self):
+        url = reverse('api_events')
+        # Le jeton JWT n'est pas accepté dans l'URL
+        self.assertEqual((await self.async_client.get(url, {'token': self.token})).status_code, 401)
+        self.assertEqual((await self.async_client.get(url, {'ticket': 'invalide'})).status_code, 401)
+        with override_settings(EVENTS_TICKET_SECONDS=0):
+            # Ticket daté à la seconde : déjà plus vieux que 0 s
+            ticket = await sync_to_async(self.ticket)()
+            self.assertEqual((await self.async_client.get(url, {'ticket': ticket})).status_code, 401)
+
+    def test_stream_refused_outside_asgi(self):
+        response = self.client.get(reverse('api_events'), HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 501)
+
+
+def jwt_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+    return client
+
+
+class ProjectQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.students = [CustomUser.objects.create_user(username=f'eleve{index}', password='x') for index in range(3)]
+        for index in range(3):
+            project = Project.objects.create(name=f'P{index}', description='d', owner=self.owner, status='in_progress')
+            project.members.add(self.owner, *self.students)
+        self.project = project
+
+    def test_reads_within_budget(self):
+        for user in (self.owner, self.students[0]):
+            client = jwt_client(user)
+            assert_within_view_budget(client, 'get', reverse('projects:api_project_list'))
+            cursor = client.get(reverse('projects:api_project_list'), {'since': ''}).json()['cursor']
+            assert_within_view_budget(client, 'get', reverse('projects:api_project_list'), {'since': cursor})
+            assert_within_view_budget(client, 'get', reverse('projects:api_project_detail', args=[self.project.pk]))
+            assert_within_view_budget(client, 'get', reverse('projects:api_project_statistics'))
+            assert_within_view_budget(client, 'get', reverse('projects:api_project_export'))
+
+    def test_writes_within_budget(self):
+        client = jwt_client(self.owner)
+        members = [student.pk for student in self.students[:2]]
+        response = assert_within_view_budget(client, 'post', reverse('projects:api_project_list'),
+                                             {'name': 'N', 'description': 'd', 'members': members}, format='json')
+        self.assertEqual(response.status_code, 201)
+        # Ajout et retrait de membres (journal des suppressions, événements)
+        response = assert_within_view_budget(client, 'patch', reverse('projects:api_project_detail', args=[self.project.pk]),
+                                             {'name': 'P2', 'members': members[1:] + [self.owner.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_budget_helper_fails_when_exceeded(self):
+        with self.assertRaisesMessage(AssertionError, 'budget de 0'):
+            with assert_query_budget(0):
+                list(Project.objects.all())
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.url = reverse('projects:api_project_list')
+
+    def test_server_timing_only_for_staff_and_log_for_everyone(self):
+        with self.assertLogs('config.performance', 'INFO') as logs:
+            teacher = jwt_client(self.teacher).get(self.url)
+            student = jwt_client(self.student).get(self.url)
+        self.assertRegex(teacher['Server-Timing'], r'^db;dur=[\d.]+;desc="SQL x\d+", app;dur=')
+        self.assertNotIn('Server-Timing', student)
+        self.assertEqual(len(logs.records), 2)
+        fields = logs.records[1].performance
+        self.assertEqual((fields['path'], fields['status'], fields['user_id']), (self.url, 200, self.student.pk))
+        self.assertEqual(fields['query_budget'], ProjectListCreateAPIView.query_budget['GET'])
+
+    @override_settings(PERFORMANCE_SLOW_QUERY_MS=0, PERFORMANCE_MAX_EXPLAINS=1)
+    def test_slow_queries_logged_with_plan_and_budget_overrun(self):
+        with mock.patch.object(ProjectListCreateAPIView, 'query_budget', {'GET': 1}):
+            with self.assertLogs('config.performance', 'WARNING') as logs:
+                jwt_client(self.teacher).get(self.url)
+        messages = [record.getMessage() for record in logs.records]
+        self.assertTrue(messages[0].startswith('Budget de requêtes dépassé'))
+        self.assertEqual(len(messages), 2)
+        self.assertTrue(messages[1].startswith('Requête lente'))
+        self.assertTrue(logs.records[1].performance['plan'])
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', role='teacher', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.other = CustomUser.objects.create_user(username='autre', password='x')
+        self.project = Project.objects.create(name='A', description='', owner=self.teacher, status='in_progress')
+        self.project.members.add(self.teacher, self.student)
+
+    def get(self, user, name, **params):
+        self.client.force_authenticate(user)
+        return self.client.get(reverse(name), params)
+
+    def test_second_call_served_from_cache_without_queries(self):
+        first = self.get(self.student, 'projects:api_project_statistics')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.get(self.student, 'projects:api_project_statistics')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+        self.assertIn('Authorization', second['Vary'])
+
+    def test_cache_is_per_user_and_per_url(self):
+        self.get(self.student, 'tasks:api_task_statistics')
+        self.assertEqual(self.get(self.other, 'tasks:api_task_statistics')['X-Cache'], 'MISS')
+        response = self.get(self.student, 'tasks:api_task_statistics', project_id=self.project.pk)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_task_change_invalidates_owner_and_assignee_only(self):
+        for user in (self.teacher, self.student, self.other):
+            self.get(user, 'tasks:api_task_statistics')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='T', description='', project=self.project, assigned_to=self.student)
+        self.assertEqual(self.get(self.teacher, 'tasks:api_task_statistics')['X-Cache'], 'MISS')
+        response = self.get(self.student, 'tasks:api_task_statistics')
+        self.assertEqual((response['X-Cache'], response.json()['total']), ('MISS', 1))
+        self.assertEqual(self.get(self.other, 'tasks:api_task_statistics')['X-Cache'], 'HIT')
+
+    def test_member_change_invalidates_project_list(self):
+        self.assertEqual(self.get(self.other, 'projects:api_project_list').json(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.other)
+        response = self.get(self.other, 'projects:api_project_list')
+        self.assertEqual((response['X-Cache'], len(response.json())), ('MISS', 1))
+
+    def test_new_project_invalidates_every_teacher_statistics(self):
+        self.get(self.teacher, 'projects:api_project_statistics')
+        self.get(self.student, 'projects:api_project_statistics')
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(name='B', description='', owner=self.other)
+        response = self.get(self.teacher, 'projects:api_project_statistics')
+        self.assertEqual((response['X-Cache'], response.json()['total']), ('MISS', 2))
+        self.assertEqual(self.get(self.student, 'projects:api_project_statistics')['X-Cache'], 'HIT')
+
+    def test_conditional_request_on_cached_list(self):
+        etag = self.get(self.student, 'projects:api_project_list')['ETag']
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('projects:api_project_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Cache']), (304, 'HIT'))
+
+    def test_metrics_for_staff_only(self):
+        self.get(self.student, 'projects:api_project_statistics')
+        self.get(self.student, 'projects:api_project_statistics')
+        self.assertEqual(self.get(self.student, 'api_cache_metrics').status_code, 403)
+        metrics = self.get(self.teacher, 'api_cache_metrics').json()
+        self.assertEqual(metrics['project_statistics'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', role='teacher', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='A', description='', owner=self.teacher, status='in_progress')
+        self.project.members.add(self.teacher, self.student)
+        self.draft = Project.objects.create(name='B', description='', owner=self.teacher, status='todo')
+        self.task = Task.objects.create(title='T', description='', project=self.project, assigned_to=self.student)
+
+    def auth(self, user, **headers):
+        return {'Authorization': f'Bearer {ClaimsRefreshToken.for_user(user).access_token}', **headers}
+
+    def drf_get(self, path, user, **headers):
+        """
+        Réponse de la vue DRF synchrone seule, pour comparaison.
+        """
+        match = resolve(path.split('?')[0])
+        request = APIRequestFactory().get(path, headers=self.auth(user, **headers))
+        response = match.func.sync_view(request, *match.args, **match.kwargs)
+        response.render()
+        return response
+
+    def read_paths(self):
+        return [
+            (reverse('projects:api_project_list'), self.student),
+            (reverse('projects:api_project_list') + '?members=ids', self.teacher),
+            (reverse('projects:api_project_detail', args=[self.project.pk]), self.student),
+            (reverse('projects:api_project_statistics'), self.teacher),
+            (reverse('tasks:api_task_list'), self.student),
+            (reverse('projects:project_tasks_list', args=[self.project.pk]) + '?status=todo', self.teacher),
+            (reverse('tasks:api_task_detail', args=[self.task.pk]), self.teacher),
+            (reverse('tasks:api_task_statistics') + f'?project_id={self.project.pk}', self.student),
+            (reverse('users:user-me'), self.student),
+        ]
+
+    async def test_reads_served_by_async_orm_like_drf(self):
+        for path, user in self.read_paths():
+            with self.subTest(path=path):
+                expected = await sync_to_async(self.drf_get)(path, user)
+                # Aucun passage par la vue synchrone ni par un thread hors ORM
+                with mock.patch('config.async_views.sync_to_async', side_effect=AssertionError(path)):
+                    response = await self.async_client.get(path, headers=self.auth(user))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['Content-Type'], expected['Content-Type'])
+                self.assertEqual(response['Allow'], expected['Allow'])
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+    async def test_conditional_get_on_async_path(self):
+        path = reverse('projects:api_project_detail', args=[self.project.pk])
+        etag = (await self.async_client.get(path, headers=self.auth(self.student)))['ETag']
+        response = await self.async_client.get(path, headers=self.auth(self.student, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+
+    async def test_other_outcomes_answered_by_drf_view(self):
+        list_path = reverse('projects:api_project_list')
+        for path, headers, status, delegated in (
+            (reverse('projects:api_project_detail', args=[self.draft.pk]), {}, 404, False),
+            (list_path + '?members=tout', {}, 400, False),
+            (list_path, {'Authorization': 'Bearer invalide'}, 401, False),
+            (list_path, {'Authorization': ''}, 401, False),
+            (list_path + '?page_size=1', {}, 200, True),
+            (list_path + '?since=', {}, 200, True),
+            (list_path, {'Accept': 'text/html'}, 406, True),
+        ):
+            with self.subTest(path=path, headers=headers):
+                if delegated:
+                    response = await self.async_client.get(path, headers=self.auth(self.student, **headers))
+                else:
+                    # Erreur produite par le chemin asynchrone, sans relire dans la vue synchrone
+                    with mock.patch('config.async_views.sync_to_async', side_effect=AssertionError(path)):
+                        response = await self.async_client.get(path, headers=self.auth(self.student, **headers))
+                expected = await sync_to_async(self.drf_get)(path, self.student, **headers)
+                self.assertEqual(response.status_code, status)
+                if 'since' not in path:  # curseur pris à l'heure de l'appel
+                    self.assertEqual(response.content, expected.content)
+                    self.assertEqual(response.get('WWW-Authenticate'), expected.get('WWW-Authenticate'))
+                    self.assertEqual(response.get('Allow'), expected.get('Allow'))
+
+    def test_sync_views_outside_asgi(self):
+        sync_view = ProjectDetailAPIView.as_view()
+        with override_settings(TESTING=False):
+            self.assertIs(async_read_view(sync_view, ProjectDetailAPIView.aretrieve), sync_view)
+            with mock.patch('config.async_views._served_by_asgi', True):
+                self.assertIsNot(async_read_view(sync_view, ProjectDetailAPIView.aretrieve), sync_view)
+                with override_settings(ASYNC_API_READS=False):
+                    self.assertIs(async_read_view(sync_view, ProjectDetailAPIView.aretrieve), sync_view)
+
+    async def test_writes_delegated_to_drf_view(self):
+        path = reverse('projects:api_project_detail', args=[self.project.pk])
+        response = await self.async_client.patch(
+            path, {'name': 'Renommé'}, content_type='application/json', headers=self.auth(self.teacher)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await Project.objects.aget(pk=self.project.pk)).name, 'Renommé')
+
+    async def test_inactive_user_rejected(self):
+        headers = self.auth(self.student)
+        self.student.is_active = False
+        await self.student.asave(update_fields=['is_active'])
+        response = await self.async_client.get(reverse('users:user-me'), headers=headers)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_async_middleware_counts_queries(self):
+        with self.assertLogs('config.performance', 'INFO') as logs:
+            response = await self.async_client.get(reverse('projects:api_project_list'), headers=self.auth(self.teacher))
+        self.assertRegex(response['Server-Timing'], r'desc="SQL x[1-9]')
+        fields = logs.records[0].performance
+        self.assertEqual((fields['user_id'], fields['query_budget']), (self.teacher.pk, 5))
+        self.assertLessEqual(fields['queries'], fields['query_budget'])
@@ -6,11 +6,14 @@ app_name = 'projects'
 
 urlpatterns = [
     # Routes API
-    path('', views.ProjectListCreateAPIView.as_view(), name='api_project_list'),
-    path('<int:pk>/', views.ProjectDetailAPIView.as_view(), name='api_project_detail'),
+    # (GET asynchrones sous ASGI, voir config.async_views)
+    path('', views.project_list_api, name='api_project_list'),
+    path('<int:pk>/', views.project_detail_api, name='api_project_detail'),
     path('<int:project_id>/tasks/', task_views.TaskCreateView.as_view(), name='project_tasks_create'),
-    path('<int:project_id>/tasks/list/', task_views.TasklistView.as_view(), name='project_tasks_list'),
-    path('statistics/', views.project_statistics, name='api_project_statistics'),
+    path('<int:project_id>/tasks/list/', task_views.task_list_api, name='project_tasks_list'),
+    path('<int:project_id>/activity/', task_views.TaskActivityView.as_view(), name='project_activity'),
+    path('statistics/', views.project_statistics_api, name='api_project_statistics'),
+    path('export/', views.ProjectExportView.as_view(), name='api_project_export'),
     # path('<int:project_id>/tasks/statistics/', views.task_statistics, name='api_task_statistics'),
 
     # Routes HTML (commentées pour l'instant)
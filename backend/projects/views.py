@@ -3,67 +3,83 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Project
 from .forms import ProjectForm
-from django.urls import reverse
-from .serializers import ProjectSerializer
-from rest_framework import generics, status
+from .serializers import ProjectSerializer, MEMBERS_REPRESENTATIONS
+from rest_framework import generics
 from rest_framework import permissions
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.renderers import JSONRenderer
-from .permissions import IsProjectOwnerOrMember
-from django.db.models import Q, Count
+from .permissions import IsProjectOwnerOrMember, get_project_access
+from .statistics import acompute_project_statistics, compute_project_statistics
+from .visibility import visible_projects
+from .sync import DeltaSyncMixin
+from django.db.models import Prefetch
 from users.models import CustomUser
+from users.authentication import ClaimsJWTAuthentication
+from config.pagination import UpdatedAtKeysetPagination
+from config.conditional import ConditionalGetMixin
+from config.exports import StreamingExportMixin, export_format, stream_export
+from config.instrumentation import query_budget
+from config.cache import CachedListMixin, acached_response, cache_metrics, cached_response
+from config.async_views import AsyncJWTAuthentication, async_read_view, json_response
+from .cache import TEACHER_PROJECT_STATISTICS
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from config.events import RESYNC, format_sse, get_broker, issue_ticket, read_ticket, ticket_lifetime
+from collections import defaultdict
+from itertools import islice
 
 # Vue pour les statistiques
+# Réponses en cache (config.cache), avec leurs compteurs de succès / échecs
+CACHED_RESPONSES = ('project_list', 'project_statistics', 'task_statistics')
+
+
+@query_budget(2)
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def project_statistics(request):
-    user = request.user
-    
-    # Pour les enseignants : tous les projets
-    if user.role == 'teacher':
-        stats = {
-            'total': Project.objects.count(),
-            'todo': Project.objects.filter(status='todo').count(),
-            'in_progress': Project.objects.filter(status='in_progress').count(),
-            'done': Project.objects.filter(status='done').count(),
-            'my_projects': Project.objects.filter(owner=user).count(),
-            'supervised_projects': Project.objects.filter(members=user).exclude(owner=user).count()
-        }
-    # Pour les étudiants : projets dont ils sont propriétaires ou membres
-    else:
-        stats = {
-            'total': Project.objects.filter(Q(owner=user) | Q(members=user)).distinct().count(),
-            'todo': Project.objects.filter(owner=user, status='todo').count(),
-            'in_progress': Project.objects.filter(
-                (Q(owner=user) | Q(members=user)) & Q(status='in_progress')
-            ).distinct().count(),
-            'done': Project.objects.filter(
-                (Q(owner=user) | Q(members=user)) & Q(status='done')
-            ).distinct().count(),
-            'my_projects': Project.objects.filter(owner=user).count(),
-            'member_projects': Project.objects.filter(members=user).exclude(owner=user).count()
-        }
-    
-    return Response(stats)
+    # Les enseignants comptent tous les projets : portée globale en plus de la leur
+    scopes = [TEACHER_PROJECT_STATISTICS] if request.user.role == 'teacher' else []
+    return cached_response(
+        request, 'project_statistics', lambda: Response(compute_project_statistics(request.user)), scopes
+    )
+
+
+async def aproject_statistics(view, request):
+    """
+    project_statistics pour les lectures asynchrones (mêmes entrées en cache).
+    """
+    scopes = [TEACHER_PROJECT_STATISTICS] if request.user.role == 'teacher' else []
+
+    async def compute():
+        return json_response(await acompute_project_statistics(request.user))
+
+    return await acached_response(request, 'project_statistics', compute, scopes)
+
+
+@query_budget(1)
+@api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([permissions.IsAdminUser])
+def response_cache_metrics(request):
+    """
+    Succès et échecs du cache des réponses, par réponse (staff uniquement).
+    """
+    return Response(cache_metrics(CACHED_RESPONSES))
 
 #vue normale
 
 @login_required
 def project_list(request):
-    user = request.user
-    # Pour les projets "à faire", montrer uniquement ceux dont l'utilisateur est propriétaire
-    todo_projects = Project.objects.filter(owner=user, status='todo')
-    # Pour les autres projets, montrer ceux dont l'utilisateur est membre ou propriétaire
-    other_projects = Project.objects.filter(
-        (Q(members=user) | Q(owner=user)) & ~Q(status='todo')
-    ).distinct()
-    
-    user_projects = todo_projects | other_projects
+    # Projets "à faire" dont l'utilisateur est propriétaire, et autres projets
+    # dont il est membre ou propriétaire
     return render(request, 'projects/dashboard.html', {
-        'projects': user_projects.distinct()
+        'projects': visible_projects(request.user)
     })
 
 @login_required
@@ -138,12 +154,13 @@ def project_delete(request, pk):
 @login_required
 def project_tasks(request, pk):
     project = get_object_or_404(Project, pk=pk)
+    access = get_project_access(request)
     # Vérifier que l'utilisateur est membre ou propriétaire
-    if project.status == 'todo' and project.owner != request.user:
+    if project.status == 'todo' and not access.is_owner(project):
         messages.error(request, "Ce projet est en cours de préparation.")
         return redirect('projects:project_list')
     
-    if request.user not in project.members.all() and request.user != project.owner:
+    if not access.is_owner(project) and not access.is_member(project.pk):
         messages.error(request, "Vous n'avez pas accès à ce projet.")
         return redirect('projects:project_list')
     
@@ -154,42 +171,70 @@ def project_tasks(request, pk):
 
 #vue API
 
-class ProjectListCreateAPIView(generics.ListCreateAPIView):
+class ProjectMembersMixin:
+    """
+    Précharge les membres des projets (une requête pour toute la page) avec
+    uniquement les colonnes nécessaires à la représentation demandée via
+    ?members=full|compact|ids.
+    """
+    members_query_param = 'members'
+
+    def get_members_mode(self):
+        mode = self.request.query_params.get(self.members_query_param, 'full')
+        if mode not in MEMBERS_REPRESENTATIONS:
+            raise ValidationError({self.members_query_param: f"Valeurs possibles : {', '.join(MEMBERS_REPRESENTATIONS)}"})
+        return mode
+
+    def with_members(self, queryset):
+        columns = MEMBERS_REPRESENTATIONS[self.get_members_mode()]
+        return queryset.prefetch_related(
+            Prefetch('members', queryset=CustomUser.objects.only(*columns))
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['members_mode'] = self.get_members_mode()
+        return context
+
+class ProjectListCreateAPIView(DeltaSyncMixin, CachedListMixin, ConditionalGetMixin, ProjectMembersMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     renderer_classes = [JSONRenderer]
+    # Pagination par curseur, activée uniquement si le client envoie ?cursor= ou ?page_size=
+    pagination_class = UpdatedAtKeysetPagination
+    # Synchronisation incrémentale via ?since= (jamais mise en cache)
+    sync_kind = 'project'
+    # Liste en cache par utilisateur et paramètres, invalidée par projects.cache
+    cache_name = 'project_list'
+    # Budget de requêtes SQL par méthode, authentification JWT comprise (config.instrumentation)
+    # (GET ?since= : lignes modifiées puis journal des suppressions)
+    query_budget = {'GET': 5, 'POST': 12}
 
     def get_queryset(self):
-        user = self.request.user
         # Projets visibles :
         # 1. Tous les projets dont l'utilisateur est propriétaire
         # 2. Les projets non "todo" dont l'utilisateur est membre
-        return Project.objects.filter(
-            Q(owner=user) |  # Tous les projets dont l'utilisateur est propriétaire
-            (Q(members=user) & ~Q(status='todo'))  # Les projets où l'utilisateur est membre ET qui ne sont pas "à faire"
-        ).distinct().select_related('owner')
+        return self.with_members(visible_projects(self.request.user).select_related('owner'))
 
     def perform_create(self, serializer):
         # Créer le projet avec le statut initial "à faire"
-        project = serializer.save(owner=self.request.user, status='todo')
-        # Ajouter le propriétaire comme membre
-        project.members.add(self.request.user)
+        # (le serializer ajoute le propriétaire aux membres)
+        serializer.save(owner=self.request.user, status='todo')
 
-class ProjectDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailAPIView(ConditionalGetMixin, ProjectMembersMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsProjectOwnerOrMember]
     renderer_classes = [JSONRenderer]
+    # Budget de requêtes SQL par méthode, authentification JWT comprise (config.instrumentation)
+    # (pas de budget pour DELETE : la cascade dépend du nombre de tâches)
+    query_budget = {'GET': 4, 'PUT': 15, 'PATCH': 15}
 
     def get_queryset(self):
-        user = self.request.user
         # Même logique que pour la liste
-        return Project.objects.filter(
-            Q(owner=user) |  # Tous les projets dont l'utilisateur est propriétaire
-            (Q(members=user) & ~Q(status='todo'))  # Les projets où l'utilisateur est membre ET qui ne sont pas "à faire"
-        ).distinct().select_related('owner')
+        return self.with_members(visible_projects(self.request.user).select_related('owner'))
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -201,9 +246,125 @@ class ProjectDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         # Si le projet passe de 'todo' à 'in_progress', on garde les membres
         new_status = serializer.validated_data.get('status', old_status)
         
+        # Le serializer garde le propriétaire parmi les membres
         self.perform_update(serializer)
+
+        # Les membres préchargés ne reflètent plus la base après la mise à jour
+        if getattr(instance, '_prefetched_objects_cache', None):
+            instance._prefetched_objects_cache = {}
         
-        # S'assurer que le propriétaire est toujours membre
-        instance.members.add(instance.owner)
-        
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+def project_export_rows(queryset, columns, chunk_size):
+    """
+    Lignes d'export des projets, avec la liste des identifiants des membres.
+    Les membres sont chargés par paquets de `chunk_size` projets (une requête
+    par paquet) : la mémoire ne dépend pas du nombre total de projets.
+    """
+    rows = queryset.order_by('pk').values(*columns).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        members = defaultdict(list)
+        memberships = Project.members.through.objects.filter(
+            project_id__in=[row['id'] for row in chunk]
+        ).order_by('project_id', 'customuser_id').values_list('project_id', 'customuser_id')
+        for project_id, user_id in memberships:
+            members[project_id].append(user_id)
+        for row in chunk:
+            row['members'] = members[row['id']]
+            yield row
+
+class ProjectExportView(StreamingExportMixin, APIView):
+    """
+    Export en flux des projets visibles avec leurs membres (?output=csv|ndjson).
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    columns = ['id', 'name', 'description', 'status', 'owner_id', 'created_at', 'updated_at']
+    chunk_size = 1000
+    # Requêtes avant le début du flux ; celles de l'export lui-même ne sont pas comptées
+    query_budget = {'GET': 1}
+
+    def get(self, request):
+        output = export_format(request)
+        rows = project_export_rows(visible_projects(request.user), self.columns, self.chunk_size)
+        return stream_export(request, rows, self.columns + ['members'], output, 'projets')
+
+
+@query_budget({'POST': 0})
+@api_view(['POST'])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def event_ticket(request):
+    """
+    Ticket d'ouverture du flux d'événements (config.events.issue_ticket).
+    """
+    return Response({'ticket': issue_ticket(request.user.pk), 'expires_in': ticket_lifetime()})
+
+
+async def authenticate_stream(request):
+    """
+    Authentification du flux d'événements : ?ticket= (navigateurs, voir
+    event_ticket) ou jeton JWT dans l'en-tête Authorization.
+    """
+    if 'ticket' in request.GET:
+        user_id = read_ticket(request.GET['ticket'])
+        if user_id is None:
+            return None
+        return await CustomUser.objects.only('pk', 'is_active').filter(pk=user_id).afirst()
+    authenticator = AsyncJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    try:
+        validated = authenticator.get_validated_token(raw_token)
+        return await authenticator.aget_user(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+async def event_stream(request):
+    """
+    Flux Server-Sent Events des changements de projets et de tâches visibles
+    par l'utilisateur. Les événements sont des notifications compactes : le
+    client recharge via ?since=. Refusé hors ASGI : un serveur WSGI
+    bloquerait un thread par client et ne transmettrait rien avant la fin
+    du flux, qui n'arrive jamais.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': "Flux d'événements disponible uniquement sous ASGI (config.asgi)."}, status=501)
+    user = await authenticate_stream(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'detail': "Informations d'authentification non fournies ou invalides."}, status=401)
+
+    heartbeat = getattr(settings, 'EVENTS_HEARTBEAT_SECONDS', 15)
+
+    async def stream():
+        subscription = get_broker().subscribe(user.pk)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = await subscription.get(timeout=heartbeat)
+                if event is None:
+                    # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                    yield ': ping\n\n'
+                    continue
+                yield format_sse(event)
+                if event is RESYNC:
+                    return
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Vues des URL : GET servis par l'ORM asynchrone sous ASGI, le reste par la vue DRF (config.async_views)
+project_list_api = async_read_view(ProjectListCreateAPIView.as_view(), ProjectListCreateAPIView.alist)
+project_detail_api = async_read_view(ProjectDetailAPIView.as_view(), ProjectDetailAPIView.aretrieve)
+project_statistics_api = async_read_view(project_statistics, aproject_statistics)
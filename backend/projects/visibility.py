@@ -0,0 +1,62 @@
+from django.db.models import Exists, OuterRef, Q
+from .models import Project
+
+# Table de liaison projets <-> membres
+Membership = Project.members.through
+
+
+def membership(user, project_ref='pk'):
+    """
+    Sous-requête EXISTS : l'utilisateur est-il membre du projet référencé ?
+    `project_ref` désigne la colonne du projet dans la requête englobante
+    ('pk' pour les projets, 'project_id' pour les tâches).
+    """
+    return Exists(
+        Membership.objects.filter(
+            project_id=OuterRef(project_ref),
+            customuser_id=user.pk,
+        )
+    )
+
+
+def project_visibility(user):
+    """
+    Condition de visibilité d'un projet :
+    1. Tous les projets dont l'utilisateur est propriétaire
+    2. Les projets non "todo" dont l'utilisateur est membre
+    """
+    return Q(owner=user) | (Q(membership(user)) & ~Q(status='todo'))
+
+
+def visible_projects(user, queryset=None):
+    """
+    Projets visibles par l'utilisateur, sans jointure sur les membres ni DISTINCT.
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+    return queryset.filter(project_visibility(user))
+
+
+def task_visibility(user):
+    """
+    Condition de visibilité d'une tâche pour un utilisateur non superuser :
+    tâches de ses projets, tâches qui lui sont assignées, ou tâches des
+    projets dont il est membre (quel que soit l'état du projet).
+    """
+    return (
+        Q(project__owner=user) |
+        Q(assigned_to=user) |
+        Q(membership(user, 'project_id'))
+    )
+
+
+def visible_tasks(user, queryset=None):
+    """
+    Tâches visibles par l'utilisateur (le superuser voit tout).
+    """
+    if queryset is None:
+        from tasks.models import Task
+        queryset = Task.objects.all()
+    if user.is_superuser:
+        return queryset
+    return queryset.filter(task_visibility(user))
@@ -0,0 +1,121 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from projects.models import Project
+from .models import Task, TaskEvent
+
+# Nom des champs suivis dans le journal ('assigned_to_id' -> 'assigned_to').
+# Sans la position : un glisser-déposer dans la colonne n'est pas une
+# modification (un changement de colonne apparaît par son statut).
+EVENT_FIELDS = {field: field.removesuffix('_id') for field in Task.TRACKED_FIELDS if field != 'position'}
+
+
+class ActivityBuffer:
+    """
+    Événements d'une requête, écrits en un seul bulk_create à la fin.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        self.events = []
+        self.closed = False
+
+    def actor_id(self):
+        user = getattr(self.request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+
+_buffer = ContextVar('task_activity_buffer', default=None)
+
+
+def write_events(events):
+    if not events:
+        return
+    # Projet supprimé entre-temps (suppression en cascade) : ses événements disparaîtraient avec lui
+    existing = set(Project.objects.filter(pk__in={event.project_id for event in events}).values_list('pk', flat=True))
+    TaskEvent.objects.bulk_create([event for event in events if event.project_id in existing], batch_size=1000)
+
+
+@contextmanager
+def buffered_activity(request=None):
+    """
+    Regroupe les événements enregistrés dans le bloc et les écrit à la sortie.
+    """
+    buffer = ActivityBuffer(request)
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+        buffer.closed = True
+        write_events(buffer.events)
+
+
+@asynccontextmanager
+async def abuffered_activity(request=None):
+    """
+    buffered_activity() sous ASGI : les vues synchrones appelées dans un
+    thread partagent le tampon (contexte copié), l'écriture se fait dans un
+    thread et seulement s'il y a des événements.
+    """
+    buffer = ActivityBuffer(request)
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+        buffer.closed = True
+        if buffer.events:
+            await sync_to_async(write_events)(buffer.events)
+
+
+def task_event(action, task, previous=None, actor_id=None):
+    """
+    Événement (non enregistré) pour une tâche ; None si une modification ne
+    touche aucun champ suivi.
+    """
+    current = task.tracked_state() if action != 'deleted' else {}
+    if action == 'updated':
+        changes = {
+            EVENT_FIELDS[field]: [previous[field], current[field]]
+            for field in EVENT_FIELDS
+            if previous is not None and previous[field] != current[field]
+        }
+        if not changes:
+            return None
+    elif action == 'created':
+        changes = {EVENT_FIELDS[field]: [None, current[field]] for field in EVENT_FIELDS if current[field] is not None}
+    else:
+        changes = {}
+    return TaskEvent(
+        project_id=task.project_id,
+        task_id=task.pk,
+        task_title=task.title,
+        actor_id=actor_id,
+        action=action,
+        changes=changes,
+    )
+
+
+def record_task_events(items):
+    """
+    Enregistre des événements pour des couples (action, tâche, état précédent).
+    Ils ne sont retenus qu'une fois la transaction validée, puis écrits à la
+    fin de la requête (hors requête : immédiatement).
+    """
+    buffer = _buffer.get()
+    actor_id = buffer.actor_id() if buffer is not None else None
+    events = [event for event in (task_event(action, task, previous, actor_id) for action, task, previous in items) if event]
+    if not events:
+        return
+
+    def stage():
+        if buffer is None or buffer.closed:
+            write_events(events)
+        else:
+            buffer.events.extend(events)
+
+    transaction.on_commit(stage)
@@ -1,6 +1,22 @@
 from django.contrib import admin
-from .models import Task
+from .models import Task, TaskEvent
 
 # Register your models here.
 
-admin.site.register(Task)
\ No newline at end of file
+admin.site.register(Task)
+
+
+@admin.register(TaskEvent)
+class TaskEventAdmin(admin.ModelAdmin):
+    # Journal en ajout seul : consultation uniquement
+    list_display = ('created_at', 'project', 'task_title', 'action', 'actor')
+    list_select_related = ('project', 'actor')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
\ No newline at end of file
@@ -0,0 +1,179 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from projects.models import Project
+from projects.permissions import get_project_access
+from projects.cache import invalidate_tasks
+from projects.events import notify_tasks
+from projects.sync import record_task_tombstones
+from users.models import CustomUser
+from .activity import record_task_events
+from .counters import apply_task_changes
+from .models import Task
+from .positions import assign_positions
+from .signals import visibility_may_shrink
+from .serializers import TaskSerializer
+
+DEFAULT_MAX_OPERATIONS = 5000
+
+
+def max_operations():
+    return getattr(settings, 'TASKS_BULK_MAX_OPERATIONS', DEFAULT_MAX_OPERATIONS)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Clé étrangère résolue depuis les objets préchargés dans le contexte
+    (context['preloaded'][Model] = {pk: objet}) au lieu d'une requête par élément.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return preloaded[pk]
+
+
+class BulkTaskSerializer(TaskSerializer):
+    project = PreloadedPrimaryKeyRelatedField(queryset=Project.objects.all())
+    assigned_to = PreloadedPrimaryKeyRelatedField(queryset=CustomUser.objects.all(), allow_null=True, required=False)
+
+
+def _as_id(item, field):
+    value = item.get(field) if isinstance(item, dict) else None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return int(value)
+    return None
+
+
+def _ids(items, field):
+    return {pk for pk in (_as_id(item, field) for item in items) if pk is not None}
+
+
+def apply_bulk_operations(request, creates, updates):
+    """
+    Valide puis applique un lot de créations et de mises à jour de tâches.
+
+    - les projets et utilisateurs référencés sont chargés en une requête chacun ;
+    - la propriété d'un projet est vérifiée une fois par projet distinct ;
+    - les écritures se font par bulk_create / bulk_update dans une transaction,
+      les compteurs étant mis à jour en une passe.
+
+    Les éléments invalides ou non autorisés sont ignorés et signalés ; retourne
+    les résultats par élément, dans l'ordre reçu.
+    """
+    user = request.user
+    access = get_project_access(request)
+
+    update_ids = _ids(updates, 'id')
+    tasks = Task.objects.in_bulk(update_ids) if update_ids else {}
+
+    project_ids = _ids(creates, 'project') | _ids(updates, 'project') | {task.project_id for task in tasks.values()}
+    user_ids = _ids(creates, 'assigned_to') | _ids(updates, 'assigned_to')
+    preloaded = {
+        Project: Project.objects.only('id', 'owner_id').in_bulk(project_ids),
+        CustomUser: CustomUser.objects.only('id').in_bulk(user_ids),
+    }
+    for project in preloaded[Project].values():
+        access.remember_project(project)
+    context = {'request': request, 'preloaded': preloaded}
+
+    def can_write(project_id):
+        return user.is_superuser or access.owns_project(project_id)
+
+    def validate(serializer, data):
+        # Validation élément par élément avec l'enfant du ListSerializer :
+        # les champs sont construits une seule fois pour tout le lot
+        try:
+            return serializer.child.run_validation(data), None
+        except serializers.ValidationError as exc:
+            return None, exc.detail
+
+    creator = BulkTaskSerializer(many=True, context=context)
+    create_results, to_create = [], []
+    for index, data in enumerate(creates):
+        validated, errors = validate(creator, data)
+        if errors is not None:
+            create_results.append({'index': index, 'status': 'error', 'errors': errors})
+        elif not can_write(validated['project'].pk):
+            create_results.append({'index': index, 'status': 'forbidden'})
+        else:
+            create_results.append({'index': index, 'status': 'created'})
+            to_create.append((create_results[-1], Task(**validated)))
+
+    updater = BulkTaskSerializer(many=True, partial=True, context=context)
+    # Une même tâche peut apparaître plusieurs fois : on garde son état initial
+    update_results, to_update, changed_fields = [], {}, set()
+    for index, data in enumerate(updates):
+        task = tasks.get(_as_id(data, 'id'))
+        if task is None:
+            update_results.append({'index': index, 'id': _as_id(data, 'id'), 'status': 'not_found'})
+            continue
+        # Même règle que TaskUpdateView : assigné, propriétaire du projet ou superuser
+        if task.assigned_to_id != user.pk and not can_write(task.project_id):
+            update_results.append({'index': index, 'id': task.pk, 'status': 'forbidden'})
+            continue
+        validated, errors = validate(updater, data)
+        if errors is not None:
+            update_results.append({'index': index, 'id': task.pk, 'status': 'error', 'errors': errors})
+            continue
+        target = validated.get('project')
+        if target is not None and target.pk != task.project_id and not can_write(target.pk):
+            update_results.append({'index': index, 'id': task.pk, 'status': 'forbidden'})
+            continue
+        to_update.setdefault(task.pk, (task.tracked_state(), task))
+        for field, value in validated.items():
+            setattr(task, field, value)
+            changed_fields.add(field)
+        update_results.append({'index': index, 'id': task.pk, 'status': 'updated'})
+
+    with transaction.atomic():
+        # Créations et changements de projet ou de statut : en fin de colonne
+        moved = [
+            task for previous, task in to_update.values()
+            if (previous['project_id'], previous['status']) != (task.project_id, task.status)
+        ]
+        if moved:
+            changed_fields.add('position')
+        if to_create or moved:
+            assign_positions([task for _, task in to_create] + moved)
+        created = Task.objects.bulk_create([task for _, task in to_create])
+        for (result, _), task in zip(to_create, created):
+            result['id'] = task.pk
+        if to_update:
+            # bulk_update ne déclenche pas auto_now
+            now = timezone.now()
+            for _, task in to_update.values():
+                task.updated_at = now
+            Task.objects.bulk_update([task for _, task in to_update.values()], sorted(changed_fields | {'updated_at'}), batch_size=1000)
+        apply_task_changes(
+            [(None, task.tracked_state()) for task in created] +
+            [(previous, task.tracked_state()) for previous, task in to_update.values()]
+        )
+        invalidate_tasks(
+            created + [task for _, task in to_update.values()],
+            [None] * len(created) + [previous for previous, _ in to_update.values()],
+        )
+        # bulk_update n'envoie pas de signaux : journal de synchronisation à la main
+        record_task_tombstones([
+            (task.pk, previous) for previous, task in to_update.values()
+            if visibility_may_shrink(previous, task.tracked_state())
+        ])
+        notify_tasks('created', created)
+        record_task_events(
+            [('created', task, None) for task in created] +
+            [('updated', task, previous) for previous, task in to_update.values()]
+        )
+        notify_tasks('saved', [task for _, task in to_update.values()], [previous for previous, _ in to_update.values()])
+
+    return {'create': create_results, 'update': update_results}
@@ -0,0 +1,137 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from config.cache import invalidate_all
+from projects.models import Project
+from users.models import CustomUser
+from .models import Task, ProjectTaskCounters, UserWorkloadCounters
+
+COUNTER_FIELDS = ('todo', 'in_progress', 'done', 'urgent')
+OPEN_STATUSES = ('todo', 'in_progress')
+
+# Agrégats utilisés pour (re)construire les compteurs depuis la table des tâches
+COUNTER_AGGREGATES = {
+    'todo': Count('pk', filter=Q(status='todo')),
+    'in_progress': Count('pk', filter=Q(status='in_progress')),
+    'done': Count('pk', filter=Q(status='done')),
+    'urgent': Count('pk', filter=Q(status__in=OPEN_STATUSES, due_date__isnull=False)),
+}
+
+
+def contribution(state):
+    """
+    Retourne la contribution d'une tâche (état suivi) à chaque compteur.
+    """
+    counts = dict.fromkeys(COUNTER_FIELDS, 0)
+    if state is None:
+        return counts
+    if state['status'] in counts:
+        counts[state['status']] = 1
+    if state['status'] in OPEN_STATUSES and state['due_date'] is not None:
+        counts['urgent'] = 1
+    return counts
+
+
+def apply_task_changes(changes):
+    """
+    Applique aux compteurs une liste de couples (ancien état, nouvel état).
+    Un état à None signifie que la tâche n'existait pas (création) ou
+    n'existe plus (suppression). Les deltas sont regroupés puis appliqués
+    avec des expressions F(), une requête UPDATE par ligne de compteurs.
+    """
+    project_deltas = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    user_deltas = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            for field, value in contribution(state).items():
+                if not value:
+                    continue
+                project_deltas[state['project_id']][field] += sign * value
+                if state['assigned_to_id'] is not None:
+                    user_deltas[state['assigned_to_id']][field] += sign * value
+
+    with transaction.atomic():
+        _apply_deltas(ProjectTaskCounters, project_deltas)
+        _apply_deltas(UserWorkloadCounters, user_deltas)
+
+
+def release_project_workload(project_ids):
+    """
+    Retire des charges des assignés les tâches de projets en cours de
+    suppression : un agrégat par assigné au lieu d'un delta par tâche (les
+    compteurs des projets partent en cascade). À appeler avant la
+    suppression des tâches ; retourne les assignés concernés.
+    """
+    rows = (
+        Task.objects.filter(project_id__in=project_ids, assigned_to__isnull=False)
+        .order_by().values('assigned_to_id').annotate(**COUNTER_AGGREGATES)
+    )
+    deltas = {row['assigned_to_id']: {field: -row[field] for field in COUNTER_FIELDS} for row in rows}
+    with transaction.atomic():
+        _apply_deltas(UserWorkloadCounters, deltas)
+    return set(deltas)
+
+
+def _apply_deltas(model, deltas):
+    for pk, delta in deltas.items():
+        updates = {field: F(field) + value for field, value in delta.items() if value}
+        if updates:
+            # Une ligne absente (suppression en cascade en cours, données non
+            # initialisées) est ignorée : rebuild_task_counters la réconcilie.
+            model.objects.filter(pk=pk).update(**updates)
+
+
+def compute_counters(group_by, ids=None):
+    """
+    Recalcule les compteurs depuis la table des tâches, groupés par
+    'project_id' ou 'assigned_to_id'.
+    """
+    tasks = Task.objects.exclude(**{f'{group_by}__isnull': True})
+    if ids is not None:
+        tasks = tasks.filter(**{f'{group_by}__in': ids})
+    rows = tasks.order_by().values(group_by).annotate(**COUNTER_AGGREGATES)
+    return {row[group_by]: {field: row[field] for field in COUNTER_FIELDS} for row in rows}
+
+
+def rebuild_counters(dry_run=False, batch_size=1000):
+    """
+    Compare les compteurs stockés aux valeurs recalculées et corrige les
+    écarts. Retourne le nombre de lignes en écart par table.
+    """
+    drift = {}
+    targets = (
+        (ProjectTaskCounters, 'project_id', Project.objects.values_list('pk', flat=True)),
+        (UserWorkloadCounters, 'user_id', CustomUser.objects.values_list('pk', flat=True)),
+    )
+    for model, key, owner_ids in targets:
+        group_by = 'project_id' if model is ProjectTaskCounters else 'assigned_to_id'
+        drift[model.__name__] = 0
+        owner_ids = list(owner_ids.order_by('pk'))
+        for start in range(0, len(owner_ids), batch_size):
+            batch = owner_ids[start:start + batch_size]
+            expected = compute_counters(group_by, batch)
+            stored = {row.pk: row for row in model.objects.filter(pk__in=batch)}
+            to_create, to_update = [], []
+            for pk in batch:
+                values = expected.get(pk, dict.fromkeys(COUNTER_FIELDS, 0))
+                row = stored.get(pk)
+                if row is None:
+                    to_create.append(model(**{key: pk}, **values))
+                elif any(getattr(row, field) != values[field] for field in COUNTER_FIELDS):
+                    for field in COUNTER_FIELDS:
+                        setattr(row, field, values[field])
+                    to_update.append(row)
+            drift[model.__name__] += len(to_create) + len(to_update)
+            if not dry_run:
+                with transaction.atomic():
+                    model.objects.bulk_create(to_create, ignore_conflicts=True)
+                    model.objects.bulk_update(to_update, COUNTER_FIELDS)
+    if not dry_run and any(drift.values()):
+        # Statistiques en cache calculées sur les compteurs faux
+        invalidate_all()
+    return drift
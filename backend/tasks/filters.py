@@ -0,0 +1,24 @@
+def filter_tasks(queryset, params, project_id=None):
+    """
+    Applique les filtres de la liste des tâches : projet (depuis l'URL ou
+    ?project=), ?status= et ?assigned_to=.
+    """
+    # Récupérer le projet_id depuis l'URL si la vue est appelée depuis l'URL du projet
+    if project_id:
+        queryset = queryset.filter(project_id=project_id)
+    else:
+        # Appliquer les filtres depuis les paramètres de requête
+        project_filter = params.get('project', None)
+        if project_filter:
+            queryset = queryset.filter(project_id=project_filter)
+
+    # Autres filtres
+    status_filter = params.get('status', None)
+    user_filter = params.get('assigned_to', None)
+
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    if user_filter:
+        queryset = queryset.filter(assigned_to=user_filter)
+
+    return queryset
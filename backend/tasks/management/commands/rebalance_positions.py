@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from tasks.positions import columns_to_rebalance, max_key_length, rebalance_column
+
+
+class Command(BaseCommand):
+    help = "Raccourcit les clés de position des colonnes du tableau devenues trop longues (tâche périodique)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-length', type=int, default=None,
+                            help="Longueur maximale tolérée (TASKS_POSITION_MAX_LENGTH par défaut)")
+        parser.add_argument('--dry-run', action='store_true', help="Lister les colonnes sans les modifier")
+
+    def handle(self, *args, **options):
+        max_length = options['max_length'] or max_key_length()
+        columns = list(columns_to_rebalance(max_length))
+        updated = 0
+        for project_id, status in columns:
+            if options['dry_run']:
+                self.stdout.write(f"projet {project_id} / {status}")
+            else:
+                updated += rebalance_column(project_id, status)
+        if options['dry_run']:
+            self.stdout.write(f"{len(columns)} colonne(s) à rééquilibrer (--dry-run)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(columns)} colonne(s) rééquilibrée(s), {updated} tâche(s) modifiée(s)"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tasks.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les compteurs de tâches (par projet et par utilisateur) et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Signaler les écarts sans les corriger")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drift = rebuild_counters(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        for table, count in drift.items():
+            self.stdout.write(f"{table} : {count} ligne(s) en écart")
+        if options['dry_run']:
+            self.stdout.write("Aucune modification (--dry-run)")
+        else:
+            self.stdout.write(self.style.SUCCESS("Compteurs réconciliés"))
@@ -0,0 +1,34 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.reminders import reminder_windows, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Envoie aux assignés un récapitulatif des tâches arrivant à échéance (à planifier chaque jour)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--windows', type=str, default=None,
+                            help="Fenêtres en jours, séparées par des virgules (TASKS_REMINDER_WINDOWS par défaut)")
+        parser.add_argument('--date', type=str, default=None, help="Date de référence AAAA-MM-JJ (aujourd'hui par défaut)")
+        parser.add_argument('--batch-size', type=int, default=100, help="Courriels envoyés par connexion")
+        parser.add_argument('--dry-run', action='store_true', help="Compter les rappels sans rien envoyer")
+
+    def handle(self, *args, **options):
+        try:
+            windows = sorted({int(value) for value in options['windows'].split(',')}) if options['windows'] else reminder_windows()
+            today = datetime.date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        messages, tasks = send_due_reminders(
+            today=today,
+            windows=windows,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{messages} récapitulatif(s), {tasks} tâche(s) (--dry-run)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{messages} récapitulatif(s) envoyé(s) pour {tasks} tâche(s)"))
@@ -0,0 +1,27 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .activity import abuffered_activity, buffered_activity
+
+
+class TaskActivityMiddleware:
+    """
+    Regroupe les événements du journal d'activité produits pendant la
+    requête et les écrit en une seule requête à la fin.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with buffered_activity(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with abuffered_activity(request):
+            return await self.get_response(request)
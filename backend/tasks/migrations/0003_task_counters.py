@@ -0,0 +1,77 @@
+# Generated by Django 5.1.5 on 2026-10-17 23:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    # Initialiser les compteurs à partir des tâches existantes
+    from django.db.models import Count, Q
+
+    Task = apps.get_model('tasks', 'Task')
+    Project = apps.get_model('projects', 'Project')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    ProjectTaskCounters = apps.get_model('tasks', 'ProjectTaskCounters')
+    UserWorkloadCounters = apps.get_model('tasks', 'UserWorkloadCounters')
+    aggregates = {
+        'todo': Count('pk', filter=Q(status='todo')),
+        'in_progress': Count('pk', filter=Q(status='in_progress')),
+        'done': Count('pk', filter=Q(status='done')),
+        'urgent': Count('pk', filter=Q(status__in=['todo', 'in_progress'], due_date__isnull=False)),
+    }
+
+    for counters_model, key, owners, group_by in (
+        (ProjectTaskCounters, 'project_id', Project.objects.all(), 'project_id'),
+        (UserWorkloadCounters, 'user_id', User.objects.all(), 'assigned_to_id'),
+    ):
+        counts = {
+            row[group_by]: row
+            for row in Task.objects.exclude(**{group_by: None}).order_by().values(group_by).annotate(**aggregates)
+        }
+        counters_model.objects.bulk_create(
+            [
+                counters_model(**{key: pk}, **{field: counts.get(pk, {}).get(field, 0) for field in aggregates})
+                for pk in owners.values_list('pk', flat=True).iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_status'),
+        ('tasks', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectTaskCounters',
+            fields=[
+                ('todo', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('urgent', models.IntegerField(default=0)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counters', serialize=False, to='projects.project')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserWorkloadCounters',
+            fields=[
+                ('todo', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('urgent', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload_counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
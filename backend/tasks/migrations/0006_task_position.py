@@ -0,0 +1,73 @@
+# Generated by Django 5.1.5 on 2026-10-17 23:38
+
+from itertools import groupby
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def use_binary_collation(apps, schema_editor):
+    # Les clés de position se comparent octet par octet : collation "C" sur
+    # PostgreSQL (SQLite compare déjà en binaire)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE tasks_task ALTER COLUMN position TYPE varchar(255) COLLATE "C";')
+
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def spread_keys(count):
+    # Copie figée de tasks.positions.spread_keys à la date de la migration :
+    # le code de l'application peut évoluer, les données initiales non
+    width = 1
+    while len(DIGITS) ** width < (count + 1) * len(DIGITS):
+        width += 1
+    step = len(DIGITS) ** width // (count + 1)
+    keys = []
+    for index in range(1, count + 1):
+        value, digits = index * step, []
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip(DIGITS[0]))
+    return keys
+
+
+def backfill_positions(apps, schema_editor):
+    # Ordre initial de chaque colonne (projet, statut) : ordre de création
+    Task = apps.get_model('tasks', 'Task')
+    rows = Task.objects.order_by('project_id', 'status', 'created_at', 'id').values_list('pk', 'project_id', 'status')
+    for _, column in groupby(rows.iterator(chunk_size=2000), key=lambda row: row[1:]):
+        pks = [row[0] for row in column]
+        Task.objects.bulk_update(
+            [Task(pk=pk, position=key) for pk, key in zip(pks, spread_keys(len(pks)))],
+            ['position'],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_project_status_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(use_binary_collation, migrations.RunPython.noop),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+        # Remplace (project, status) : même préfixe, plus l'ordre du tableau
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'position'], name='task_board_position_idx'),
+        ),
+    ]
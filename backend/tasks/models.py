@@ -1,7 +1,10 @@
 from pyclbr import Class
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
 from projects.models import Project
 from users.models import CustomUser
+from .positions import key_after, lock_board
 
 # Create your models here.
 
@@ -11,6 +14,9 @@ class Task(models.Model):
         ('in_progress', 'En cours'),
         ('done', 'Fait'),
     ]
+    # Champs suivis : compteurs dénormalisés et journal d'activité
+    TRACKED_FIELDS = ('project_id', 'assigned_to_id', 'status', 'due_date', 'position')
+
     title = models.CharField(max_length=100)
     description = models.TextField()
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
@@ -19,6 +25,165 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateField(null=True, blank=True)
-    
+    # Ordre dans la colonne (projet, statut) du tableau : clé fractionnaire (voir tasks.positions).
+    # Collation "C" posée à la main par la migration 0006 sur PostgreSQL (pas de
+    # db_collation : SQLite ne connaît pas "C") ; la recréer si la colonne change.
+    position = models.CharField(max_length=255, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Tri de la pagination par curseur
+            models.Index(fields=['-updated_at', '-id'], name='task_updated_id_idx'),
+            # Combinaisons de filtres de la liste des tâches
+            # Filtres projet / statut et ordre du tableau
+            models.Index(fields=['project', 'status', 'position'], name='task_board_position_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            # Tâches ouvertes avec une date limite (statistique "urgent", rappels)
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_idx',
+                condition=models.Q(status__in=['todo', 'in_progress'], due_date__isnull=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Mémoriser l'état chargé pour calculer les deltas des compteurs sans relire la ligne
+        if all(field in field_names for field in cls.TRACKED_FIELDS):
+            instance._loaded_state = instance.tracked_state()
+        return instance
+
+    def tracked_state(self):
+        return {field: getattr(self, field) for field in self.TRACKED_FIELDS}
+
+    def changes_column(self):
+        """
+        Vrai si la tâche change de colonne (projet ou statut) sans position
+        choisie (modification hors TaskMoveView) : elle va en fin de colonne.
+        """
+        if self._state.adding:
+            return False
+        loaded = getattr(self, '_loaded_state', None)
+        if loaded is None:
+            # Instance construite à la main : relire l'état enregistré (repris par le signal pre_save)
+            loaded = Task.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first()
+            self._loaded_state = loaded
+        return (
+            loaded is not None and loaded['position'] == self.position and
+            (loaded['project_id'], loaded['status']) != (self.project_id, self.status)
+        )
+
+    def save(self, *args, **kwargs):
+        # Les compteurs sont mis à jour par le signal post_save : même transaction que la ligne
+        with transaction.atomic(using=kwargs.get('using')):
+            if (self._state.adding and not self.position) or self.changes_column():
+                # Nouvelle tâche ou changement de colonne : en fin de colonne
+                lock_board(self.project_id)
+                self.position = key_after(
+                    Task.objects.filter(project_id=self.project_id, status=self.status)
+                    .aggregate(last=models.Max('position'))['last']
+                )
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'position'}
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.title
+
+
+class TaskCounters(models.Model):
+    todo = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    urgent = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def as_statistics(self):
+        return {
+            'todo': self.todo,
+            'in_progress': self.in_progress,
+            'done': self.done,
+            'total': self.todo + self.in_progress + self.done,
+            'urgent': self.urgent,
+        }
+
+
+class ProjectTaskCounters(TaskCounters):
+    """
+    Compteurs des tâches d'un projet, tenus à jour à chaque écriture de Task.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='task_counters')
+
+    def __str__(self):
+        return f"Compteurs {self.project_id}"
+
+
+class UserWorkloadCounters(TaskCounters):
+    """
+    Compteurs des tâches assignées à un utilisateur.
+    """
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='workload_counters')
+
+    def __str__(self):
+        return f"Charge {self.user_id}"
+
+
+class TaskEvent(models.Model):
+    """
+    Journal d'activité des tâches, en ajout seul : création, suppression et
+    modification des champs suivis (statut, assigné, projet, échéance,
+    position), avec l'auteur de la modification.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Création'),
+        ('updated', 'Modification'),
+        ('deleted', 'Suppression'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_events')
+    # Pas de clé étrangère : l'historique survit à la suppression de la tâche
+    task_id = models.PositiveBigIntegerField()
+    task_title = models.CharField(max_length=100)
+    actor = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # {"champ": [ancienne valeur, nouvelle valeur]}
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Fil d'activité d'un projet (pagination par curseur, du plus récent au plus ancien)
+            models.Index(fields=['project', '-created_at', '-id'], name='task_event_feed_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Le journal d'activité est en ajout seul")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.task_title}"
+
+
+class TaskReminder(models.Model):
+    """
+    Rappel d'échéance envoyé : une ligne par tâche, fenêtre et échéance.
+    Relancer le planificateur n'envoie pas deux fois le même rappel ; une
+    échéance modifiée donne lieu à de nouveaux rappels.
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
+    # Fenêtre en jours avant l'échéance (voir TASKS_REMINDER_WINDOWS)
+    window = models.PositiveSmallIntegerField()
+    due_date = models.DateField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'window', 'due_date'], name='task_reminder_unique'),
+        ]
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.task_id} J-{self.window}"
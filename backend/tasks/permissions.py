@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from projects.permissions import get_project_access
 
 class IsProjectOwnerorReadOnly(permissions.BasePermission):
     #permission qui permet d'acceder a une tache seulement si l'utilisateur est le proprietaire de la tache ou si l'utilisateur est un admin
@@ -7,7 +8,12 @@ class IsProjectOwnerorReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         #autoriser l'ecrire seulement pour l'utilisateur proprietaire ou si l'utilisateur est un admin
-        return obj.project.owner == request.user or request.user.is_superuser
+        return get_project_access(request).owns_project(obj.project_id) or request.user.is_superuser
+
+    async def ahas_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return request.user.is_superuser or await get_project_access(request).aowns_project(obj.project_id)
 
 class IsTaskAssignedorReadOnly(permissions.BasePermission):
     #permission qui permet à l'utilisateur assigné à une tache de la modifier les autres utilisateurs peuvent la lire seulement
@@ -16,5 +22,14 @@ class IsTaskAssignedorReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         #Autoriser la modification uniquement pour l'utilisateur assigné à la tache
-        return obj.assigned_to == request.user or obj.project.owner == request.user or request.user.is_superuser
-   
\ No newline at end of file
+        #(comparaison des identifiants : ni l'utilisateur assigné ni le projet ne sont chargés)
+        if request.user.pk is not None and obj.assigned_to_id == request.user.pk:
+            return True
+        return get_project_access(request).owns_project(obj.project_id) or request.user.is_superuser
+
+    async def ahas_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        if request.user.pk is not None and obj.assigned_to_id == request.user.pk:
+            return True
+        return request.user.is_superuser or await get_project_access(request).aowns_project(obj.project_id)
@@ -0,0 +1,168 @@
+"""
+Clés de position fractionnaires pour l'ordre des tâches d'un tableau.
+
+Une clé est une fraction de ]0, 1[ écrite en base 36 (chiffres puis lettres
+minuscules), sans zéro final : l'ordre lexicographique des clés est alors
+leur ordre numérique, et entre deux clés il en existe toujours une autre.
+Déplacer une tâche ne modifie donc que sa propre ligne ; les clés
+s'allongent avec les insertions répétées au même endroit, d'où le
+rééquilibrage périodique (commande rebalance_positions).
+"""
+from django.conf import settings
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+DEFAULT_MAX_LENGTH = 24
+
+
+def max_key_length():
+    """
+    Longueur au-delà de laquelle une colonne doit être rééquilibrée.
+    """
+    return getattr(settings, 'TASKS_POSITION_MAX_LENGTH', DEFAULT_MAX_LENGTH)
+
+
+def _validate(key):
+    if not key or key.endswith(DIGITS[0]) or any(char not in DIGITS for char in key):
+        raise ValueError(f"Clé de position invalide : {key!r}")
+
+
+def _midpoint(a, b):
+    """
+    Clé strictement entre a et b ('' : 0 ; None : 1), a < b.
+    """
+    if b is not None:
+        # Préfixe commun : on le garde et on cherche le milieu de la suite
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    # Chiffres consécutifs
+    if b and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def key_after(key):
+    """
+    Clé courte placée après `key` (ajout en fin de colonne) : on incrémente
+    le dernier chiffre qui n'est pas le plus grand.
+    """
+    if not key:
+        return _midpoint('', None)
+    _validate(key)
+    head = key.rstrip(DIGITS[-1])
+    if head:
+        return head[:-1] + DIGITS[DIGITS.index(head[-1]) + 1]
+    return key + _midpoint('', None)
+
+
+def key_between(before, after):
+    """
+    Clé strictement entre `before` et `after` ; None pour un bord de colonne.
+    """
+    if before:
+        _validate(before)
+    if after:
+        _validate(after)
+        if before and before >= after:
+            raise ValueError(f"Clés dans le désordre : {before!r} >= {after!r}")
+        return _midpoint(before or '', after)
+    return key_after(before)
+
+
+def spread_keys(count):
+    """
+    `count` clés courtes régulièrement espacées (rééquilibrage, données
+    initiales) : place libre avant, après et entre chaque clé.
+    """
+    width = 1
+    while len(DIGITS) ** width < (count + 1) * len(DIGITS):
+        width += 1
+    step = len(DIGITS) ** width // (count + 1)
+    keys = []
+    for index in range(1, count + 1):
+        value, digits = index * step, []
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip(DIGITS[0]))
+    return keys
+
+
+def lock_board(*project_ids):
+    """
+    Sérialise les écritures de positions d'un même projet (à appeler dans
+    une transaction) : deux déplacements simultanés entre les mêmes voisines
+    produiraient la même clé.
+    """
+    from projects.models import Project
+
+    # Ordre des identifiants fixe : pas d'interblocage entre deux lots
+    list(Project.objects.select_for_update().filter(pk__in=project_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def assign_positions(tasks):
+    """
+    Place des tâches nouvelles (bulk_create) ou changées de colonne
+    (bulk_update) en fin de leur colonne, dans l'ordre de la liste : une
+    requête pour toutes les colonnes concernées.
+    """
+    from django.db.models import Max
+    from .models import Task
+
+    project_ids = {task.project_id for task in tasks}
+    lock_board(*project_ids)
+    last = {
+        (project_id, status): position
+        for project_id, status, position in Task.objects.filter(project_id__in=project_ids)
+        .order_by().values('project_id', 'status').annotate(last=Max('position'))
+        .values_list('project_id', 'status', 'last')
+    }
+    for task in tasks:
+        column = (task.project_id, task.status)
+        task.position = last[column] = key_after(last.get(column))
+
+
+def rebalance_column(project_id, status, batch_size=1000):
+    """
+    Réécrit les clés d'une colonne avec des clés courtes, sans changer
+    l'ordre. Retourne le nombre de tâches modifiées.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import Task
+
+    with transaction.atomic():
+        lock_board(project_id)
+        tasks = list(
+            Task.objects.filter(project_id=project_id, status=status)
+            .order_by('position', 'pk').only('pk', 'position')
+        )
+        now = timezone.now()
+        changed = []
+        for task, key in zip(tasks, spread_keys(len(tasks))):
+            if task.position != key:
+                # bulk_update ne déclenche pas auto_now
+                task.position, task.updated_at = key, now
+                changed.append(task)
+        Task.objects.bulk_update(changed, ['position', 'updated_at'], batch_size=batch_size)
+    return len(changed)
+
+
+def columns_to_rebalance(max_length=None):
+    """
+    Colonnes (project_id, status) dont une clé dépasse la longueur maximale.
+    """
+    from django.db.models.functions import Length
+    from .models import Task
+
+    return (
+        Task.objects.annotate(key_length=Length('position'))
+        .filter(key_length__gt=max_length or max_key_length())
+        .order_by().values_list('project_id', 'status').distinct()
+    )
@@ -0,0 +1,109 @@
+import datetime
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Task, TaskReminder
+from .statistics import OPEN_STATUSES
+
+DEFAULT_WINDOWS = (7, 1, 0)
+
+
+def reminder_windows():
+    return sorted(set(getattr(settings, 'TASKS_REMINDER_WINDOWS', DEFAULT_WINDOWS)))
+
+
+def window_for(due_date, today, windows):
+    """
+    Plus petite fenêtre contenant l'échéance : une tâche due dans 5 jours
+    relève de la fenêtre de 7 jours, puis de 1 jour, puis du jour même.
+    """
+    days = (due_date - today).days
+    return next(window for window in windows if days <= window)
+
+
+def pending_reminders(today, windows):
+    """
+    Tâches ouvertes et assignées dont l'échéance tombe dans une fenêtre pour
+    laquelle aucun rappel n'a été envoyé, groupées par assigné.
+
+    Le filtre d'échéance est un intervalle sur l'index partiel
+    task_open_due_idx ; le tri par assigné permet de constituer les
+    récapitulatifs au fil de la lecture (mémoire bornée).
+    """
+    bounds = [today - datetime.timedelta(days=1)] + [today + datetime.timedelta(days=window) for window in windows]
+    not_sent = Q()
+    for window, low, high in zip(windows, bounds, bounds[1:]):
+        not_sent |= Q(due_date__gt=low, due_date__lte=high) & ~Exists(
+            TaskReminder.objects.filter(task=OuterRef('pk'), window=window, due_date=OuterRef('due_date'))
+        )
+    return (
+        Task.objects.filter(
+            status__in=OPEN_STATUSES,
+            due_date__gte=today,
+            due_date__lte=bounds[-1],
+            assigned_to__isnull=False,
+        )
+        .filter(not_sent)
+        .exclude(assigned_to__email='')
+        .order_by('assigned_to_id', 'due_date', 'pk')
+        .values('pk', 'title', 'due_date', 'project__name', 'assigned_to_id',
+                'assigned_to__email', 'assigned_to__first_name', 'assigned_to__username')
+    )
+
+
+def digest_message(rows):
+    """
+    Un courriel récapitulatif pour les tâches d'un même assigné.
+    """
+    first = rows[0]
+    name = first['assigned_to__first_name'] or first['assigned_to__username']
+    lines = [f"Bonjour {name},", "", "Les tâches suivantes arrivent à échéance :", ""]
+    lines += [f"- {row['title']} ({row['project__name']}) : {row['due_date']:%d/%m/%Y}" for row in rows]
+    return EmailMessage(
+        subject=f"Rappel : {len(rows)} tâche(s) à échéance",
+        body='\n'.join(lines),
+        to=[first['assigned_to__email']],
+    )
+
+
+def send_due_reminders(today=None, windows=None, batch_size=100, chunk_size=2000, dry_run=False):
+    """
+    Envoie les récapitulatifs par lots de `batch_size` courriels (une
+    connexion au backend EMAIL_BACKEND par lot) et enregistre les rappels
+    de chaque lot une fois celui-ci envoyé : une relance reprend là où la
+    précédente s'est arrêtée. Retourne (courriels, tâches).
+    """
+    today = today or timezone.localdate()
+    windows = windows or reminder_windows()
+    rows = pending_reminders(today, windows).iterator(chunk_size=chunk_size)
+    messages, reminders = [], []
+    totals = [0, 0]
+
+    def flush():
+        if not messages:
+            return
+        if not dry_run:
+            get_connection().send_messages(messages)
+            with transaction.atomic():
+                TaskReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+        totals[0] += len(messages)
+        totals[1] += len(reminders)
+        messages.clear()
+        reminders.clear()
+
+    for _, group in groupby(rows, key=lambda row: row['assigned_to_id']):
+        group = list(group)
+        messages.append(digest_message(group))
+        reminders.extend(
+            TaskReminder(task_id=row['pk'], window=window_for(row['due_date'], today, windows), due_date=row['due_date'])
+            for row in group
+        )
+        if len(messages) >= batch_size:
+            flush()
+    flush()
+    return tuple(totals)
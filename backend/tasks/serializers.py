@@ -1,8 +1,25 @@
 from rest_framework import serializers
-from .models import Task
+from users.serializers import UserCompactSerializer
+from .models import Task, TaskEvent
 
 
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = '__all__'
+
+
+class TaskMoveSerializer(serializers.Serializer):
+    # Nouvelle colonne (statut) et voisines dans cette colonne ; sans voisine : fin de colonne
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    after = serializers.IntegerField(required=False, allow_null=True, help_text="Tâche placée juste au-dessus")
+    before = serializers.IntegerField(required=False, allow_null=True, help_text="Tâche placée juste en dessous")
+
+
+class TaskEventSerializer(serializers.ModelSerializer):
+    task = serializers.IntegerField(source='task_id', read_only=True)
+    actor = UserCompactSerializer(read_only=True)
+
+    class Meta:
+        model = TaskEvent
+        fields = ['id', 'task', 'task_title', 'actor', 'action', 'changes', 'created_at']
@@ -0,0 +1,129 @@
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from config.cache import invalidate_on_commit
+
+from projects.models import Project
+from projects.cache import invalidate_tasks
+from projects.events import notify_tasks
+from projects.sync import record_task_tombstones
+from users.models import CustomUser
+from .models import Task, ProjectTaskCounters, UserWorkloadCounters
+from .counters import apply_task_changes, release_project_workload
+from .activity import record_task_events
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_state = None
+        return
+    previous = getattr(instance, '_loaded_state', None)
+    if previous is None:
+        # Instance construite à la main : relire l'état enregistré
+        previous = Task.objects.filter(pk=instance.pk).values(*Task.TRACKED_FIELDS).first()
+    instance._previous_state = previous
+
+
+@receiver(post_save, sender=Task)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_state = instance.tracked_state()
+    previous = None if created else getattr(instance, '_previous_state', None)
+    if previous != new_state:
+        apply_task_changes([(previous, new_state)])
+        invalidate_tasks([instance], [previous])
+    instance._loaded_state = new_state
+    if visibility_may_shrink(previous, new_state):
+        # Pour l'audience précédente ; celle qui la voit encore est écartée à la lecture
+        record_task_tombstones([(instance.pk, previous)])
+    notify_tasks('created' if created else 'saved', [instance], [previous])
+    record_task_events([('created' if created else 'updated', instance, previous)])
+
+
+def visibility_may_shrink(previous, new_state):
+    # Changement de projet ou d'assigné : la tâche peut disparaître pour certains utilisateurs
+    return previous is not None and (
+        previous['project_id'] != new_state['project_id'] or
+        previous['assigned_to_id'] != new_state['assigned_to_id']
+    )
+
+
+def deleted_project_ids(origin):
+    """
+    Projets supprimés par le delete() en cours, déduits de `origin` (objet ou
+    queryset sur lequel il a été appelé) et calculés une fois par suppression.
+    Les tâches d'un projet supprimé reçoivent leur pre_delete avant celui du
+    projet : il ne peut pas se signaler lui-même.
+    """
+    if origin is None:
+        return frozenset()
+    project_ids = getattr(origin, '_deleted_project_ids', None)
+    if project_ids is not None:
+        return project_ids
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if model is Project:
+        project_ids = {origin.pk} if isinstance(origin, Project) else set(origin.values_list('pk', flat=True))
+    elif model is CustomUser:
+        # Les projets d'un utilisateur supprimé partent avec lui
+        owners = [origin.pk] if isinstance(origin, CustomUser) else origin.values('pk')
+        project_ids = set(Project.objects.filter(owner__in=owners).values_list('pk', flat=True))
+    else:
+        project_ids = frozenset()
+    origin._deleted_project_ids = project_ids
+    return project_ids
+
+
+def deleted_with_project(task, origin):
+    return task.project_id in deleted_project_ids(origin)
+
+
+@receiver(pre_delete, sender=Project)
+def release_project_tasks(sender, instance, origin=None, **kwargs):
+    """
+    Suppression d'un projet : ses tâches sont traitées en bloc ici (charges
+    des assignés, caches) plutôt que tâche par tâche dans les signaux de
+    Task, ignorés pendant la cascade. Les tâches sont encore en base. Le
+    tombstone du projet couvre ses tâches (projects.sync) et le journal
+    d'activité part avec lui.
+    """
+    # Calculé tant que les projets existent : les post_delete suivent les DELETE
+    deleted_project_ids(origin)
+    assignees = release_project_workload([instance.pk])
+    # Propriétaire et membres : invalidés avec le projet
+    invalidate_on_commit(assignees)
+
+
+@receiver(pre_delete, sender=Task)
+def notify_task_deleted(sender, instance, origin=None, **kwargs):
+    # L'événement du projet supprimé vaut pour ses tâches (notify_deleted_projects)
+    if deleted_with_project(instance, origin):
+        return
+    # Avant la suppression : le projet et ses membres sont encore en base
+    notify_tasks('deleted', [instance])
+
+
+@receiver(post_delete, sender=Task)
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    # Traitée en bloc par release_project_tasks
+    if deleted_with_project(instance, origin):
+        return
+    state = getattr(instance, '_loaded_state', None) or instance.tracked_state()
+    apply_task_changes([(state, None)])
+    invalidate_tasks([instance])
+    record_task_tombstones([(instance.pk, state)], superusers=True)
+    record_task_events([('deleted', instance, state)])
+
+
+@receiver(post_save, sender=Project)
+def create_project_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ProjectTaskCounters.objects.bulk_create([ProjectTaskCounters(project=instance)], ignore_conflicts=True)
+
+
+@receiver(post_save, sender=CustomUser)
+def create_user_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserWorkloadCounters.objects.bulk_create([UserWorkloadCounters(user=instance)], ignore_conflicts=True)
@@ -0,0 +1,91 @@
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Task, ProjectTaskCounters, UserWorkloadCounters
+
+OPEN_STATUSES = ['todo', 'in_progress']
+
+
+def compute_task_statistics(user, project_id=None):
+    """
+    Retourne les statistiques des tâches visibles par l'utilisateur en
+    lisant les compteurs dénormalisés. Le cas « étudiant + projet » n'a pas
+    de compteur dédié et reste calculé par agrégation.
+    """
+    # Pour un enseignant : somme des compteurs de ses projets
+    if user.is_staff or user.is_superuser:
+        sums = teacher_counters(user, project_id).aggregate(**counter_sums())
+        return ProjectTaskCounters(**sums).as_statistics()
+
+    # Pour un étudiant : compteurs des tâches qui lui sont assignées
+    if not project_id:
+        counters = UserWorkloadCounters.objects.filter(user=user).first()
+        if counters is not None:
+            return counters.as_statistics()
+
+    return aggregate_task_statistics(user, project_id)
+
+
+async def acompute_task_statistics(user, project_id=None):
+    """
+    compute_task_statistics() avec l'ORM asynchrone.
+    """
+    if user.is_staff or user.is_superuser:
+        sums = await teacher_counters(user, project_id).aaggregate(**counter_sums())
+        return ProjectTaskCounters(**sums).as_statistics()
+
+    if not project_id:
+        counters = await UserWorkloadCounters.objects.filter(user=user).afirst()
+        if counters is not None:
+            return counters.as_statistics()
+
+    tasks, aggregates = task_statistics_query(user, project_id)
+    return await tasks.aaggregate(**aggregates)
+
+
+def teacher_counters(user, project_id=None):
+    counters = ProjectTaskCounters.objects.filter(project__owner=user)
+    if project_id:
+        counters = counters.filter(project_id=project_id)
+    return counters
+
+
+def counter_sums():
+    return {
+        field: Coalesce(Sum(field), Value(0))
+        for field in ('todo', 'in_progress', 'done', 'urgent')
+    }
+
+
+def aggregate_task_statistics(user, project_id=None):
+    """
+    Calcule les statistiques des tâches visibles par l'utilisateur en une
+    seule requête d'agrégation conditionnelle.
+    """
+    tasks, aggregates = task_statistics_query(user, project_id)
+    return tasks.aggregate(**aggregates)
+
+
+def task_statistics_query(user, project_id=None):
+    """
+    Tâches comptées et agrégats de aggregate_task_statistics().
+    """
+    tasks = Task.objects.all()
+
+    # Filtrer par projet si spécifié
+    if project_id:
+        tasks = tasks.filter(project_id=project_id)
+
+    # Pour un étudiant : tâches qui lui sont assignées
+    if not user.is_staff and not user.is_superuser:
+        tasks = tasks.filter(assigned_to=user)
+    # Pour un enseignant : toutes les tâches de ses projets
+    else:
+        tasks = tasks.filter(project__owner=user)
+
+    return tasks, dict(
+        todo=Count('pk', filter=Q(status='todo')),
+        in_progress=Count('pk', filter=Q(status='in_progress')),
+        done=Count('pk', filter=Q(status='done')),
+        total=Count('pk'),
+        urgent=Count('pk', filter=Q(status__in=OPEN_STATUSES, due_date__isnull=False)),
+    )
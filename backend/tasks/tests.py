@@ -1,3 +1,615 @@
-from django.test import TestCase
+import csv
+import datetime
+import json
+from io import StringIO
 
-# Create your tests here.
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.authentication import ClaimsRefreshToken
+from config.testing import assert_within_view_budget
+from projects.models import Project, Tombstone
+from users.models import CustomUser
+from .models import Task, TaskEvent, TaskReminder, ProjectTaskCounters, UserWorkloadCounters
+from .filters import filter_tasks
+from .positions import key_between, spread_keys
+
+
+class TaskStatisticsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', role='teacher', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='', owner=self.teacher, status='in_progress')
+        self.other_project = Project.objects.create(name='Q', description='', owner=self.teacher, status='in_progress')
+        due = datetime.date.today()
+
+        Task.objects.create(title='t1', description='', project=self.project, assigned_to=self.student, status='todo', due_date=due)
+        Task.objects.create(title='t2', description='', project=self.project, assigned_to=self.student, status='in_progress')
+        Task.objects.create(title='t3', description='', project=self.project, status='done', due_date=due)
+        Task.objects.create(title='t4', description='', project=self.other_project, assigned_to=self.student, status='done')
+
+    def test_teacher_statistics_single_query(self):
+        self.client.force_authenticate(self.teacher)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tasks:api_task_statistics'))
+        self.assertEqual(response.json(), {'todo': 1, 'in_progress': 1, 'done': 2, 'total': 4, 'urgent': 1})
+
+    def test_student_statistics_filtered_by_project(self):
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tasks:api_task_statistics'), {'project_id': self.project.pk})
+        self.assertEqual(response.json(), {'todo': 1, 'in_progress': 1, 'done': 0, 'total': 2, 'urgent': 1})
+
+    def test_student_statistics_from_counters(self):
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tasks:api_task_statistics'))
+        self.assertEqual(response.json(), {'todo': 1, 'in_progress': 1, 'done': 1, 'total': 3, 'urgent': 1})
+
+
+class TaskCountersTests(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.alice = CustomUser.objects.create_user(username='alice', password='x')
+        self.bob = CustomUser.objects.create_user(username='bob', password='x')
+        self.project = Project.objects.create(name='P', description='', owner=self.teacher)
+
+    def counters(self):
+        return (
+            ProjectTaskCounters.objects.get(project=self.project).as_statistics(),
+            UserWorkloadCounters.objects.get(user=self.alice).as_statistics(),
+            UserWorkloadCounters.objects.get(user=self.bob).as_statistics(),
+        )
+
+    def test_counters_follow_task_writes(self):
+        task = Task.objects.create(title='t', description='', project=self.project, assigned_to=self.alice, due_date=datetime.date.today())
+        project, alice, bob = self.counters()
+        self.assertEqual((project['todo'], project['urgent'], alice['todo'], bob['total']), (1, 1, 1, 0))
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'done'
+        task.assigned_to = self.bob
+        task.save()
+        project, alice, bob = self.counters()
+        self.assertEqual((project['done'], project['urgent'], alice['total'], bob['done']), (1, 0, 0, 1))
+
+        task.delete()
+        project, alice, bob = self.counters()
+        self.assertEqual((project['total'], bob['total']), (0, 0))
+
+    def test_rebuild_repairs_drift(self):
+        Task.objects.create(title='t', description='', project=self.project, assigned_to=self.alice)
+        ProjectTaskCounters.objects.filter(project=self.project).update(todo=42)
+        UserWorkloadCounters.objects.filter(user=self.bob).delete()
+
+        out = StringIO()
+        call_command('rebuild_task_counters', stdout=out)
+        project, alice, bob = self.counters()
+        self.assertEqual((project['todo'], alice['todo'], bob['total']), (1, 1, 0))
+        self.assertIn('ProjectTaskCounters : 1', out.getvalue())
+
+    def test_project_deletion_releases_workload(self):
+        Task.objects.create(title='t', description='', project=self.project, assigned_to=self.alice)
+        self.project.delete()
+        self.assertEqual(UserWorkloadCounters.objects.get(user=self.alice).as_statistics()['total'], 0)
+        self.assertFalse(ProjectTaskCounters.objects.exists())
+
+    def test_project_deletion_cost_does_not_grow_with_tasks(self):
+        def delete_project(task_count):
+            project = Project.objects.create(name='P', description='', owner=self.teacher, status='in_progress')
+            Task.objects.create(title='autre', description='', project=self.project, assigned_to=self.alice)
+            Task.objects.bulk_create([
+                Task(title=f't{index}', description='', project=project, position=f'a{index:04d}',
+                     assigned_to=(self.alice, self.bob)[index % 2], status=('todo', 'done')[index % 3 == 0])
+                for index in range(task_count)
+            ])
+            call_command('rebuild_task_counters', stdout=StringIO())
+            with CaptureQueriesContext(connection) as queries:
+                project.delete()
+            return len(queries)
+
+        self.assertEqual(delete_project(3), delete_project(40))
+        # Seules les tâches des autres projets restent comptées
+        _, alice, bob = self.counters()
+        self.assertEqual((alice['todo'], bob['total']), (2, 0))
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 2)
+
+    def test_owner_deletion_releases_workload_of_owned_projects(self):
+        Task.objects.create(title='t', description='', project=self.project, assigned_to=self.alice)
+        self.teacher.delete()
+        self.assertEqual(UserWorkloadCounters.objects.get(user=self.alice).as_statistics()['total'], 0)
+
+    def test_queryset_deletion_releases_workload(self):
+        Task.objects.create(title='t', description='', project=self.project, assigned_to=self.alice)
+        Project.objects.filter(pk=self.project.pk).delete()
+        self.assertEqual(UserWorkloadCounters.objects.get(user=self.alice).as_statistics()['total'], 0)
+
+
+class TaskFilterTests(TestCase):
+    def setUp(self):
+        teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='', owner=teacher)
+        other = Project.objects.create(name='Q', description='', owner=teacher)
+        self.mine = Task.objects.create(title='a', description='', project=self.project, assigned_to=self.student, status='in_progress')
+        self.open = Task.objects.create(title='b', description='', project=self.project, status='todo')
+        self.elsewhere = Task.objects.create(title='c', description='', project=other, assigned_to=self.student, status='in_progress')
+
+    def titles(self, params, project_id=None):
+        return sorted(filter_tasks(Task.objects.all(), QueryDict(params), project_id).values_list('title', flat=True))
+
+    def test_each_filter_and_their_combination(self):
+        self.assertEqual(self.titles(''), ['a', 'b', 'c'])
+        self.assertEqual(self.titles(f'project={self.project.pk}'), ['a', 'b'])
+        self.assertEqual(self.titles('status=in_progress'), ['a', 'c'])
+        self.assertEqual(self.titles(f'assigned_to={self.student.pk}'), ['a', 'c'])
+        self.assertEqual(self.titles(f'project={self.project.pk}&status=in_progress&assigned_to={self.student.pk}'), ['a'])
+        # Valeurs vides : filtre ignoré
+        self.assertEqual(self.titles('status=&assigned_to='), ['a', 'b', 'c'])
+
+    def test_project_from_url_takes_precedence(self):
+        other = self.elsewhere.project_id
+        self.assertEqual(self.titles(f'project={other}', project_id=self.project.pk), ['a', 'b'])
+
+
+class TaskListPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        project = Project.objects.create(name='P', description='', owner=self.teacher)
+        for index in range(5):
+            Task.objects.create(title=f't{index}', description='', project=project)
+        self.client.force_authenticate(self.teacher)
+
+    def test_list_is_not_paginated_without_cursor(self):
+        response = self.client.get(reverse('tasks:api_task_list'))
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_cursor_walks_every_task_once(self):
+        seen = []
+        url = reverse('tasks:api_task_list') + '?page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            seen.extend(task['id'] for task in page['results'])
+            url = page['next']
+        self.assertEqual(seen, list(Task.objects.order_by('-updated_at', '-id').values_list('id', flat=True)))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('tasks:api_task_list'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskPermissionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='', owner=self.teacher, status='in_progress')
+        self.task = Task.objects.create(title='t', description='', project=self.project)
+
+    def test_owner_updates_without_loading_project(self):
+        self.client.force_authenticate(self.teacher)
+        url = reverse('tasks:api_task_detail', args=[self.task.pk])
+        # Lecture de la tâche, propriétaire du projet (owner_id seul), mise à jour + compteurs
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(url, {'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('"users_customuser"' in query['sql'] for query in context.captured_queries))
+
+    def test_non_owner_cannot_create_task(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.post(
+            reverse('projects:project_tasks_create', args=[self.project.pk]),
+            {'title': 't', 'description': 'd', 'project': self.project.pk},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class TaskBulkTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.other = CustomUser.objects.create_user(username='collegue', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='', owner=self.teacher)
+        self.foreign = Project.objects.create(name='Q', description='', owner=self.other)
+        self.task = Task.objects.create(title='t', description='d', project=self.project)
+        self.url = reverse('tasks:api_task_bulk')
+        self.client.force_authenticate(self.teacher)
+
+    def test_bulk_create_and_update(self):
+        creates = [
+            {'title': f'n{index}', 'description': 'd', 'project': self.project.pk, 'assigned_to': self.student.pk}
+            for index in range(20)
+        ]
+        creates.append({'title': 'x', 'description': 'd', 'project': self.foreign.pk})
+        creates.append({'title': 'x', 'project': self.project.pk})
+        updates = [{'id': self.task.pk, 'status': 'done'}, {'id': 999999, 'status': 'done'}]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {'create': creates, 'update': updates}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Nombre de requêtes indépendant du nombre d'opérations
+        self.assertLess(len(context.captured_queries), 15)
+
+        results = response.json()
+        self.assertEqual([item['status'] for item in results['create']].count('created'), 20)
+        self.assertEqual(results['create'][20]['status'], 'forbidden')
+        self.assertEqual(results['create'][21]['status'], 'error')
+        self.assertEqual([item['status'] for item in results['update']], ['updated', 'not_found'])
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'done')
+        self.assertEqual(UserWorkloadCounters.objects.get(user=self.student).todo, 20)
+        counters = ProjectTaskCounters.objects.get(project=self.project)
+        self.assertEqual((counters.todo, counters.done), (20, 1))
+
+    def test_operation_limit(self):
+        with self.settings(TASKS_BULK_MAX_OPERATIONS=1):
+            response = self.client.post(self.url, {'update': [{'id': 1}, {'id': 2}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        project = Project.objects.create(name='P', description='', owner=self.teacher)
+        Task.objects.create(title='a, "b"', description='d', project=project, status='done')
+        Task.objects.create(title='c', description='d', project=project, assigned_to=self.student)
+        Task.objects.create(title='autre', description='d', project=Project.objects.create(name='Q', description='', owner=self.student))
+        self.url = reverse('tasks:api_task_export')
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_honours_filters(self):
+        self.client.force_authenticate(self.teacher)
+        rows = list(csv.DictReader(StringIO(self.read(self.client.get(self.url, {'status': 'done'})))))
+        self.assertEqual([row['title'] for row in rows], ['a, "b"'])
+
+    def test_ndjson_export_only_visible_tasks(self):
+        self.client.force_authenticate(self.teacher)
+        lines = self.read(self.client.get(self.url, {'output': 'ndjson'}, HTTP_ACCEPT='application/x-ndjson')).splitlines()
+        self.assertEqual(sorted(json.loads(line)['title'] for line in lines), ['a, "b"', 'c'])
+
+    async def test_asgi_export_streams_asynchronously(self):
+        token = ClaimsRefreshToken.for_user(self.teacher).access_token
+        response = await self.async_client.get(self.url, {'status': 'done'}, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        # Itérateur asynchrone : Django n'a pas à lire tout l'export avant l'envoi
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual([row['title'] for row in csv.DictReader(StringIO(content))], ['a, "b"'])
+
+
+class TaskConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.project = Project.objects.create(name='P', description='d', owner=self.teacher)
+        self.task = Task.objects.create(title='a', description='d', project=self.project)
+        Task.objects.create(title='b', description='d', project=self.project)
+        self.client.force_authenticate(self.teacher)
+
+    def test_project_task_list_revalidation(self):
+        url = reverse('projects:project_tasks_list', args=[self.project.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Filtres différents : autre représentation, autre ETag
+        self.assertEqual(self.client.get(url, {'status': 'done'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.task.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_revalidation(self):
+        url = reverse('tasks:api_task_detail', args=[self.task.pk])
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        self.task.status = 'done'
+        self.task.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class TaskDeltaSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='d', owner=self.teacher)
+        self.mine = Task.objects.create(title='a', description='d', project=self.project, assigned_to=self.student)
+        self.done = Task.objects.create(title='b', description='d', project=self.project, status='done')
+        self.url = reverse('tasks:api_task_list')
+
+    def sync(self, user, cursor='', **params):
+        self.client.force_authenticate(user)
+        return self.client.get(self.url, {'since': cursor, **params}).json()
+
+    def test_reassignment_and_delete_become_tombstones(self):
+        first = self.sync(self.student)
+        self.assertEqual([row['id'] for row in first['results']], [self.mine.pk])
+
+        self.mine.assigned_to = self.teacher
+        self.mine.save()
+        delta = self.sync(self.student, first['cursor'])
+        self.assertEqual((delta['results'], delta['deleted']), ([], [self.mine.pk]))
+
+        done_id = self.done.pk
+        self.done.delete()
+        delta = self.sync(self.teacher, first['cursor'])
+        self.assertEqual([row['id'] for row in delta['results']], [self.mine.pk])
+        self.assertEqual(delta['deleted'], [done_id])
+
+    def test_row_leaving_filter_is_reported(self):
+        first = self.sync(self.teacher, status='done')
+        self.assertEqual([row['id'] for row in first['results']], [self.done.pk])
+
+        self.done.status = 'todo'
+        self.done.save()
+        delta = self.sync(self.teacher, first['cursor'], status='done')
+        # Fenêtre de recouvrement : d'autres identifiants inconnus du client peuvent figurer dans deleted
+        self.assertEqual(delta['results'], [])
+        self.assertIn(self.done.pk, delta['deleted'])
+
+    def test_tombstones_only_reach_users_who_saw_the_task(self):
+        outsider = CustomUser.objects.create_user(username='autre', password='x')
+        admin = CustomUser.objects.create_superuser(username='admin', password='x')
+        cursors = {user: self.sync(user)['cursor'] for user in (self.teacher, self.student, outsider, admin)}
+
+        done_id = self.done.pk
+        self.done.delete()
+        self.assertEqual(self.sync(outsider, cursors[outsider])['deleted'], [])
+        self.assertEqual(self.sync(admin, cursors[admin])['deleted'], [done_id])
+        self.assertEqual(self.sync(self.student, cursors[self.student])['deleted'], [])
+
+    def test_deleted_project_covers_its_tasks(self):
+        outsider = CustomUser.objects.create_user(username='autre', password='x')
+        cursors = {user: self.sync(user)['cursor'] for user in (self.teacher, self.student, outsider)}
+        task_ids = sorted([self.mine.pk, self.done.pk])
+
+        self.project.delete()
+        # Un seul tombstone par utilisateur concerné, aucun par tâche pour le propriétaire
+        self.assertFalse(Tombstone.objects.filter(kind='task', user=self.teacher).exists())
+        self.assertEqual(self.sync(self.teacher, cursors[self.teacher])['deleted'], task_ids)
+        # Assigné hors du projet : seulement sa tâche
+        self.assertEqual(self.sync(self.student, cursors[self.student])['deleted'], [self.mine.pk])
+        self.assertEqual(self.sync(outsider, cursors[outsider])['deleted'], [])
+
+
+class TaskPositionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.project = Project.objects.create(name='P', description='d', owner=self.teacher)
+        self.tasks = [Task.objects.create(title=str(index), description='d', project=self.project) for index in range(4)]
+        self.client.force_authenticate(self.teacher)
+
+    def board(self, status='todo'):
+        return list(Task.objects.filter(project=self.project, status=status).order_by('position', 'id').values_list('title', flat=True))
+
+    def move(self, task, **data):
+        return self.client.post(reverse('tasks:api_task_move', args=[task.pk]), data, format='json')
+
+    def test_keys_stay_ordered_between_any_neighbours(self):
+        keys = []
+        for index in range(500):
+            slot = (index * 7919) % (len(keys) + 1)
+            low = keys[slot - 1] if slot else None
+            high = keys[slot] if slot < len(keys) else None
+            key = key_between(low, high)
+            self.assertTrue((low is None or low < key) and (high is None or key < high))
+            keys.insert(slot, key)
+        self.assertEqual(spread_keys(3), sorted(spread_keys(3)))
+
+    def test_move_updates_only_the_moved_row(self):
+        first, second, third, fourth = self.tasks
+        self.assertEqual(self.board(), ['0', '1', '2', '3'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(fourth, after=first.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board(), ['0', '3', '1', '2'])
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+
+        self.move(first, before=third.pk)
+        self.assertEqual(self.board(), ['3', '1', '0', '2'])
+
+    def test_move_to_other_column_and_validation(self):
+        first, second = self.tasks[:2]
+        self.assertEqual(self.move(first, status='done').status_code, 200)
+        self.assertEqual(self.board('done'), ['0'])
+        self.assertEqual(ProjectTaskCounters.objects.get(project=self.project).done, 1)
+        # La voisine doit être dans la colonne de destination
+        self.assertEqual(self.move(second, status='done', after=self.tasks[2].pk).status_code, 400)
+
+    def test_status_change_outside_move_goes_to_end_of_column(self):
+        first, second, third, fourth = self.tasks
+        # Première clé de la colonne "done" : la même que celle de `first` dans "todo"
+        done = Task.objects.create(title='x', description='d', project=self.project, status='done')
+        self.client.patch(reverse('tasks:api_task_detail', args=[first.pk]), {'status': 'done'}, format='json')
+        self.client.post(reverse('tasks:api_task_bulk'), {'update': [{'id': second.pk, 'status': 'done'}]}, format='json')
+        third.refresh_from_db()
+        third.status = 'done'
+        third.save(update_fields=['status'])
+        self.assertEqual(self.board('done'), ['x', '0', '1', '2'])
+        keys = list(Task.objects.filter(status='done').values_list('position', flat=True))
+        self.assertEqual(len(set(keys)), 4)
+
+        # Une clé choisie par TaskMoveView n'est pas remplacée
+        self.move(fourth, status='done', after=done.pk)
+        self.assertEqual(self.board('done'), ['x', '3', '0', '1', '2'])
+
+    def test_rebalance_keeps_order(self):
+        first = self.tasks[0]
+        for _ in range(30):
+            self.move(self.tasks[3], before=first.pk)
+            self.move(first, before=self.tasks[3].pk)
+        self.assertGreater(max(len(key) for key in Task.objects.values_list('position', flat=True)), 4)
+        before = self.board()
+        call_command('rebalance_positions', max_length=4, stdout=StringIO())
+        self.assertEqual(self.board(), before)
+        self.assertLessEqual(max(len(key) for key in Task.objects.values_list('position', flat=True)), 4)
+
+
+class TaskActivityTests(TransactionTestCase):
+    # Transactions réelles : les événements ne sont retenus qu'après validation
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='d', owner=self.teacher)
+        self.task = Task.objects.create(title='t', description='d', project=self.project)
+        self.client.force_authenticate(self.teacher)
+
+    def event_inserts(self, queries):
+        return [query for query in queries if query['sql'].startswith('INSERT INTO "tasks_taskevent"')]
+
+    def test_update_records_actor_and_changes(self):
+        self.client.patch(reverse('tasks:api_task_detail', args=[self.task.pk]),
+                          {'status': 'done', 'assigned_to': self.student.pk}, format='json')
+        event = TaskEvent.objects.filter(action='updated').get()
+        self.assertEqual(event.actor, self.teacher)
+        self.assertEqual(event.changes, {'status': ['todo', 'done'], 'assigned_to': [None, self.student.pk]})
+
+        # Modification sans champ suivi : pas d'événement
+        self.client.patch(reverse('tasks:api_task_detail', args=[self.task.pk]), {'title': 'u'}, format='json')
+        self.assertEqual(TaskEvent.objects.filter(action='updated').count(), 1)
+
+    def test_drag_and_drop_logs_only_column_changes(self):
+        other = Task.objects.create(title='u', description='d', project=self.project)
+        move = reverse('tasks:api_task_move', args=[other.pk])
+        self.client.post(move, {'before': self.task.pk}, format='json')
+        self.assertFalse(TaskEvent.objects.filter(action='updated').exists())
+
+        self.client.post(move, {'status': 'done'}, format='json')
+        event = TaskEvent.objects.filter(action='updated').get()
+        self.assertEqual(event.changes, {'status': ['todo', 'done']})
+        self.assertNotIn('position', TaskEvent.objects.get(action='created', task_id=other.pk).changes)
+
+    def test_bulk_request_writes_events_once(self):
+        creates = [{'title': f'n{index}', 'description': 'd', 'project': self.project.pk} for index in range(10)]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('tasks:api_task_bulk'),
+                             {'create': creates, 'update': [{'id': self.task.pk, 'status': 'in_progress'}]}, format='json')
+        self.assertEqual(len(self.event_inserts(queries)), 1)
+        self.assertEqual(TaskEvent.objects.filter(actor=self.teacher).count(), 11)
+
+    def test_feed_is_paginated_and_scoped(self):
+        for status in ('in_progress', 'done', 'todo'):
+            self.task.status = status
+            self.task.save()
+        url = reverse('projects:project_activity', args=[self.project.pk])
+        page = self.client.get(url, {'page_size': 2}).json()
+        self.assertEqual([event['changes'].get('status') for event in page['results']], [['done', 'todo'], ['in_progress', 'done']])
+        page = self.client.get(page['next']).json()
+        self.assertEqual([event['action'] for event in page['results']], ['updated', 'created'])
+        self.assertIsNone(page['next'])
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class DueReminderTests(TestCase):
+    def setUp(self):
+        self.today = datetime.date(2025, 3, 10)
+        teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.alice = CustomUser.objects.create_user(username='alice', password='x', email='alice@example.com')
+        self.bob = CustomUser.objects.create_user(username='bob', password='x', email='bob@example.com')
+        project = Project.objects.create(name='P', description='d', owner=teacher)
+
+        def task(user, days, status='todo'):
+            return Task.objects.create(title=f'{user.username} J+{days}', description='d', project=project,
+                                       assigned_to=user, status=status, due_date=self.today + datetime.timedelta(days=days))
+
+        self.soon = task(self.alice, 1)
+        task(self.alice, 5)
+        task(self.bob, 0)
+        task(self.bob, 0, status='done')
+        task(self.bob, 30)
+        task(self.bob, -2)
+
+    def run_command(self, date):
+        call_command('send_due_reminders', date=date.isoformat(), stdout=StringIO())
+
+    def test_one_digest_per_assignee_and_idempotent_reruns(self):
+        self.run_command(self.today)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['alice@example.com', 'bob@example.com'])
+        alice = next(message for message in mail.outbox if message.to == ['alice@example.com'])
+        self.assertIn('2 tâche(s)', alice.subject)
+        self.assertEqual(TaskReminder.objects.count(), 3)
+
+        self.run_command(self.today)
+        self.assertEqual(len(mail.outbox), 2)
+
+        # Le lendemain, la tâche à J+1 entre dans la fenêtre du jour même
+        self.run_command(self.today + datetime.timedelta(days=1))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(list(TaskReminder.objects.filter(task=self.soon).values_list('window', flat=True).order_by('window')), [0, 1])
+
+    def test_changed_due_date_is_reminded_again(self):
+        self.run_command(self.today)
+        self.soon.due_date = self.today + datetime.timedelta(days=6)
+        self.soon.save()
+        self.run_command(self.today)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class TaskQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.student = CustomUser.objects.create_user(username='eleve', password='x')
+        self.project = Project.objects.create(name='P', description='d', owner=self.teacher, status='in_progress')
+        self.project.members.add(self.teacher, self.student)
+        self.tasks = [
+            Task.objects.create(title=f't{index}', description='d', project=self.project, assigned_to=self.student)
+            for index in range(3)
+        ]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_reads_within_budget(self):
+        for user in (self.teacher, self.student):
+            client = self.client_for(user)
+            for url in (
+                reverse('tasks:api_task_list'),
+                reverse('projects:project_tasks_list', args=[self.project.pk]),
+                reverse('tasks:api_task_detail', args=[self.tasks[0].pk]),
+                reverse('tasks:api_task_statistics'),
+                reverse('tasks:api_task_export'),
+                reverse('projects:project_activity', args=[self.project.pk]),
+            ):
+                assert_within_view_budget(client, 'get', url)
+            cursor = client.get(reverse('tasks:api_task_list'), {'since': ''}).json()['cursor']
+            assert_within_view_budget(client, 'get', reverse('tasks:api_task_list'), {'since': cursor})
+
+    def test_writes_within_budget(self):
+        teacher, student = self.client_for(self.teacher), self.client_for(self.student)
+        data = {'title': 'n', 'description': 'd', 'project': self.project.pk, 'assigned_to': self.student.pk}
+        for client, method, url, body in (
+            (teacher, 'post', reverse('projects:project_tasks_create', args=[self.project.pk]), data),
+            (teacher, 'post', reverse('tasks:api_task_list'), data),
+            (student, 'patch', reverse('tasks:api_task_update', args=[self.tasks[0].pk]), {'status': 'in_progress'}),
+            (teacher, 'patch', reverse('tasks:api_task_detail', args=[self.tasks[0].pk]), {'status': 'done'}),
+            (student, 'post', reverse('tasks:api_task_move', args=[self.tasks[1].pk]), {'status': 'done'}),
+            (student, 'delete', reverse('tasks:api_task_delete', args=[self.tasks[1].pk]), None),
+            (teacher, 'delete', reverse('tasks:api_task_detail', args=[self.tasks[2].pk]), None),
+            (teacher, 'post', reverse('tasks:api_task_bulk'), {'create': [data] * 20, 'update': [{'id': self.tasks[0].pk, 'status': 'todo'}]}),
+        ):
+            response = assert_within_view_budget(client, method, url, body, format='json')
+            self.assertLess(response.status_code, 300, (url, response.content))
@@ -12,11 +12,14 @@ urlpatterns = [
     # path('<int:task_id>/edit/', views.task_update, name='task_update'),
     # path('<int:task_id>/delete/', views.task_delete, name='task_delete'),
 
-    #Routes pour les API
-    path('', views.TasklistView.as_view(), name='api_task_list'),
-    path('statistics/', views.task_statistics, name='api_task_statistics'),
-    path('<int:pk>/', views.TaskDetailView.as_view(), name='api_task_detail'),
+    #Routes pour les API (GET asynchrones sous ASGI, voir config.async_views)
+    path('', views.task_list_api, name='api_task_list'),
+    path('statistics/', views.task_statistics_api, name='api_task_statistics'),
+    path('bulk/', views.TaskBulkView.as_view(), name='api_task_bulk'),
+    path('export/', views.TaskExportView.as_view(), name='api_task_export'),
+    path('<int:pk>/', views.task_detail_api, name='api_task_detail'),
     path('create/<int:project_id>/', views.TaskCreateView.as_view(), name='api_task_create'),
     path('<int:pk>/update/', views.TaskUpdateView.as_view(), name='api_task_update'),
+    path('<int:pk>/move/', views.TaskMoveView.as_view(), name='api_task_move'),
     path('<int:pk>/delete/', views.TaskDeleteView.as_view(), name='api_task_delete'),
 ]
\ No newline at end of file
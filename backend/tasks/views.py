@@ -1,18 +1,32 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Task
+from .models import Task, TaskEvent
 from .forms import TaskForm
 from projects.models import Project
-from users.models import CustomUser
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .serializers import TaskSerializer
+from .serializers import TaskSerializer, TaskMoveSerializer, TaskEventSerializer
+from .positions import key_between, lock_board, rebalance_column
 from .permissions import IsTaskAssignedorReadOnly, IsProjectOwnerorReadOnly
+from .statistics import acompute_task_statistics, compute_task_statistics
+from .filters import filter_tasks
+from .bulk import apply_bulk_operations, max_operations
 from rest_framework import generics, status
 from rest_framework import permissions
 from django.db import models
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Count, Q
+from rest_framework.views import APIView
+from config.pagination import CreatedAtKeysetPagination, UpdatedAtKeysetPagination
+from config.conditional import ConditionalGetMixin
+from config.exports import StreamingExportMixin, export_format, stream_export
+from config.instrumentation import query_budget
+from config.cache import acached_response, cached_response
+from config.async_views import async_read_view, json_response
+from projects.visibility import visible_projects, visible_tasks
+from projects.sync import DeltaSyncMixin
+from projects.permissions import get_project_access
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
 
 #vue normale
 
@@ -103,53 +117,42 @@ def task_delete(request, task_id):
 #Vue pour les api
 
 
-class TasklistView(generics.ListCreateAPIView):
+class TasklistView(DeltaSyncMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Pagination par curseur, activée uniquement si le client envoie ?cursor= ou ?page_size=
+    pagination_class = UpdatedAtKeysetPagination
+    # Synchronisation incrémentale via ?since=
+    sync_kind = 'task'
+    # Budget de requêtes SQL par méthode, authentification JWT comprise (config.instrumentation)
+    # (GET ?since= : lignes modifiées puis journal des suppressions)
+    query_budget = {'GET': 6, 'POST': 16}
+
+    def get_sync_scope(self):
+        # Tâches visibles (du projet de l'URL le cas échéant) sans ?status= ni ?assigned_to=
+        return filter_tasks(visible_tasks(self.request.user), {}, self.kwargs.get('project_id'))
     
     def get_queryset(self):
-        # Utiliser distinct() pour éviter les doublons
-        queryset = Task.objects.all().distinct()
-        
         # Si l'utilisateur n'est pas superuser, il ne voit que les tâches de ses projets
-        # ou les tâches qui lui sont assignées
-        if not self.request.user.is_superuser:
-            queryset = queryset.filter(
-                models.Q(project__owner=self.request.user) |
-                models.Q(assigned_to=self.request.user) |
-                models.Q(project__members=self.request.user)
-            ).distinct()
-
-        # Récupérer le projet_id depuis l'URL si la vue est appelée depuis l'URL du projet
-        project_id = self.kwargs.get('project_id')
-        if project_id:
-            queryset = queryset.filter(project_id=project_id)
-        else:
-            # Appliquer les filtres depuis les paramètres de requête
-            project_filter = self.request.query_params.get('project', None)
-            if project_filter:
-                queryset = queryset.filter(project_id=project_filter)
-                
-        # Autres filtres
-        status_filter = self.request.query_params.get('status', None)
-        user_filter = self.request.query_params.get('assigned_to', None)
-
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        if user_filter:
-            queryset = queryset.filter(assigned_to=user_filter)
-
-        return queryset.select_related('project', 'assigned_to')
+        # ou les tâches qui lui sont assignées (sous-requêtes EXISTS, pas de doublons)
+        queryset = visible_tasks(self.request.user)
+
+        queryset = filter_tasks(queryset, self.request.query_params, self.kwargs.get('project_id'))
+
+        # Ordre du tableau (index task_board_position_idx) ; la pagination impose son propre tri
+        return queryset.select_related('project', 'assigned_to').order_by('project_id', 'status', 'position', 'id')
 #Afficher, modifier, supprimer une tâche
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsTaskAssignedorReadOnly]
+    query_budget = {'GET': 2, 'PUT': 14, 'PATCH': 14, 'DELETE': 16}
     
 #Creer une tache 
 class TaskCreateView(generics.CreateAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsProjectOwnerorReadOnly]
+    query_budget = {'POST': 17}
     
     def perform_create(self, serializer):
         #vérifier que seul le propriétaire du projet peut créer une tâche
@@ -157,8 +160,8 @@ class TaskCreateView(generics.CreateAPIView):
         project = get_object_or_404(Project, id=project_id)
 
         #vérifier que l'utilisateur est propriétaire du projet
-        if project.owner != self.request.user:
-            raise permissions.PermissionDenied("Vous n'avez pas la permission de créer une tâche dans ce projet.")
+        if not get_project_access(self.request).is_owner(project):
+            raise PermissionDenied("Vous n'avez pas la permission de créer une tâche dans ce projet.")
         serializer.save(project = project)
     
     
@@ -167,46 +170,162 @@ class TaskUpdateView(generics.UpdateAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsTaskAssignedorReadOnly]
+    query_budget = {'PUT': 14, 'PATCH': 14}
+
+#Déplacer une tache dans le tableau (colonne et ordre)
+class TaskMoveView(generics.GenericAPIView):
+    """
+    Place la tâche entre deux voisines (`after` au-dessus, `before` en
+    dessous) d'une colonne du tableau, en changeant éventuellement de statut.
+    Seule la ligne de la tâche déplacée est modifiée.
+    """
+    queryset = Task.objects.all()
+    serializer_class = TaskMoveSerializer
+    permission_classes = [permissions.IsAuthenticated, IsTaskAssignedorReadOnly]
+    query_budget = {'POST': 17}
+
+    def post(self, request, *args, **kwargs):
+        task = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        status_value = serializer.validated_data.get('status', task.status)
+        after = serializer.validated_data.get('after')
+        before = serializer.validated_data.get('before')
+
+        with transaction.atomic():
+            lock_board(task.project_id)
+            column = Task.objects.filter(project_id=task.project_id, status=status_value).exclude(pk=task.pk)
+            try:
+                position = self.position_between(column, after, before)
+            except ValueError:
+                position = None
+            # Voisines de même clé (statut changé hors tableau) ou clé trop longue
+            # malgré le rééquilibrage périodique : réécrire la colonne puis réessayer
+            if position is None or len(position) > Task._meta.get_field('position').max_length:
+                rebalance_column(task.project_id, status_value)
+                try:
+                    position = self.position_between(column, after, before)
+                except ValueError:
+                    raise ValidationError({'before': "La tâche `before` doit suivre la tâche `after`."})
+            task.status = status_value
+            task.position = position
+            task.save(update_fields=['status', 'position', 'updated_at'])
+
+        return Response(TaskSerializer(task, context=self.get_serializer_context()).data)
+
+    def position_between(self, column, after, before):
+        neighbours = dict(column.filter(pk__in=[pk for pk in (after, before) if pk is not None]).values_list('pk', 'position'))
+        for field, pk in (('after', after), ('before', before)):
+            if pk is not None and pk not in neighbours:
+                raise ValidationError({field: "Cette tâche n'est pas dans la colonne de destination."})
+
+        low = neighbours.get(after)
+        high = neighbours.get(before)
+        # Une seule voisine : l'autre borne est la tâche adjacente dans la colonne
+        if after is not None and before is None:
+            high = column.filter(position__gt=low).aggregate(next=models.Min('position'))['next']
+        elif before is not None and after is None:
+            low = column.filter(position__lt=high).aggregate(previous=models.Max('position'))['previous']
+        elif after is None:
+            low = column.aggregate(last=models.Max('position'))['last']
+        return key_between(low, high)
 
 #Supprimer une tache
 class TaskDeleteView(generics.DestroyAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsTaskAssignedorReadOnly]
+    query_budget = {'DELETE': 16}
+
+#Fil d'activité des tâches d'un projet
+class TaskActivityView(generics.ListAPIView):
+    """
+    Historique des tâches d'un projet visible, du plus récent au plus ancien,
+    toujours paginé par curseur (index task_event_feed_idx) : le coût d'une
+    page ne dépend pas de la taille du journal.
+    """
+    serializer_class = TaskEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtKeysetPagination
+    query_budget = {'GET': 3}
+
+    def get_queryset(self):
+        project = get_object_or_404(visible_projects(self.request.user), pk=self.kwargs['project_id'])
+        return TaskEvent.objects.filter(project=project).select_related('actor').only(
+            'id', 'task_id', 'task_title', 'action', 'changes', 'created_at', 'project_id',
+            'actor__id', 'actor__username', 'actor__first_name', 'actor__last_name', 'actor__avatar_variants',
+        )
+
+#Exporter les tâches (CSV / NDJSON)
+class TaskExportView(StreamingExportMixin, APIView):
+    """
+    Export en flux des tâches visibles, avec les mêmes filtres que la liste
+    (?project=, ?status=, ?assigned_to=) et ?output=csv|ndjson.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    columns = ['id', 'title', 'description', 'status', 'project_id', 'assigned_to_id', 'due_date', 'created_at', 'updated_at']
+    chunk_size = 2000
+    # Requêtes avant le début du flux ; celles de l'export lui-même ne sont pas comptées
+    query_budget = {'GET': 1}
 
+    def get(self, request):
+        output = export_format(request)
+        queryset = filter_tasks(visible_tasks(request.user), request.query_params)
+        rows = queryset.order_by('pk').values(*self.columns).iterator(chunk_size=self.chunk_size)
+        return stream_export(request, rows, self.columns, output, 'taches')
+
+#Créer et modifier des tâches par lots
+class TaskBulkView(APIView):
+    """
+    Applique en une requête jusqu'à TASKS_BULK_MAX_OPERATIONS opérations :
+    {"create": [{...tâche...}], "update": [{"id": 1, "status": "done"}, ...]}
+    Retourne un résultat par opération (created, updated, error, forbidden, not_found).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # Indépendant du nombre d'opérations
+    query_budget = {'POST': 21}
+
+    def post(self, request):
+        creates = request.data.get('create', []) if isinstance(request.data, dict) else None
+        updates = request.data.get('update', []) if isinstance(request.data, dict) else None
+        if not isinstance(creates, list) or not isinstance(updates, list):
+            return Response(
+                {'error': "Format attendu : {\"create\": [...], \"update\": [...]}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(creates) + len(updates) > max_operations():
+            return Response(
+                {'error': f"Trop d'opérations (maximum {max_operations()})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(apply_bulk_operations(request, creates, updates))
+
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def task_statistics(request):
     """
     Retourne les statistiques des tâches pour l'utilisateur connecté
     """
-    user = request.user
     project_id = request.query_params.get('project_id')
-    
-    # Base queryset
-    tasks = Task.objects.all()
-    
-    # Filtrer par projet si spécifié
-    if project_id:
-        tasks = tasks.filter(project_id=project_id)
-    
-    # Pour un étudiant : tâches qui lui sont assignées
-    if not user.is_staff and not user.is_superuser:
-        tasks = tasks.filter(assigned_to=user)
-    # Pour un enseignant : toutes les tâches de ses projets
-    else:
-        tasks = tasks.filter(project__owner=user)
-    
-    # Calculer les statistiques
-    stats = {
-        'todo': tasks.filter(status='todo').count(),
-        'in_progress': tasks.filter(status='in_progress').count(),
-        'done': tasks.filter(status='done').count(),
-        'total': tasks.count(),
-        'urgent': tasks.filter(
-            status__in=['todo', 'in_progress'],
-            due_date__isnull=False
-        ).count()
-    }
-    
-    return Response(stats)
\ No newline at end of file
+    return cached_response(
+        request, 'task_statistics', lambda: Response(compute_task_statistics(request.user, project_id))
+    )
+
+
+async def atask_statistics(view, request):
+    """
+    task_statistics pour les lectures asynchrones (mêmes entrées en cache).
+    """
+    project_id = request.query_params.get('project_id')
+
+    async def compute():
+        return json_response(await acompute_task_statistics(request.user, project_id))
+
+    return await acached_response(request, 'task_statistics', compute)
+
+
+# Vues des URL : GET servis par l'ORM asynchrone sous ASGI, le reste par la vue DRF (config.async_views)
+task_list_api = async_read_view(TasklistView.as_view(), TasklistView.alist)
+task_detail_api = async_read_view(TaskDetailView.as_view(), TaskDetailView.aretrieve)
+task_statistics_api = async_read_view(task_statistics, atask_statistics)
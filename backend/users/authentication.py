@@ -0,0 +1,209 @@
+"""
+Authentification JWT sans lecture de la ligne utilisateur à chaque requête.
+
+Les jetons émis par /api/token/ portent les champs qui décident des droits
+(is_staff, is_superuser, role) et la date à laquelle ils ont été lus. Pour
+chaque requête, ClaimsJWTAuthentication construit un CustomUser réduit à ces
+champs (les autres sont différés : le premier lu charge le reste de la ligne
+en une requête) à partir de l'état connu le plus récent :
+
+- l'état gardé dans un LRU borné du processus (TOKEN_USER_CACHE_SIZE
+  entrées), vidé pour un utilisateur à chaque enregistrement ou suppression
+  (users.signals) ;
+- les claims du jeton, s'ils sont plus récents ;
+- à défaut, une requête sur ces seuls champs, gardée dans le LRU.
+
+Aucun état n'est utilisé plus de TOKEN_USER_CACHE_TIMEOUT secondes après
+avoir été lu en base : c'est le délai maximal de prise en compte d'une
+modification faite par un autre processus (ou par un update() sans signal).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import CustomUser
+
+# Champs chargés sans lire la ligne complète ; les droits en dépendent
+USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser', 'role')
+USER_CLAIMS = ('is_staff', 'is_superuser', 'role')
+# Date de lecture des claims, copiée telle quelle dans les jetons d'accès rafraîchis
+CLAIMS_AT_CLAIM = 'user_claims_at'
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_TIMEOUT = 60
+
+
+def cache_size():
+    return getattr(settings, 'TOKEN_USER_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+
+
+def cache_timeout():
+    return getattr(settings, 'TOKEN_USER_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Jeton de rafraîchissement portant les claims de l'utilisateur ; les jetons
+    d'accès qui en sont issus les reçoivent aussi.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[CLAIMS_AT_CLAIM] = time.time()
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class TokenUserCache:
+    """
+    LRU borné : identifiant -> (date de l'état, état). Un état None marque un
+    utilisateur modifié dans ce processus : seul un état plus récent (claims
+    émis après, ou relecture en base) peut alors servir.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] + cache_timeout() <= time.time():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return entry
+
+    def set(self, user_id, as_of, state):
+        with self.lock:
+            self.entries[user_id] = (as_of, state)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > cache_size():
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        self.set(user_id, time.time(), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = TokenUserCache()
+
+
+def claims_state(validated_token):
+    """
+    (date, état) porté par le jeton, ou None : jeton sans claims (émis avant
+    leur ajout) ou claims lus depuis plus de TOKEN_USER_CACHE_TIMEOUT.
+    """
+    claims_at = validated_token.get(CLAIMS_AT_CLAIM)
+    if claims_at is None or any(claim not in validated_token for claim in USER_CLAIMS):
+        return None
+    if claims_at + cache_timeout() <= time.time():
+        return None
+    # Un jeton n'est émis qu'à un compte actif
+    return claims_at, {'is_active': True, **{claim: validated_token[claim] for claim in USER_CLAIMS}}
+
+
+def build_user(user_id, state):
+    """
+    CustomUser réduit aux champs de USER_FIELDS, sans requête SQL.
+    """
+    values = {'id': user_id, **state}
+    field_names = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in values]
+    user = CustomUser.from_db(
+        router.db_for_read(CustomUser), field_names, [values[name] for name in field_names]
+    )
+    user.loaded_from_token = True
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication dont l'utilisateur est construit depuis les claims du
+    jeton ou le LRU du processus ; mêmes erreurs (utilisateur introuvable,
+    compte inactif). Avec CHECK_REVOKE_TOKEN, le mot de passe est nécessaire :
+    la ligne complète est lue comme par JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        state = self.known_state(user_id, validated_token)
+        if state is None:
+            state = self.remember(user_id, self.state_query(user_id).first())
+        return self.check_user(build_user(user_id, state))
+
+    async def aget_user(self, validated_token):
+        """
+        get_user() avec l'ORM asynchrone (config.async_views).
+        """
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+        user_id = self.get_user_id(validated_token)
+        state = self.known_state(user_id, validated_token)
+        if state is None:
+            state = self.remember(user_id, await self.state_query(user_id).afirst())
+        return self.check_user(build_user(user_id, state))
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def known_state(self, user_id, validated_token):
+        """
+        État le plus récent connu sans requête SQL, ou None.
+        """
+        cached = user_cache.get(user_id)
+        claims = claims_state(validated_token)
+        if claims is not None and (cached is None or claims[0] > cached[0]):
+            user_cache.set(user_id, *claims)
+            return claims[1]
+        return cached[1] if cached is not None else None
+
+    def state_query(self, user_id):
+        return CustomUser.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(*USER_FIELDS[1:])
+
+    def remember(self, user_id, state):
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user_cache.set(user_id, time.time(), state)
+        return state
+
+    def check_user(self, user):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+async def aload_user(user):
+    """
+    Charge les champs différés d'un utilisateur construit depuis le jeton
+    avant qu'une vue asynchrone ne les lise.
+    """
+    deferred = user.get_deferred_fields()
+    if deferred:
+        await user.arefresh_from_db(fields=deferred)
+    return user
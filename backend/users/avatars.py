@@ -0,0 +1,358 @@
+"""
+Avatars : fichier envoyé vérifié pendant la requête, variantes produites en arrière-plan.
+
+- la requête ne lit que l'en-tête de l'image (format, dimensions), enregistre
+  le fichier tel quel sous un nom aléatoire et le désigne dans `avatar` ;
+- un pool de AVATAR_WORKERS threads le décode une seule fois (à l'échelle
+  utile pour un JPEG), le redresse selon l'orientation EXIF, le convertit en
+  sRGB et produit un carré par taille de AVATAR_SIZES, en WebP et en JPEG,
+  sans aucune métadonnée (EXIF, XMP, profil ICC) ;
+- le nom d'une variante contient l'empreinte de son contenu
+  (avatars/user_<id>/<taille>-<sha256>.<ext>) : servie avec un cache sans
+  expiration, elle ne change jamais d'URL sans changer de contenu ;
+- l'envoi suivant remplace le précédent : le traitement d'un fichier qui
+  n'est plus celui de `avatar` est abandonné et ses fichiers supprimés.
+
+Au-delà de AVATAR_QUEUE traitements en attente, l'envoi est refusé (503
+avec Retry-After) avant toute écriture ; des envois simultanés peuvent
+dépasser la limite du nombre de requêtes en cours, pas davantage. Les fichiers désignés hors de l'API
+(administration, formulaire du profil) et les traitements perdus à l'arrêt
+d'un processus sont repris par la commande process_avatars.
+"""
+import hashlib
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from PIL import Image, ImageCms, ImageOps, UnidentifiedImageError
+from rest_framework.exceptions import APIException, ValidationError
+
+from projects.cache import invalidate_user_profile
+from .models import CustomUser
+
+logger = logging.getLogger('config.performance')
+
+DEFAULT_SIZES = (64, 128, 256)
+DEFAULT_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+DEFAULT_MAX_PIXELS = 40_000_000
+# Formats acceptés (Pillow) et extension du fichier enregistré
+UPLOAD_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+# Variantes produites : format Pillow, extension et options d'encodage
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+# Secondes conseillées au client refusé (en-tête Retry-After)
+RETRY_AFTER = 2
+SRGB = ImageCms.createProfile('sRGB')
+
+
+def avatar_sizes():
+    return tuple(sorted(getattr(settings, 'AVATAR_SIZES', DEFAULT_SIZES)))
+
+
+def max_upload_size():
+    return getattr(settings, 'AVATAR_MAX_UPLOAD_SIZE', DEFAULT_MAX_UPLOAD_SIZE)
+
+
+def max_pixels():
+    return getattr(settings, 'AVATAR_MAX_PIXELS', DEFAULT_MAX_PIXELS)
+
+
+class AvatarProcessingOverloaded(APIException):
+    status_code = 503
+    default_detail = "Trop d'avatars en cours de traitement, réessayez dans quelques instants."
+    default_code = 'avatar_processing_overloaded'
+
+    def __init__(self, wait=RETRY_AFTER):
+        super().__init__()
+        # Lu par le gestionnaire d'exceptions de DRF (en-tête Retry-After)
+        self.wait = wait
+
+
+class AvatarPool:
+    """
+    `workers` traitements à la fois, `queue` en attente au plus. check()
+    refuse un envoi quand le pool est plein ; il ne réserve rien : le
+    traitement n'est soumis (submit()) qu'après la validation de la
+    transaction, qui peut être annulée. Sans thread (`workers` à 0), submit()
+    traite aussitôt.
+    """
+
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self.queue = queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='avatars') if workers else None
+        self.limit = max(workers, 1) + queue
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def check(self):
+        if self.pending >= self.limit:
+            logger.warning('avatar processing rejected workers=%s queue=%s', self.workers, self.queue)
+            raise AvatarProcessingOverloaded()
+
+    def submit(self, func, *args):
+        with self.lock:
+            self.pending += 1
+        if self.executor is None:
+            try:
+                return func(*args)
+            finally:
+                self.finished()
+        try:
+            future = self.executor.submit(self.call, func, args)
+        except BaseException:
+            self.finished()
+            raise
+        future.add_done_callback(self.done)
+        return future
+
+    def finished(self):
+        with self.lock:
+            self.pending -= 1
+
+    def call(self, func, args):
+        # Connexion propre au thread, fermée comme en fin de requête (CONN_MAX_AGE)
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    def done(self, future):
+        self.finished()
+        if not future.cancelled() and future.exception() is not None:
+            logger.error('avatar processing failed', exc_info=future.exception())
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Pool du processus, créé au premier envoi avec les réglages courants.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'AVATAR_WORKERS', 1)
+                _pool = AvatarPool(workers, getattr(settings, 'AVATAR_QUEUE', max(workers, 1) * 32))
+    return _pool
+
+
+def reset_pool():
+    """
+    Recrée le pool au prochain envoi (réglages modifiés par un test ou une mesure).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+@receiver(setting_changed)
+def reset_pool_on_setting_change(setting, **kwargs):
+    if setting in ('AVATAR_WORKERS', 'AVATAR_QUEUE'):
+        reset_pool()
+
+
+def variant_names(variants):
+    return {name for formats in (variants or {}).values() for name in formats.values()}
+
+
+def avatar_processing(name, variants):
+    """
+    Vrai si le fichier de `avatar` n'a pas encore ses variantes.
+    """
+    return bool(name) and name not in variant_names(variants)
+
+
+def avatar_urls(variants):
+    """
+    {"64": {"webp": url, "jpeg": url}, ...} ou None (pas d'avatar traité).
+    """
+    if not variants:
+        return None
+    return {size: {key: default_storage.url(name) for key, name in formats.items()}
+            for size, formats in variants.items()}
+
+
+def check_upload(upload):
+    """
+    Format et dimensions lus dans l'en-tête, sans décoder l'image ; retourne
+    l'extension du fichier à enregistrer.
+    """
+    if upload.size > max_upload_size():
+        raise ValidationError({'avatar': [f"Fichier trop lourd (maximum {max_upload_size() // (1024 * 1024)} Mo)"]})
+    try:
+        with Image.open(upload) as image:
+            format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        raise ValidationError({'avatar': ["Image illisible"]})
+    finally:
+        upload.seek(0)
+    if format not in UPLOAD_FORMATS:
+        raise ValidationError({'avatar': [f"Formats acceptés : {', '.join(UPLOAD_FORMATS)}"]})
+    if width * height > max_pixels():
+        raise ValidationError({'avatar': ["Image trop grande"]})
+    return UPLOAD_FORMATS[format]
+
+
+def accept_avatar(user_id, upload):
+    """
+    Enregistre `upload` comme avatar de l'utilisateur et confie ses
+    variantes au pool (après la validation de la transaction) ; retourne le
+    nom du fichier. Les variantes précédentes restent servies jusque-là.
+    """
+    extension = check_upload(upload)
+    pool = get_pool()
+    pool.check()
+    name = default_storage.save(f'avatars/user_{user_id}/upload-{uuid.uuid4().hex}.{extension}', upload)
+    CustomUser.objects.filter(pk=user_id).update(avatar=name)
+    transaction.on_commit(lambda: pool.submit(process_avatar, user_id, name))
+    return name
+
+
+def remove_avatar(user_id):
+    """
+    Supprime l'avatar, ses variantes et leurs fichiers.
+    """
+    current = CustomUser.objects.filter(pk=user_id).values('avatar', 'avatar_variants').first()
+    if current is None:
+        return
+    CustomUser.objects.filter(pk=user_id).update(avatar='', avatar_variants={})
+    files = variant_names(current['avatar_variants']) | ({current['avatar']} if current['avatar'] else set())
+    transaction.on_commit(lambda: delete_files(files))
+    invalidate_user_profile(CustomUser(pk=user_id))
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def to_srgb(image):
+    """
+    Couleurs converties en sRGB avant de retirer le profil ICC (sinon une
+    photo Display P3, par exemple, serait affichée délavée).
+    """
+    icc = image.info.get('icc_profile')
+    if not icc or image.mode not in ('RGB', 'RGBA'):
+        return image
+    try:
+        return ImageCms.profileToProfile(image, ImageCms.ImageCmsProfile(BytesIO(icc)), SRGB, outputMode=image.mode)
+    except (ImageCms.PyCMSError, OSError):
+        return image
+
+
+def decode(data, size):
+    """
+    Image décodée une fois, redressée, en RGB ou RGBA (transparence) et en
+    sRGB ; un JPEG est décodé directement à l'échelle utile (au moins `size`).
+    """
+    with Image.open(BytesIO(data)) as source:
+        source.draft('RGB', (size, size))
+        source.load()
+        image = ImageOps.exif_transpose(source)
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    return to_srgb(image)
+
+
+def encode(image, key):
+    format, _, options = VARIANT_FORMATS[key]
+    if format == 'JPEG' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    output = BytesIO()
+    # Ni exif, ni xmp, ni icc_profile : aucune métadonnée dans la variante
+    image.save(output, format, **options)
+    return output.getvalue()
+
+
+def render_variants(user_id, data):
+    """
+    Écrit les variantes de l'image `data` ; retourne
+    {"<taille>": {"webp": nom, "jpeg": nom}}. Un fichier au nom déjà présent
+    (même contenu) n'est pas réécrit.
+    """
+    sizes = avatar_sizes()
+    square = ImageOps.fit(decode(data, sizes[-1]), (sizes[-1], sizes[-1]), Image.Resampling.LANCZOS)
+    variants = {}
+    for size in sizes:
+        image = square if size == sizes[-1] else square.resize((size, size), Image.Resampling.LANCZOS)
+        variants[str(size)] = {}
+        for key, (_, extension, _) in VARIANT_FORMATS.items():
+            content = encode(image, key)
+            name = f'avatars/user_{user_id}/{size}-{hashlib.sha256(content).hexdigest()[:16]}.{extension}'
+            if not default_storage.exists(name):
+                saved = default_storage.save(name, ContentFile(content))
+                if saved != name:
+                    # Même contenu écrit entre-temps par un autre traitement
+                    default_storage.delete(saved)
+            variants[str(size)][key] = name
+    return variants
+
+
+def process_avatar(user_id, source):
+    """
+    Variantes du fichier `source`, enregistrées si c'est toujours celui de
+    `avatar` ; `avatar` désigne ensuite la plus grande variante JPEG et le
+    fichier envoyé (avec ses métadonnées) est supprimé.
+    """
+    try:
+        with default_storage.open(source) as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    try:
+        variants = render_variants(user_id, data)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as exc:
+        logger.warning('avatar rejected user=%s source=%s: %s', user_id, source, exc)
+        CustomUser.objects.filter(pk=user_id, avatar=source).update(avatar='')
+        default_storage.delete(source)
+        return None
+
+    previous = CustomUser.objects.filter(pk=user_id).values_list('avatar_variants', flat=True).first()
+    primary = variants[str(avatar_sizes()[-1])]['jpeg']
+    updated = CustomUser.objects.filter(pk=user_id, avatar=source).update(avatar=primary, avatar_variants=variants)
+    if updated:
+        delete_files({source} | (variant_names(previous) - variant_names(variants)))
+        invalidate_user_profile(CustomUser(pk=user_id))
+        return variants
+    # Remplacé par un envoi plus récent (ou compte supprimé) : fichiers inutiles
+    current = CustomUser.objects.filter(pk=user_id).values_list('avatar_variants', flat=True).first()
+    delete_files({source} | (variant_names(variants) - variant_names(current)))
+    return None
+
+
+def pending_avatars(queryset=None):
+    """
+    (id, fichier) des avatars sans variantes à jour.
+    """
+    queryset = CustomUser.objects.all() if queryset is None else queryset
+    for user_id, name, variants in (
+        queryset.exclude(avatar='').exclude(avatar__isnull=True)
+        .values_list('id', 'avatar', 'avatar_variants').iterator()
+    ):
+        if avatar_processing(name, variants):
+            yield user_id, name
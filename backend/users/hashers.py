@@ -0,0 +1,156 @@
+"""
+Hachage des mots de passe dans un pool de threads borné.
+
+Les hachages (PBKDF2, scrypt, Argon2) libèrent le GIL : confiés aux
+PASSWORD_HASHING_WORKERS threads du pool, ils occupent au plus autant de
+cœurs quel que soit le nombre de requêtes simultanées. Au-delà de
+PASSWORD_HASHING_QUEUE hachages en attente, la requête est refusée aussitôt
+(503 avec Retry-After) au lieu d'attendre derrière les autres.
+
+Les hashers de PASSWORD_HASHERS sont ceux de Django dont encode() et
+verify() passent par le pool : connexion, inscription, changement de mot de
+passe, administration et rehachage à la connexion (mot de passe enregistré
+avec un ancien hasher) en profitent sans modification.
+
+Les imports de listes d'étudiants (users.roster) hachent dans des processus
+dédiés : setup_hashing_process() et hash_chunk() en sont les points d'entrée,
+importables avant django.setup().
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger('config.performance')
+
+# Secondes conseillées au client refusé (en-tête Retry-After)
+RETRY_AFTER = 1
+
+
+class HashingOverloaded(APIException):
+    status_code = 503
+    default_detail = "Trop de connexions simultanées, réessayez dans quelques instants."
+    default_code = 'hashing_overloaded'
+
+    def __init__(self, wait=RETRY_AFTER):
+        super().__init__()
+        # Lu par le gestionnaire d'exceptions de DRF (en-tête Retry-After)
+        self.wait = wait
+
+
+class HashingPool:
+    """
+    `workers` hachages à la fois, `queue` en attente au plus ; run() exécute
+    une fonction dans le pool et attend son résultat.
+    """
+
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self.queue = queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self.admission = threading.BoundedSemaphore(workers + queue)
+        self.local = threading.local()
+
+    def run(self, func, *args, **kwargs):
+        if getattr(self.local, 'worker', False):
+            # Appel imbriqué (verify() qui appelle encode()) : déjà dans le pool
+            return func(*args, **kwargs)
+        if not self.admission.acquire(blocking=False):
+            logger.warning('password hashing rejected workers=%s queue=%s', self.workers, self.queue)
+            raise HashingOverloaded()
+        try:
+            future = self.executor.submit(self.call, func, args, kwargs)
+        except BaseException:
+            self.admission.release()
+            raise
+        future.add_done_callback(lambda _: self.admission.release())
+        return future.result()
+
+    def call(self, func, args, kwargs):
+        self.local.worker = True
+        return func(*args, **kwargs)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Pool du processus, créé au premier hachage avec les réglages courants.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+                _pool = HashingPool(workers, getattr(settings, 'PASSWORD_HASHING_QUEUE', workers * 16))
+    return _pool
+
+
+def reset_pool():
+    """
+    Recrée le pool au prochain hachage (réglages modifiés par un test ou une mesure).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+@receiver(setting_changed)
+def reset_pool_on_setting_change(setting, **kwargs):
+    if setting in ('PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_QUEUE'):
+        reset_pool()
+
+
+class PooledHasherMixin:
+    """
+    encode() et verify() du hasher Django exécutés dans le pool.
+    """
+
+    def encode(self, password, salt, *args, **kwargs):
+        return get_pool().run(super().encode, password, salt, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        return get_pool().run(super().verify, password, encoded)
+
+
+class ScryptPasswordHasher(PooledHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    pass
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    pass
+
+
+class PBKDF2SHA1PasswordHasher(PooledHasherMixin, hashers.PBKDF2SHA1PasswordHasher):
+    pass
+
+
+
+def setup_hashing_process():
+    """
+    Initialisation d'un processus de hachage démarré en « spawn ».
+    """
+    import django
+
+    django.setup()
+
+
+def hash_chunk(passwords, algorithm):
+    return [hashers.make_password(password, hasher=algorithm) for password in passwords]
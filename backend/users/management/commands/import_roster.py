@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.roster import RosterFormatError, import_roster, parse_roster, roster_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe une liste d'étudiants (CSV avec en-tête username,email,first_name,last_name,password[,projects] "
+        "ou JSON) et les ajoute aux projets indiqués"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier CSV ou JSON (.json)")
+        parser.add_argument('--project', type=int, action='append', default=[],
+                            help="Projet auquel ajouter tous les étudiants (répétable)")
+        parser.add_argument('--processes', type=int, default=None,
+                            help="Processus de hachage (ROSTER_IMPORT_PROCESSES par défaut)")
+        parser.add_argument('--output', help="Fichier JSON où écrire le résultat par ligne")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as source:
+                rows, projects = parse_roster(source.read(), roster_format(options['path']))
+            result = import_roster(rows, projects + options['project'], processes=options['processes'])
+        except (OSError, RosterFormatError) as exc:
+            raise CommandError(exc)
+        elapsed = time.perf_counter() - start
+
+        for row in result['rows']:
+            if row['status'] == 'error':
+                self.stderr.write(f"n°{row['index'] + 1} ({row['username']}) : {json.dumps(row['errors'], ensure_ascii=False)}")
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} créé(s), {result['existing']} existant(s), {result['errors']} erreur(s) "
+            f"sur {len(rows)} ligne(s) en {elapsed:.1f} s"
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.avatars import pending_avatars, process_avatar
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Produit les variantes des avatars qui n'en ont pas (fichiers désignés par l'administration ou le "
+        "formulaire du profil, traitements perdus à l'arrêt d'un processus) ; à lancer après un déploiement "
+        "ou périodiquement"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help="Identifiant d'utilisateur (répétable)")
+
+    def handle(self, *args, **options):
+        queryset = CustomUser.objects.filter(pk__in=options['user']) if options['user'] else None
+        start = time.perf_counter()
+        processed = skipped = 0
+        for user_id, name in pending_avatars(queryset):
+            if process_avatar(user_id, name) is None:
+                # Fichier illisible, absent ou remplacé entre-temps
+                skipped += 1
+                self.stderr.write(f"Utilisateur {user_id} : {name} non traité")
+            else:
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed} avatar(s) traité(s), {skipped} ignoré(s) en {time.perf_counter() - start:.1f} s"
+        ))
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.5 on 2026-10-18 01:05
+
+from django.db import migrations
+
+SEARCH_COLUMNS = ('username', 'first_name', 'last_name', 'email')
+
+
+def create_search_indexes(apps, schema_editor):
+    # Index des filtres de users.search, propres à chaque base : ils ne
+    # figurent pas dans Meta.indexes (GIN et opclasses n'existent que sous PostgreSQL)
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        # Django filtre par UPPER("colonne"::text) LIKE UPPER(...) : mêmes expressions ici.
+        # Parties de mots (icontains) : trigrammes, un index GIN pour les quatre colonnes
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+        expressions = ', '.join(f'UPPER("{column}"::text) gin_trgm_ops' for column in SEARCH_COLUMNS)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS users_search_trgm_idx ON users_customuser USING gin ({expressions});'
+        )
+        # Débuts de mots (istartswith) : la collation "C" sert à la fois le LIKE 'ABC%'
+        # et le tri du palier (ORDER BY UPPER(...) COLLATE "C"), lu dans l'ordre de l'index
+        for column in SEARCH_COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS users_{column}_prefix_idx '
+                f'ON users_customuser ((UPPER("{column}"::text) COLLATE "C"));'
+            )
+    elif vendor == 'sqlite':
+        # LIKE est insensible à la casse sous SQLite : un index NOCASE sert les LIKE 'abc%'
+        # et le tri ORDER BY ... COLLATE NOCASE
+        for column in SEARCH_COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS users_{column}_prefix_idx '
+                f'ON users_customuser ("{column}" COLLATE NOCASE);'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS users_search_trgm_idx;')
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS users_{column}_prefix_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_date_joined_cursor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
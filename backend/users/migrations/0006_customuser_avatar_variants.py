@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:12
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Sous SQLite, ajouter ou retirer la colonne reconstruit la table, sans les
+# index de recherche de 0005 (absents de Meta.indexes) : recréés après
+search_indexes = import_module('users.migrations.0005_user_search_indexes')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, search_indexes.create_search_indexes),
+        migrations.AddField(
+            model_name='customuser',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(search_indexes.create_search_indexes, migrations.RunPython.noop),
+    ]
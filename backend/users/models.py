@@ -19,6 +19,45 @@ class CustomUser(AbstractUser):
         blank=True,
         verbose_name="Photo de profil"
     )
+    # Variantes de l'avatar (users.avatars) : {"<taille>": {"webp": nom, "jpeg": nom}}
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Tri de la pagination par curseur
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_id_idx'),
+        ]
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Utilisateur construit depuis le jeton (users.authentication) : le
+        # premier champ différé lu charge le reste de la ligne en une requête
+        if fields is not None and getattr(self, 'loaded_from_token', False):
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using, fields, from_queryset)
+
+    def __str__(self):
+        return f"{self.username} ({self.get_role_display()})"
+
+class RosterImport(models.Model):
+    """
+    Import d'étudiants traité en arrière-plan (users.roster) : état et
+    résultat par ligne, lus sur /api/users/import/<id>/. Les lignes reçues
+    (mots de passe compris) restent en mémoire et ne sont jamais enregistrées.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ]
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='roster_imports')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    rows = models.PositiveIntegerField(default=0)
+    # Décomptes et résultat par ligne d'import_roster(), une fois terminé
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"{self.username} ({self.get_role_display()})"
\ No newline at end of file
+        return f"Import {self.pk} ({self.get_status_display()})"
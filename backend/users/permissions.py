@@ -20,8 +20,8 @@ class IsAdminOrAuthenticatedStudent(permissions.BasePermission):
         if view.action == 'me':
             return True
             
-        # Permettre aux étudiants authentifiés de lister les autres étudiants
-        if view.action in ['list', 'students'] and request.method == 'GET':
+        # Permettre aux étudiants authentifiés de lister (ou rechercher) les autres étudiants
+        if view.action in ['list', 'students', 'search'] and request.method == 'GET':
             return True
             
         # Pour toutes les autres actions, l'utilisateur doit être admin
@@ -0,0 +1,434 @@
+"""
+Import d'une liste d'étudiants (CSV ou JSON) et rattachement à des projets.
+
+- toutes les lignes sont validées avant la moindre écriture ; les comptes
+  existants et les projets sont chargés en une requête chacun ;
+- les mots de passe sont hachés en parallèle par un pool de processus
+  (ROSTER_IMPORT_PROCESSES), distinct du pool des connexions (users.hashers) :
+  un import ne provoque pas de refus 503 sur /api/token/ ;
+- les comptes sont créés par bulk_create et les adhésions aux projets par un
+  seul bulk_create dans la table de liaison, dans une transaction.
+
+Un étudiant déjà inscrit (même nom d'utilisateur) n'est pas modifié : il est
+seulement ajouté aux projets, si bien qu'un import peut être rejoué.
+
+Par l'API, l'import est un travail en arrière-plan (RosterImport) : la
+requête vérifie le fichier et les projets, répond 202 et le pool du
+processus (ROSTER_IMPORT_WORKERS imports à la fois, ROSTER_IMPORT_QUEUE en
+attente ; au-delà : 503 avec Retry-After) l'exécute après la transaction.
+Un import à la fois par worker borne les processus de hachage à
+ROSTER_IMPORT_PROCESSES. Un travail perdu à l'arrêt du processus reste
+« pending » ou « running » : l'import peut être relancé.
+"""
+import csv
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+
+from projects.cache import invalidate_projects
+from projects.events import notify_projects
+from projects.models import Project
+from projects.visibility import Membership
+from tasks.models import UserWorkloadCounters
+from .hashers import hash_chunk, setup_hashing_process
+from .models import CustomUser, RosterImport
+
+logger = logging.getLogger('config.performance')
+
+DEFAULT_MAX_ROWS = 10000
+# En dessous, démarrer des processus coûte plus que le hachage lui-même
+PARALLEL_MIN_PASSWORDS = 32
+# Colonnes reconnues ; "projects" : identifiants séparés par des espaces ou des ";"
+COLUMNS = ('username', 'email', 'first_name', 'last_name', 'password', 'projects')
+# Secondes conseillées au client refusé (en-tête Retry-After)
+RETRY_AFTER = 30
+
+
+def max_rows():
+    return getattr(settings, 'ROSTER_IMPORT_MAX_ROWS', DEFAULT_MAX_ROWS)
+
+
+def import_processes():
+    return getattr(settings, 'ROSTER_IMPORT_PROCESSES', None) or os.cpu_count() or 1
+
+
+class RosterFormatError(ValueError):
+    """
+    Fichier illisible ou requête invalide dans son ensemble (aucune ligne importée).
+    """
+
+
+class RosterImportOverloaded(APIException):
+    status_code = 503
+    default_detail = "Trop d'imports en cours, réessayez dans quelques instants."
+    default_code = 'roster_import_overloaded'
+
+    def __init__(self, wait=RETRY_AFTER):
+        super().__init__()
+        # Lu par le gestionnaire d'exceptions de DRF (en-tête Retry-After)
+        self.wait = wait
+
+
+class RosterImportPool:
+    """
+    `workers` imports à la fois, `queue` en attente au plus, comme le pool
+    des avatars (users.avatars) : check() refuse sans réserver, submit()
+    n'est appelé qu'après la validation de la transaction. Sans thread
+    (`workers` à 0), submit() importe aussitôt.
+    """
+
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self.queue = queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='roster-import') if workers else None
+        self.limit = max(workers, 1) + queue
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def check(self):
+        if self.pending >= self.limit:
+            logger.warning('roster import rejected workers=%s queue=%s', self.workers, self.queue)
+            raise RosterImportOverloaded()
+
+    def submit(self, func, *args):
+        with self.lock:
+            self.pending += 1
+        if self.executor is None:
+            try:
+                return func(*args)
+            finally:
+                self.finished()
+        try:
+            future = self.executor.submit(self.call, func, args)
+        except BaseException:
+            self.finished()
+            raise
+        future.add_done_callback(lambda _: self.finished())
+        return future
+
+    def finished(self):
+        with self.lock:
+            self.pending -= 1
+
+    def call(self, func, args):
+        # Connexion propre au thread, fermée comme en fin de requête (CONN_MAX_AGE)
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Pool du processus, créé au premier import avec les réglages courants.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RosterImportPool(getattr(settings, 'ROSTER_IMPORT_WORKERS', 1),
+                                         getattr(settings, 'ROSTER_IMPORT_QUEUE', 4))
+    return _pool
+
+
+def reset_pool():
+    """
+    Recrée le pool au prochain import (réglages modifiés par un test ou une mesure).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+@receiver(setting_changed)
+def reset_pool_on_setting_change(setting, **kwargs):
+    if setting in ('ROSTER_IMPORT_WORKERS', 'ROSTER_IMPORT_QUEUE'):
+        reset_pool()
+
+
+def split_ids(value):
+    """
+    "3;4 7" ou [3, 4] -> liste d'identifiants (non convertis).
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, int):
+        return [value]
+    return [part for part in re.split(r'[\s;,]+', str(value)) if part]
+
+
+def roster_format(filename='', content_type=''):
+    if (filename or '').lower().endswith('.json') or 'json' in (content_type or ''):
+        return 'json'
+    return 'csv'
+
+
+def parse_roster(content, format='csv'):
+    """
+    Lignes d'un fichier CSV (avec en-tête) ou JSON (liste d'objets, ou
+    {"students": [...]}) ; retourne (lignes, projets du fichier).
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise RosterFormatError("Le fichier doit être encodé en UTF-8")
+    if format == 'json':
+        try:
+            data = json.loads(content)
+        except ValueError as exc:
+            raise RosterFormatError(f"JSON invalide : {exc}")
+        projects = []
+        if isinstance(data, dict):
+            projects = split_ids(data.get('projects'))
+            data = data.get('students')
+        if not isinstance(data, list):
+            raise RosterFormatError("Format attendu : [{...étudiant...}] ou {\"students\": [...], \"projects\": [...]}")
+        return data, projects
+
+    reader = csv.DictReader(io.StringIO(content.lstrip('\ufeff')))
+    fields = [name.strip() for name in reader.fieldnames or []]
+    if 'username' not in fields or 'password' not in fields:
+        raise RosterFormatError(f"En-tête CSV attendu : {','.join(COLUMNS)} (username et password obligatoires)")
+    reader.fieldnames = fields
+    rows = []
+    for row in reader:
+        row = {key: (value or '').strip() if key != 'password' else value or ''
+               for key, value in row.items() if key in COLUMNS}
+        row['projects'] = split_ids(row.get('projects'))
+        rows.append(row)
+    return rows, []
+
+
+class RosterStudentSerializer(serializers.Serializer):
+    """
+    Une ligne de l'import ; l'unicité du nom d'utilisateur est vérifiée pour
+    tout le lot (import_roster), pas ligne par ligne.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    password = serializers.CharField(trim_whitespace=False, write_only=True)
+    projects = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+
+    def validate(self, attrs):
+        attrs['username'] = CustomUser.normalize_username(attrs['username'])
+        attrs['email'] = CustomUser.objects.normalize_email(attrs['email'])
+        user = CustomUser(**{field: attrs[field] for field in ('username', 'email', 'first_name', 'last_name')})
+        try:
+            validate_password(attrs['password'], user=user)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'password': list(exc.messages)})
+        return attrs
+
+
+def hash_passwords(passwords, processes=None):
+    """
+    Hashs des mots de passe, dans l'ordre, avec le hasher par défaut.
+    Répartis par paquets sur `processes` processus (démarrés en « spawn » :
+    aucun état hérité du processus web) ; dans le processus courant pour un
+    petit lot ou un seul processus.
+    """
+    processes = processes or import_processes()
+    algorithm = get_hasher('default').algorithm
+    if processes <= 1 or len(passwords) < PARALLEL_MIN_PASSWORDS:
+        return hash_chunk(passwords, algorithm)
+    # Quelques paquets par processus : les derniers servis ne retardent pas la fin
+    size = math.ceil(len(passwords) / (processes * 4))
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(chunks)),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=setup_hashing_process,
+    ) as executor:
+        return [encoded for chunk in executor.map(hash_chunk, chunks, [algorithm] * len(chunks)) for encoded in chunk]
+
+
+def load_projects(project_ids, user):
+    """
+    {id: projet} des projets demandés ; `user` (None : commande de gestion)
+    doit en être propriétaire, sauf superuser.
+    """
+    projects = Project.objects.only('id', 'owner_id').in_bulk(project_ids) if project_ids else {}
+    if user is not None and not user.is_superuser:
+        projects = {pk: project for pk, project in projects.items() if project.owner_id == user.pk}
+    return projects
+
+
+def common_projects(project_ids, user):
+    """
+    Identifiants des projets de la requête, triés ; RosterFormatError si
+    l'un d'eux est introuvable ou n'appartient pas à `user`.
+    """
+    try:
+        common = sorted({int(pk) for pk in split_ids(project_ids)})
+    except (TypeError, ValueError):
+        raise RosterFormatError("Les projets sont des identifiants numériques")
+    missing = [pk for pk in common if pk not in load_projects(common, user)]
+    if missing:
+        raise RosterFormatError(f"Projets introuvables ou non autorisés : {', '.join(map(str, missing))}")
+    return common
+
+
+def import_roster(rows, project_ids=(), user=None, processes=None):
+    """
+    Importe les étudiants de `rows` et les ajoute aux projets `project_ids`
+    (tous) et à ceux de leur ligne. Les lignes invalides sont ignorées et
+    signalées ; retourne les décomptes et un résultat par ligne, dans l'ordre
+    reçu (created, existing, error).
+    """
+    try:
+        common = sorted({int(pk) for pk in split_ids(project_ids)})
+    except (TypeError, ValueError):
+        raise RosterFormatError("Les projets sont des identifiants numériques")
+    row_ids = set()
+    for row in rows:
+        if isinstance(row, dict):
+            for pk in split_ids(row.get('projects')):
+                if isinstance(pk, int) or (isinstance(pk, str) and pk.isdigit()):
+                    row_ids.add(int(pk))
+    projects = load_projects(set(common) | row_ids, user)
+    missing = [pk for pk in common if pk not in projects]
+    if missing:
+        raise RosterFormatError(f"Projets introuvables ou non autorisés : {', '.join(map(str, missing))}")
+
+    serializer = RosterStudentSerializer(many=True)
+    results, valid, seen = [], [], {}
+    for index, row in enumerate(rows):
+        if isinstance(row, dict):
+            row = {**row, 'projects': split_ids(row.get('projects'))}
+        try:
+            validated = serializer.child.run_validation(row)
+        except serializers.ValidationError as exc:
+            results.append({'index': index, 'username': row.get('username') if isinstance(row, dict) else None,
+                            'status': 'error', 'errors': exc.detail})
+            continue
+        username = validated['username']
+        denied = [pk for pk in validated['projects'] if pk not in projects]
+        if denied:
+            errors = {'projects': [f"Projets introuvables ou non autorisés : {', '.join(map(str, denied))}"]}
+        elif username in seen:
+            errors = {'username': [f"En double dans le fichier (index {seen[username]})"]}
+        else:
+            errors = None
+        results.append({'index': index, 'username': username, 'status': 'error' if errors else None})
+        if errors:
+            results[-1]['errors'] = errors
+            continue
+        seen[username] = index
+        valid.append((results[-1], validated))
+
+    existing = {
+        account['username']: account
+        for account in CustomUser.objects.filter(username__in=list(seen)).values('id', 'username', 'is_staff', 'is_superuser')
+    } if seen else {}
+    to_create, links = [], []
+    for result, validated in valid:
+        account = existing.get(validated['username'])
+        if account is not None and (account['is_staff'] or account['is_superuser']):
+            result.update(status='error', errors={'username': ["Ce nom d'utilisateur appartient à un enseignant"]})
+            continue
+        member_of = sorted(set(common) | set(validated['projects']))
+        if account is not None:
+            result.update(status='existing', id=account['id'])
+            links.extend((project_id, account['id']) for project_id in member_of)
+        else:
+            result['status'] = 'created'
+            to_create.append((result, validated, member_of))
+
+    hashes = hash_passwords([validated['password'] for _, validated, _ in to_create], processes)
+    now = timezone.now()
+    with transaction.atomic():
+        created = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=validated['username'], email=validated['email'],
+                first_name=validated['first_name'], last_name=validated['last_name'],
+                password=encoded, role='student', date_joined=now,
+            )
+            for (_, validated, _), encoded in zip(to_create, hashes)
+        ], batch_size=1000)
+        # bulk_create n'envoie pas post_save : compteurs créés comme par tasks.signals
+        UserWorkloadCounters.objects.bulk_create(
+            [UserWorkloadCounters(user_id=account.pk) for account in created], ignore_conflicts=True, batch_size=1000
+        )
+        for (result, _, member_of), account in zip(to_create, created):
+            result['id'] = account.pk
+            links.extend((project_id, account.pk) for project_id in member_of)
+        # Un seul INSERT groupé dans la table de liaison, sans m2m_changed :
+        # updated_at, caches et événements à la main (voir projects.signals)
+        Membership.objects.bulk_create(
+            [Membership(project_id=project_id, customuser_id=user_id) for project_id, user_id in links],
+            ignore_conflicts=True,
+        )
+        touched = sorted({project_id for project_id, _ in links})
+        if touched:
+            Project.objects.filter(pk__in=touched).update(updated_at=now)
+            touched_projects = list(Project.objects.filter(pk__in=touched))
+            invalidate_projects(touched_projects)
+            notify_projects('saved', touched_projects)
+
+    counts = {status: sum(result['status'] == status for result in results) for status in ('created', 'existing')}
+    return {**counts, 'errors': len(results) - sum(counts.values()), 'rows': results}
+
+
+def start_import(rows, project_ids, user):
+    """
+    Enregistre un import de `rows` par `user` et le confie au pool après la
+    transaction ; RosterFormatError (projets) ou RosterImportOverloaded
+    avant toute écriture. Retourne le RosterImport « pending ».
+    """
+    projects = common_projects(project_ids, user)
+    pool = get_pool()
+    pool.check()
+    job = RosterImport.objects.create(created_by=user, rows=len(rows))
+    transaction.on_commit(lambda: pool.submit(run_import, job.pk, rows, projects, user.pk))
+    return job
+
+
+def run_import(job_id, rows, project_ids, user_id):
+    """
+    Exécute l'import `job_id` et y enregistre son résultat (ou l'erreur).
+    """
+    RosterImport.objects.filter(pk=job_id).update(status='running')
+    fields = {'status': 'failed'}
+    try:
+        user = CustomUser.objects.get(pk=user_id)
+        fields.update(status='done', result=import_roster(rows, project_ids, user=user))
+    except RosterFormatError as exc:
+        fields['error'] = str(exc)
+    except Exception:
+        logger.exception('roster import failed job=%s', job_id)
+        fields['error'] = "Erreur interne pendant l'import"
+    RosterImport.objects.filter(pk=job_id).update(finished_at=timezone.now(), **fields)
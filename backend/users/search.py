@@ -0,0 +1,153 @@
+"""
+Recherche d'utilisateurs à la frappe (sélecteur de membres d'un projet).
+
+Le premier mot de la recherche doit correspondre au début du nom
+d'utilisateur, du prénom, du nom ou de l'e-mail, les mots suivants au début
+de l'un de ces champs ; sous PostgreSQL, un mot de 3 caractères ou plus peut
+aussi se trouver au milieu. Les résultats sont classés par paliers (nom
+d'utilisateur, prénom, nom, e-mail, puis milieu de mot), chacun trié sur
+son champ.
+
+Chaque palier est une requête qui parcourt l'index de son champ dans
+l'ordre et s'arrête aux `limit` premières lignes : une recherche de deux
+lettres ne trie pas les milliers de comptes qui lui correspondent. Les
+paliers suivants ne sont lus que si les premiers n'ont pas suffi. Index de
+la migration users 0005 : expressions en collation "C" (PostgreSQL) ou
+NOCASE (SQLite) pour les débuts, pg_trgm (GIN) pour les milieux de mots.
+"""
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Collate, Upper
+from django.db.models.lookups import StartsWith
+from rest_framework.exceptions import ValidationError
+
+from .avatars import avatar_urls
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+RESULT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'avatar_variants')
+MIN_LENGTH = 2
+# En dessous, pg_trgm ne sert pas un LIKE '%...%' : début de mot seulement
+TRIGRAM_MIN_LENGTH = 3
+MAX_TERMS = 4
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def search_terms(query):
+    terms = (query or '').split()[:MAX_TERMS]
+    return terms if len(' '.join(terms)) >= MIN_LENGTH else []
+
+
+def search_limit(params):
+    """
+    ?limit= (DEFAULT_LIMIT par défaut, MAX_LIMIT au plus).
+    """
+    value = params.get('limit')
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({'limit': ["Un nombre entier est requis."]})
+    if limit < 1:
+        raise ValidationError({'limit': ["La limite doit être positive."]})
+    return min(limit, MAX_LIMIT)
+
+
+def prefix_order(field, vendor):
+    """
+    Tri identique à l'index de début de mot du champ : la base lit l'index
+    dans l'ordre au lieu de trier toutes les lignes trouvées.
+    """
+    if vendor == 'postgresql':
+        return Collate(Upper(field), 'C')
+    if vendor == 'sqlite':
+        return Collate(F(field), 'NOCASE')
+    return Upper(field)
+
+
+def prefix_filter(field, term, vendor):
+    """
+    Début de mot sur le champ. Sous PostgreSQL, le filtre porte sur
+    l'expression de l'index (UPPER(...) COLLATE "C") avec un motif en
+    majuscules : le LIKE 'ABC%' devient un parcours de plage de l'index, là
+    où UPPER(...) LIKE UPPER('abc%') dans la collation de la base n'en est
+    pas un.
+    """
+    if vendor == 'postgresql':
+        return StartsWith(prefix_order(field, vendor), term.upper())
+    return Q(**{f'{field}__istartswith': term})
+
+
+def term_filter(term, infix):
+    lookup = 'icontains' if infix else 'istartswith'
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__{lookup}': term})
+    return condition
+
+
+def search_tiers(queryset, query):
+    """
+    Requêtes des paliers, dans l'ordre du classement, sur les comptes actifs
+    de `queryset` (règle de visibilité de la vue).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    vendor = connections[queryset.db].vendor
+    infix = vendor == 'postgresql'
+    first = terms[0]
+    base = queryset.filter(is_active=True)
+    for term in terms[1:]:
+        base = base.filter(term_filter(term, infix and len(term) >= TRIGRAM_MIN_LENGTH))
+    tiers = [
+        base.filter(prefix_filter(field, first, vendor)).order_by(prefix_order(field, vendor), 'id')
+        for field in SEARCH_FIELDS
+    ]
+    if infix and len(first) >= TRIGRAM_MIN_LENGTH:
+        tiers.append(base.filter(term_filter(first, infix=True)).order_by('username', 'id'))
+    return tiers
+
+
+def search_users(queryset, query, limit=DEFAULT_LIMIT):
+    """
+    Valeurs de RESULT_FIELDS des `limit` premiers résultats, à passer à search_result().
+    """
+    rows, seen = [], set()
+    for tier in search_tiers(queryset, query):
+        if len(rows) >= limit:
+            break
+        for row in tier.exclude(pk__in=seen).values(*RESULT_FIELDS)[:limit - len(rows)]:
+            rows.append(row)
+            seen.add(row['id'])
+    return rows
+
+
+async def asearch_users(queryset, query, limit=DEFAULT_LIMIT):
+    """
+    search_users() avec l'ORM asynchrone (config.async_views).
+    """
+    rows, seen = [], set()
+    for tier in search_tiers(queryset, query):
+        if len(rows) >= limit:
+            break
+        async for row in tier.exclude(pk__in=seen).values(*RESULT_FIELDS)[:limit - len(rows)]:
+            rows.append(row)
+            seen.add(row['id'])
+    return rows
+
+
+def search_result(row):
+    """
+    Représentation allégée d'un résultat (celle de UserCompactSerializer et le rôle).
+    """
+    role = 'admin' if row['is_superuser'] else 'teacher' if row['is_staff'] else 'student'
+    return {
+        'id': row['id'],
+        'username': row['username'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'avatar': avatar_urls(row['avatar_variants']),
+        'role': role,
+    }
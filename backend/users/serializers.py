@@ -1,17 +1,38 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from .avatars import avatar_processing, avatar_urls
+from .models import RosterImport
 
 User = get_user_model()
 
+class UserCompactSerializer(serializers.ModelSerializer):
+    """
+    Représentation allégée d'un utilisateur (listes de membres des tableaux de bord)
+    """
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'avatar']
+        read_only_fields = fields
+
+    def get_avatar(self, obj):
+        return avatar_urls(obj.avatar_variants)
+
+
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
     role = serializers.SerializerMethodField()
+    # URLs des variantes (users.avatars) ; avatar_processing : un envoi attend les siennes
+    avatar = serializers.SerializerMethodField()
+    avatar_processing = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'password', 'password2', 'first_name', 'last_name', 'role', 'is_staff', 'is_superuser']
+        fields = ['id', 'username', 'email', 'password', 'password2', 'first_name', 'last_name', 'role', 'is_staff', 'is_superuser',
+                  'avatar', 'avatar_processing']
         read_only_fields = ['id', 'is_staff', 'is_superuser']
 
     def get_role(self, obj):
@@ -21,7 +42,24 @@ class UserSerializer(serializers.ModelSerializer):
             return 'teacher'
         return 'student'
 
+    def get_avatar(self, obj):
+        return avatar_urls(obj.avatar_variants)
+
+    def get_avatar_processing(self, obj):
+        return avatar_processing(obj.avatar.name, obj.avatar_variants)
+
     def validate(self, attrs):
         if attrs.get('password') != attrs.get('password2'):
             raise serializers.ValidationError({"password": "Les mots de passe ne correspondent pas"})
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class RosterImportSerializer(serializers.ModelSerializer):
+    """
+    État d'un import d'étudiants en arrière-plan ; `result` une fois terminé.
+    """
+
+    class Meta:
+        model = RosterImport
+        fields = ['id', 'status', 'rows', 'created_at', 'finished_at', 'result', 'error']
+        read_only_fields = fields
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import CustomUser
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def forget_authenticated_user(sender, instance, **kwargs):
+    """
+    Les droits (is_staff, role, compte actif) ont pu changer : l'état gardé
+    par ClaimsJWTAuthentication et les claims des jetons déjà émis ne
+    servent plus pour cet utilisateur.
+    """
+    user_cache.invalidate(instance.pk)
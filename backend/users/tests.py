@@ -1,3 +1,509 @@
-from django.test import TestCase
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from .avatars import AvatarPool, AvatarProcessingOverloaded, get_pool
+from .authentication import CLAIMS_AT_CLAIM, ClaimsJWTAuthentication, ClaimsRefreshToken, user_cache
+from .hashers import HashingOverloaded, HashingPool
+from config.testing import assert_within_view_budget
+from .models import CustomUser, RosterImport
+from .roster import get_pool as get_roster_pool, hash_passwords
+from .search import search_tiers, search_users
+from projects.models import Project
+from tasks.models import UserWorkloadCounters
+
+
+class StudentListPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        for index in range(3):
+            CustomUser.objects.create_user(username=f'eleve{index}', password='x')
+        self.client.force_authenticate(self.teacher)
+
+    def test_students_paginated_on_demand(self):
+        url = reverse('users:user-students')
+        self.assertEqual(len(self.client.get(url).json()), 3)
+
+        first = self.client.get(url, {'page_size': 2}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(first['results']) + len(second['results']), 3)
+        self.assertIsNone(second['next'])
+
+
+class UserQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='admin', password='x', email='admin@example.com')
+        self.student = CustomUser.objects.create_user(username='eleve', password='x', email='eleve@example.com')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_endpoints_within_budget(self):
+        admin, student = self.client_for(self.admin), self.client_for(self.student)
+        account = {'username': 'nouveau', 'email': 'nouveau@example.com', 'password': 'Motdepasse!2025', 'password2': 'Motdepasse!2025'}
+        for client, method, url, body in (
+            (admin, 'get', reverse('users:user-list'), None),
+            (admin, 'get', reverse('users:user-students'), None),
+            (admin, 'get', reverse('users:user-detail', args=[self.student.pk]), None),
+            (student, 'get', reverse('users:user-me'), None),
+            (student, 'patch', reverse('users:user-me'), {'first_name': 'Awa'}),
+            (admin, 'post', reverse('users:register-student'), account),
+            (admin, 'post', reverse('users:create-teacher'), {**account, 'username': 'prof', 'email': 'prof@example.com'}),
+        ):
+            response = assert_within_view_budget(client, method, url, body, format='json')
+            self.assertLess(response.status_code, 300, (url, response.content))
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.teacher = CustomUser.objects.create_user(
+            username='prof', password='Motdepasse!2025', email='prof@example.com', is_staff=True, role='teacher'
+        )
+        self.authentication = ClaimsJWTAuthentication()
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'prof', 'password': 'Motdepasse!2025'})
+        return AccessToken(response.json()['access'])
+
+    def test_user_built_from_login_claims_without_query(self):
+        token = self.login()
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(token)
+        self.assertEqual((user.pk, user.is_staff, user.is_superuser, user.role), (self.teacher.pk, True, False, 'teacher'))
+        # Le premier champ différé lu charge le reste de la ligne
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.username, user.date_joined), ('prof@example.com', 'prof', self.teacher.date_joined))
+
+        response = APIClient().get(reverse('users:user-me'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.json()['email'], 'prof@example.com')
+
+    def test_saved_user_reloaded_despite_older_claims(self):
+        token = self.login()
+        self.teacher.is_staff = False
+        self.teacher.save()
+        with self.assertNumQueries(1):
+            self.assertFalse(self.authentication.get_user(token).is_staff)
+        # État relu gardé dans le cache du processus
+        with self.assertNumQueries(0):
+            self.assertFalse(self.authentication.get_user(token).is_staff)
+
+    def test_expired_claims_reloaded(self):
+        token = self.login()
+        token[CLAIMS_AT_CLAIM] = time.time() - 120
+        with override_settings(TOKEN_USER_CACHE_TIMEOUT=60), self.assertNumQueries(1):
+            self.assertTrue(self.authentication.get_user(token).is_staff)
+
+    def test_inactive_and_deleted_users_rejected(self):
+        token = self.login()
+        self.teacher.is_active = False
+        self.teacher.save()
+        with self.assertRaisesMessage(AuthenticationFailed, 'User is inactive'):
+            self.authentication.get_user(token)
+        self.teacher.delete()
+        with self.assertRaisesMessage(AuthenticationFailed, 'User not found'):
+            self.authentication.get_user(token)
+
+    @override_settings(TOKEN_USER_CACHE_SIZE=2)
+    def test_cache_bounded(self):
+        for user_id in (1, 2, 3):
+            user_cache.set(user_id, time.time(), {'is_active': True})
+        self.assertEqual(list(user_cache.entries), [2, 3])
+
+
+class HashingPoolTests(TestCase):
+    def test_admission_control(self):
+        pool = HashingPool(workers=1, queue=0)
+        self.addCleanup(pool.shutdown)
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(busy,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(HashingOverloaded), self.assertLogs('config.performance', 'WARNING'):
+            pool.run(lambda: None)
+        release.set()
+        worker.join()
+        # Appel imbriqué exécuté sur place : pas d'interblocage avec un seul thread
+        self.assertEqual(pool.run(lambda: pool.run(lambda: 42)), 42)
+
+
+@override_settings(PASSWORD_HASHERS=['users.hashers.ScryptPasswordHasher', 'users.hashers.PBKDF2PasswordHasher'])
+class PasswordHashingTests(TestCase):
+    def count_hashes(self):
+        return mock.patch.object(HashingPool, 'call', autospec=True, side_effect=HashingPool.call)
+
+    def test_legacy_hash_upgraded_on_login(self):
+        student = CustomUser.objects.create_user(username='eleve')
+        student.password = make_password('Motdepasse!2025', hasher='pbkdf2_sha256')
+        student.save()
+        with self.count_hashes() as hashes:
+            response = self.client.post(reverse('token_obtain_pair'), {'username': 'eleve', 'password': 'Motdepasse!2025'})
+        self.assertEqual(response.status_code, 200)
+        # Vérification de l'ancien hash, puis nouveau hash : tous deux dans le pool
+        self.assertEqual(hashes.call_count, 2)
+        student.refresh_from_db()
+        self.assertTrue(student.password.startswith('scrypt$'))
+        self.assertTrue(student.check_password('Motdepasse!2025'))
+
+    def test_registration_hashes_and_writes_once(self):
+        admin = CustomUser.objects.create_superuser(username='admin', password='x', email='admin@example.com')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(admin).access_token}')
+        account = {'username': 'nouveau', 'email': 'nouveau@example.com', 'password': 'Motdepasse!2025', 'password2': 'Motdepasse!2025'}
+        with self.count_hashes() as hashes, CaptureQueriesContext(connection) as queries:
+            response = client.post(reverse('users:register-student'), account, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(hashes.call_count, 1)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE "users_customuser"')])
+        self.assertTrue(CustomUser.objects.get(username='nouveau').check_password('Motdepasse!2025'))
+
+    def test_overloaded_login_answered_with_503(self):
+        CustomUser.objects.create_user(username='eleve', password='Motdepasse!2025')
+        with mock.patch.object(HashingPool, 'run', side_effect=HashingOverloaded()):
+            response = self.client.post(reverse('token_obtain_pair'), {'username': 'eleve', 'password': 'Motdepasse!2025'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+# Sans thread : l'import s'exécute dans le rappel on_commit de la requête
+@override_settings(ROSTER_IMPORT_WORKERS=0)
+class RosterImportTests(TestCase):
+    password = 'Motdepasse!2025'
+
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='prof', password='x', is_staff=True)
+        self.other = CustomUser.objects.create_user(username='prof2', password='x', is_staff=True)
+        self.project = Project.objects.create(name='Projet', description='', owner=self.teacher, status='in_progress')
+        self.foreign = Project.objects.create(name='Autre', description='', owner=self.other, status='in_progress')
+        self.client = self.client_for(self.teacher)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        return client
+
+    def finished(self, response):
+        """
+        Import accepté (202), puis son état lu à l'adresse de Location.
+        """
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()['status'], 'pending')
+        job = assert_within_view_budget(self.client, 'get', response['Location'])
+        self.assertEqual(job.status_code, 200)
+        return job.json()
+
+    def test_csv_import_creates_students_and_memberships(self):
+        before = self.project.updated_at
+        content = (
+            'username,email,first_name,last_name,password\n'
+            f'awa,awa@example.com,Awa,Diop,{self.password}\n'
+            f'moussa,moussa@example.com,Moussa,Fall,{self.password}\n'
+            'court,court@example.com,,,abc\n'
+            f'awa,autre@example.com,,,{self.password}\n'
+        )
+        upload = SimpleUploadedFile('eleves.csv', content.encode(), content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('users:roster-import'), {'file': upload, 'projects': str(self.project.pk)})
+        job = self.finished(response)
+        self.assertEqual((job['status'], job['rows']), ('done', 4))
+        result = job['result']
+        self.assertEqual((result['created'], result['existing'], result['errors']), (2, 0, 2))
+        self.assertEqual([row['status'] for row in result['rows']], ['created', 'created', 'error', 'error'])
+        self.assertIn('password', result['rows'][2]['errors'])
+        self.assertIn('username', result['rows'][3]['errors'])
+
+        awa = CustomUser.objects.get(username='awa')
+        self.assertEqual((awa.email, awa.role, awa.is_staff), ('awa@example.com', 'student', False))
+        self.assertTrue(awa.check_password(self.password))
+        self.assertEqual(set(self.project.members.values_list('username', flat=True)), {'awa', 'moussa'})
+        self.assertEqual(UserWorkloadCounters.objects.filter(user__username__in=['awa', 'moussa']).count(), 2)
+        self.project.refresh_from_db()
+        self.assertGreater(self.project.updated_at, before)
+
+    def test_json_import_attaches_existing_students(self):
+        existing = CustomUser.objects.create_user(username='awa', password='ancien')
+        CustomUser.objects.create_user(username='prof3', password='x', is_staff=True)
+        students = [
+            {'username': 'awa', 'password': self.password},
+            {'username': 'prof3', 'password': self.password},
+            {'username': 'binta', 'password': self.password, 'projects': [self.foreign.pk]},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = assert_within_view_budget(
+                self.client, 'post', reverse('users:roster-import'),
+                {'students': students, 'projects': [self.project.pk]}, format='json'
+            )
+        rows = self.finished(response)['result']['rows']
+        self.assertEqual([row['status'] for row in rows], ['existing', 'error', 'error'])
+        self.assertEqual(rows[0]['id'], existing.pk)
+        # Compte existant inchangé, seulement ajouté au projet
+        existing.refresh_from_db()
+        self.assertTrue(existing.check_password('ancien'))
+        self.assertEqual(list(self.project.members.all()), [existing])
+        self.assertFalse(self.foreign.members.exists())
+
+    def test_import_reserved_to_owners_and_staff(self):
+        students = {'students': [{'username': 'awa', 'password': self.password}], 'projects': [self.foreign.pk]}
+        response = self.client.post(reverse('users:roster-import'), students, format='json')
+        self.assertEqual(response.status_code, 400)
+        student = CustomUser.objects.create_user(username='eleve', password='x')
+        response = self.client_for(student).post(reverse('users:roster-import'), {'students': []}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(CustomUser.objects.filter(username='awa').exists())
+        self.assertFalse(RosterImport.objects.exists())
+
+    def test_import_status_visible_to_its_author_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('users:roster-import'), {'students': [{'username': 'awa', 'password': ''}]},
+                                        format='json')
+        job = self.finished(response)
+        self.assertEqual((job['status'], job['result']['errors']), ('done', 1))
+        self.assertEqual(self.client_for(self.other).get(response['Location']).status_code, 404)
+
+    def test_background_import_runs_after_commit(self):
+        students = {'students': [{'username': 'awa', 'password': self.password}], 'projects': [self.project.pk]}
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('users:roster-import'), students, format='json')
+        self.assertEqual(RosterImport.objects.get().status, 'pending')
+        self.assertFalse(CustomUser.objects.filter(username='awa').exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.finished(response)['status'], 'done')
+        self.assertTrue(self.project.members.filter(username='awa').exists())
+
+    def test_imports_beyond_queue_answered_with_503(self):
+        students = {'students': [{'username': 'awa', 'password': self.password}]}
+        with override_settings(ROSTER_IMPORT_WORKERS=1, ROSTER_IMPORT_QUEUE=0):
+            pool = get_roster_pool()
+            pool.pending = 1
+            try:
+                with self.assertLogs('config.performance', 'WARNING'):
+                    response = self.client.post(reverse('users:roster-import'), students, format='json')
+            finally:
+                pool.pending = 0
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertFalse(RosterImport.objects.exists())
+
+    def test_passwords_hashed_across_processes(self):
+        passwords = [f'{self.password}-{index}' for index in range(40)]
+        hashes = hash_passwords(passwords, processes=2)
+        self.assertEqual(len(set(hashes)), len(passwords))
+        self.assertTrue(all(check_password(password, encoded) for password, encoded in zip(passwords, hashes)))
+
+    def test_import_command(self):
+        students = {'students': [{'username': 'awa', 'password': self.password}, {'username': 'x y', 'password': ''}]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as source:
+            json.dump(students, source)
+            source.flush()
+            out, err = StringIO(), StringIO()
+            call_command('import_roster', source.name, '--project', str(self.foreign.pk), stdout=out, stderr=err)
+        self.assertIn('1 créé(s)', out.getvalue())
+        self.assertIn('n°2', err.getvalue())
+        self.assertEqual(list(self.foreign.members.values_list('username', flat=True)), ['awa'])
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='prof.diop', first_name='Awa', last_name='Diop', password='x', is_staff=True)
+        self.awa = CustomUser.objects.create_user(username='awa.ndiaye', first_name='Awa', last_name='Ndiaye', password='x')
+        self.moussa = CustomUser.objects.create_user(username='moussa', first_name='Moussa', last_name='Diop', password='x')
+        self.binta = CustomUser.objects.create_user(username='bdiallo', first_name='Binta', last_name='Diallo',
+                                                    email='awa.b@example.com', password='x')
+        CustomUser.objects.create_user(username='awa.inactive', first_name='Awa', password='x', is_active=False)
+
+    def search(self, user, **params):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        response = assert_within_view_budget(client, 'get', reverse('users:user-search'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['username'] for row in response.json()]
+
+    def test_prefix_matches_ranked_and_limited(self):
+        # Nom d'utilisateur d'abord, puis prénom, nom, e-mail ; comptes inactifs exclus
+        self.assertEqual(self.search(self.teacher, q='awa'), ['awa.ndiaye', 'prof.diop', 'bdiallo'])
+        self.assertEqual(self.search(self.teacher, q='AWA', limit=1), ['awa.ndiaye'])
+        self.assertEqual(self.search(self.teacher, q='diop awa'), ['prof.diop'])
+        self.assertEqual(self.search(self.teacher, q='a'), [])
+
+    def test_students_only_find_students(self):
+        self.assertEqual(self.search(self.moussa, q='diop'), ['moussa'])
+        self.assertEqual(self.search(self.teacher, q='diop'), ['prof.diop', 'moussa'])
+
+    def test_slim_payload_and_invalid_limit(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.teacher).access_token}')
+        self.assertEqual(client.get(reverse('users:user-search'), {'q': 'moussa'}).json(), [
+            {'id': self.moussa.pk, 'username': 'moussa', 'first_name': 'Moussa', 'last_name': 'Diop', 'avatar': None, 'role': 'student'}
+        ])
+        self.assertEqual(client.get(reverse('users:user-search'), {'q': 'moussa', 'limit': 'x'}).status_code, 400)
+
+    def test_later_tiers_read_only_when_needed(self):
+        with self.assertNumQueries(1):
+            self.assertEqual([row['username'] for row in search_users(CustomUser.objects.all(), 'awa', limit=1)], ['awa.ndiaye'])
+
+    @skipUnless(connection.vendor == 'sqlite', "Index NOCASE propres à SQLite")
+    def test_tiers_read_indexes_in_order(self):
+        for column, tier in zip(('username', 'first_name', 'last_name', 'email'), search_tiers(CustomUser.objects.all(), 'aw')):
+            plan = tier.values('id')[:10].explain()
+            self.assertIn(f'users_{column}_prefix_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', "Index UPPER(...) COLLATE \"C\" propres à PostgreSQL")
+    def test_tiers_scan_prefix_index_ranges(self):
+        for column, tier in zip(('username', 'first_name', 'last_name', 'email'), search_tiers(CustomUser.objects.all(), 'aw')):
+            plan = tier.values('id')[:10].explain()
+            self.assertIn(f'users_{column}_prefix_idx', plan)
+            # Début de mot lu comme une plage de l'index, pas comme un filtre ligne à ligne
+            self.assertRegex(plan, r"Index Cond: .*>= 'AW'")
+            self.assertNotIn('Sort', plan)
+
+
+def photo(size=(800, 600), format='JPEG', name='photo.jpg'):
+    """
+    Photo avec des métadonnées EXIF (appareil, orientation) à retirer.
+    """
+    exif = Image.Exif()
+    exif[0x010F] = 'Appareil'
+    exif[0x0112] = 6
+    output = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(output, format, exif=exif.tobytes())
+    return SimpleUploadedFile(name, output.getvalue(), content_type=f'image/{format.lower()}')
+
+
+@override_settings(AVATAR_WORKERS=0, AVATAR_SIZES=(64, 128, 256))
+class AvatarTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.user = CustomUser.objects.create_user(username='awa', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}')
+
+    def upload(self, file=None):
+        with self.captureOnCommitCallbacks() as jobs:
+            response = assert_within_view_budget(
+                self.client, 'post', reverse('users:user-avatar'), {'avatar': file or photo()}, format='multipart'
+            )
+        return response, jobs
+
+    def test_upload_answers_before_resizing(self):
+        response, jobs = self.upload()
+        self.assertEqual(response.status_code, 202, response.content)
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.avatar.name, rf'^avatars/user_{self.user.pk}/upload-\w+\.jpg$')
+        self.assertEqual(self.user.avatar_variants, {})
+        self.assertTrue(self.client.get(reverse('users:user-me')).json()['avatar_processing'])
+        # Variantes produites par le pool, après la transaction
+        self.assertEqual(len(jobs), 1)
+        jobs[0]()
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.avatar_variants), {'64', '128', '256'})
+
+    def test_variants_sized_hashed_and_without_metadata(self):
+        _, jobs = self.upload()
+        source = CustomUser.objects.get(pk=self.user.pk).avatar.name
+        jobs[0]()
+        self.user.refresh_from_db()
+        for size, formats in self.user.avatar_variants.items():
+            for key, name in formats.items():
+                with default_storage.open(name) as file:
+                    content = file.read()
+                self.assertIn(f'{size}-{hashlib.sha256(content).hexdigest()[:16]}', name)
+                with Image.open(BytesIO(content)) as image:
+                    self.assertEqual((image.format, image.size), ({'webp': 'WEBP', 'jpeg': 'JPEG'}[key], (int(size),) * 2))
+                    self.assertEqual(len(image.getexif()), 0)
+                    self.assertNotIn('icc_profile', image.info)
+        # Fichier envoyé (avec ses métadonnées) supprimé, avatar = plus grande variante
+        self.assertFalse(default_storage.exists(source))
+        self.assertEqual(self.user.avatar.name, self.user.avatar_variants['256']['jpeg'])
+
+        me = self.client.get(reverse('users:user-me')).json()
+        self.assertFalse(me['avatar_processing'])
+        self.assertEqual(me['avatar']['64']['webp'], f"/media/{self.user.avatar_variants['64']['webp']}")
+
+    def test_newer_upload_supersedes_pending_one(self):
+        _, first = self.upload(photo(size=(300, 300)))
+        _, second = self.upload()
+        first[0]()
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).avatar_variants, {})
+        self.assertEqual(len(default_storage.listdir(f'avatars/user_{self.user.pk}')[1]), 1)
+        second[0]()
+        variants = CustomUser.objects.get(pk=self.user.pk).avatar_variants
+        # Même image renvoyée : mêmes noms, fichiers conservés
+        _, again = self.upload()
+        again[0]()
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).avatar_variants, variants)
+        self.assertEqual(len(default_storage.listdir(f'avatars/user_{self.user.pk}')[1]), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = assert_within_view_budget(self.client, 'delete', reverse('users:user-avatar'))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(default_storage.listdir(f'avatars/user_{self.user.pk}')[1], [])
+
+    def test_invalid_uploads_rejected(self):
+        response, _ = self.upload(SimpleUploadedFile('photo.jpg', b'pas une image', content_type='image/jpeg'))
+        self.assertEqual(response.status_code, 400)
+        with override_settings(AVATAR_MAX_PIXELS=1000):
+            response, _ = self.upload()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CustomUser.objects.get(pk=self.user.pk).avatar)
+
+    def test_upload_refused_when_pool_is_full(self):
+        release = threading.Event()
+        with override_settings(AVATAR_WORKERS=1, AVATAR_QUEUE=0):
+            get_pool().submit(release.wait, 5)
+            with self.assertLogs('config.performance', 'WARNING'):
+                response, _ = self.upload()
+            release.set()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertFalse(CustomUser.objects.get(pk=self.user.pk).avatar)
+
+    def test_pool_admission_control(self):
+        pool = AvatarPool(workers=1, queue=0)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        pool.submit(release.wait, 5)
+        with self.assertRaises(AvatarProcessingOverloaded), self.assertLogs('config.performance', 'WARNING'):
+            pool.check()
+        release.set()
+        # Attend la fin du traitement (et de son rappel)
+        pool.shutdown()
+        self.assertEqual(pool.pending, 0)
+        pool.check()
+
+    def test_command_processes_files_set_outside_the_api(self):
+        self.user.avatar = photo(format='PNG', name='photo.png')
+        self.user.save()
+        out = StringIO()
+        call_command('process_avatars', stdout=out)
+        self.assertIn('1 avatar(s) traité(s)', out.getvalue())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, self.user.avatar_variants['256']['jpeg'])
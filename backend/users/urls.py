@@ -19,12 +19,18 @@ urlpatterns = [
         'post': 'create_teacher'
     }), name='create-teacher'),
     
-    # Route explicite pour /me/
-    path('users/me/', views.UserViewSet.as_view({
-        'get': 'me',
-        'patch': 'me',
-        'delete': 'me'
-    }), name='user-me'),
+    # Import d'une liste d'étudiants (CSV ou JSON)
+    path('users/import/', views.RosterImportView.as_view(), name='roster-import'),
+    path('users/import/<int:pk>/', views.RosterImportDetailView.as_view(), name='roster-import-detail'),
+    
+    # Recherche à la frappe (GET asynchrone sous ASGI)
+    path('users/search/', views.user_search_api, name='user-search'),
+    
+    # Envoi de l'avatar (variantes produites en arrière-plan)
+    path('users/me/avatar/', views.AvatarView.as_view(), name='user-avatar'),
+    
+    # Route explicite pour /me/ (GET asynchrone sous ASGI)
+    path('users/me/', views.user_me_api, name='user-me'),
     
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -2,18 +2,34 @@ from django.shortcuts import render
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from .serializers import UserSerializer
+from rest_framework.views import APIView
+from .serializers import RosterImportSerializer, UserSerializer
 from .permissions import IsAdminOrAuthenticatedStudent
+from .authentication import ClaimsJWTAuthentication, aload_user
+from .avatars import accept_avatar, remove_avatar
+from .models import RosterImport
+from .roster import RosterFormatError, max_rows, parse_roster, roster_format, split_ids, start_import
+from .search import asearch_users, search_limit, search_result, search_users
 from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from config.pagination import DateJoinedKeysetPagination
+from config.async_views import async_read_view, json_response
+from config.instrumentation import query_budget
 
 User = get_user_model()
 
 class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminOrAuthenticatedStudent]
+    # Pagination par curseur, activée uniquement si le client envoie ?cursor= ou ?page_size=
+    pagination_class = DateJoinedKeysetPagination
+    # Budget de requêtes SQL par méthode, authentification JWT comprise (config.instrumentation) ;
+    # pas de budget pour DELETE : la cascade dépend des projets et tâches du compte
+    query_budget = {'GET': 2, 'POST': 6, 'PUT': 4, 'PATCH': 4}
     
     def get_queryset(self):
         user = self.request.user
@@ -25,18 +41,16 @@ class UserViewSet(viewsets.ModelViewSet):
     def _create_user_from_serializer(self, serializer, is_staff=False, is_superuser=False):
         try:
             with transaction.atomic():
-                password = serializer.validated_data.pop('password')
                 serializer.validated_data.pop('password2')
                 if 'role' in serializer.validated_data:
                     serializer.validated_data.pop('role')
                 
+                # Un seul hachage et une seule écriture (mot de passe inclus dans l'INSERT)
                 user = User.objects.create_user(
                     **serializer.validated_data,
                     is_staff=is_staff,
                     is_superuser=is_superuser
                 )
-                user.set_password(password)
-                user.save()
                 
                 return Response(
                     UserSerializer(user).data,
@@ -74,9 +88,25 @@ class UserViewSet(viewsets.ModelViewSet):
         Liste tous les étudiants (non staff et non superuser)
         """
         students = User.objects.filter(is_staff=False, is_superuser=False)
+        page = self.paginate_queryset(students)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         serializer = self.get_serializer(students, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Recherche à la frappe pour le sélecteur de membres : ?q= (2 caractères
+        au moins) et ?limit=, mêmes comptes visibles que la liste
+        """
+        rows = search_users(self.get_queryset(), request.query_params.get('q'), search_limit(request.query_params))
+        return Response([search_result(row) for row in rows])
+
+    async def asearch(self, request):
+        rows = await asearch_users(self.get_queryset(), request.query_params.get('q'), search_limit(request.query_params))
+        return json_response([search_result(row) for row in rows])
+
     @action(detail=False, methods=['get', 'patch', 'delete'])
     def me(self, request):
         if request.method == 'GET':
@@ -92,4 +122,101 @@ class UserViewSet(viewsets.ModelViewSet):
         
         elif request.method == 'DELETE':
             request.user.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+    async def ame(self, request):
+        """
+        GET /me/ pour les lectures asynchrones : le reste de la ligne de
+        l'utilisateur authentifié est chargé avant la sérialisation.
+        """
+        return json_response(self.get_serializer(await aload_user(request.user)).data)
+
+
+class RosterImportView(APIView):
+    """
+    Import d'étudiants par les enseignants (users.roster) : fichier CSV ou
+    JSON envoyé dans `file` (multipart, avec `projects` : identifiants
+    séparés par des virgules), ou corps JSON
+    {"students": [{...}], "projects": [1, 2]}. Répond 202 avec l'import
+    en attente (traité en arrière-plan) ; son état et le résultat par ligne
+    se lisent sur RosterImportDetailView.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+    # Projets de la requête, puis l'import enregistré ; les lignes sont traitées hors requête
+    query_budget = {'POST': 2}
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                rows, projects = parse_roster(upload.read(), roster_format(upload.name, upload.content_type))
+                projects = projects + [pk for value in request.data.getlist('projects') for pk in split_ids(value)]
+            elif isinstance(request.data, list):
+                rows, projects = request.data, []
+            else:
+                rows, projects = request.data.get('students'), request.data.get('projects')
+            if not isinstance(rows, list):
+                raise RosterFormatError("Format attendu : fichier \"file\" ou {\"students\": [...], \"projects\": [...]}")
+            if len(rows) > max_rows():
+                raise RosterFormatError(f"Trop d'étudiants (maximum {max_rows()})")
+            job = start_import(rows, projects, request.user)
+        except RosterFormatError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        location = reverse('users:roster-import-detail', args=[job.pk])
+        return Response(RosterImportSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': location})
+
+
+class RosterImportDetailView(APIView):
+    """
+    État d'un import d'étudiants (pending, running, done, failed) et, une
+    fois terminé, les décomptes et le résultat par ligne. Chaque enseignant
+    ne voit que ses imports, un superuser tous.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+    query_budget = {'GET': 1}
+
+    def get(self, request, pk):
+        imports = RosterImport.objects.all()
+        if not request.user.is_superuser:
+            imports = imports.filter(created_by=request.user)
+        job = get_object_or_404(imports, pk=pk)
+        return Response(RosterImportSerializer(job).data)
+
+
+class AvatarView(APIView):
+    """
+    Avatar de l'utilisateur connecté (users.avatars). POST (multipart,
+    fichier `avatar`) : réponse 202 dès le fichier vérifié et enregistré,
+    variantes produites en arrière-plan ; DELETE : suppression.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    query_budget = {'POST': 1, 'DELETE': 4}
+
+    def post(self, request):
+        upload = request.FILES.get('avatar')
+        if upload is None:
+            return Response({'avatar': ["Fichier requis"]}, status=status.HTTP_400_BAD_REQUEST)
+        accept_avatar(request.user.pk, upload)
+        # Les variantes précédentes restent servies jusqu'à la fin du traitement (GET /me/)
+        return Response({'avatar_processing': True}, status=status.HTTP_202_ACCEPTED)
+
+    def delete(self, request):
+        remove_avatar(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# Recherche servie sans thread sous ASGI (config.async_views) ; une requête par
+# palier lu (users.search), authentification comprise
+user_search_api = async_read_view(
+    query_budget({'GET': 6})(UserViewSet.as_view({'get': 'search'})), UserViewSet.asearch
+)
+
+# Vue de /me/ : GET servi sans thread sous ASGI, PATCH et DELETE par la vue DRF (config.async_views)
+user_me_api = async_read_view(
+    UserViewSet.as_view({'get': 'me', 'patch': 'me', 'delete': 'me'}), UserViewSet.ame
+)
@@ -1,7 +1,7 @@
 import { useState, useEffect, useContext } from 'react';
 import { useNavigate } from 'react-router-dom';
 import AuthContext from '../context/authContext';
-import { fetchProfile, updateProfile, deleteProfile } from '../services/profileService';
+import { fetchProfile, updateProfile, deleteProfile, uploadAvatar, avatarVariant } from '../services/profileService';
 
 const Profile = () => {
   const navigate = useNavigate();
@@ -42,14 +42,13 @@ const Profile = () => {
     setLoading(true);
     setError('');
     try {
-      const formData = new FormData();
-      formData.append('username', username);
-      formData.append('email', email);
+      let updatedUser = await updateProfile({ username, email });
       if (avatar) {
-        formData.append('avatar', avatar);
+        await uploadAvatar(avatar);
+        setAvatar(null);
+        // avatar_processing : les variantes du nouveau fichier sont en cours de production
+        updatedUser = await fetchProfile();
       }
-
-      const updatedUser = await updateProfile(formData);
       setProfile(updatedUser);
       alert('✅ Profil mis à jour avec succès !');
     } catch (error) {
@@ -81,6 +80,9 @@ const Profile = () => {
     return null;
   }
 
+  // Affiché en 80 px : variante de 160 px ou plus pour les écrans haute densité
+  const currentAvatar = avatarVariant(profile.avatar, 160);
+
   return (
     <div className="min-h-screen w-screen overflow-hidden bg-gray-100">
       {/* Header */}
@@ -162,16 +164,22 @@ const Profile = () => {
                   accept="image/*"
                   className="mt-1 block w-full text-sm text-gray-500 file:mr-4 file:py-2 file:px-4 file:rounded file:border-0 file:text-sm file:font-semibold file:bg-teal-50 file:text-teal-700 hover:file:bg-teal-100"
                 />
-                {profile.avatar && (
+                {currentAvatar && (
                   <div className="mt-2">
                     <p className="text-sm text-gray-600 mb-1">Avatar actuel :</p>
-                    <img 
-                      src={profile.avatar} 
-                      alt="Avatar actuel" 
-                      className="h-20 w-20 rounded-full object-cover border-2 border-teal-300"
-                    />
+                    <picture>
+                      <source srcSet={currentAvatar.webp} type="image/webp" />
+                      <img 
+                        src={currentAvatar.jpeg} 
+                        alt="Avatar actuel" 
+                        className="h-20 w-20 rounded-full object-cover border-2 border-teal-300"
+                      />
+                    </picture>
                   </div>
                 )}
+                {profile.avatar_processing && (
+                  <p className="mt-2 text-sm text-gray-600">⏳ Nouvel avatar en cours de traitement...</p>
+                )}
               </div>
               
               <div className="flex space-x-4 pt-4">
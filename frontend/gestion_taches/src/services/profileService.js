@@ -10,20 +10,45 @@ export const fetchProfile = async () => {
   }
 };
 
-export const updateProfile = async (formData) => {
+export const updateProfile = async (data) => {
   try {
-    const response = await axios.patch('users/me/', formData, {
+    const response = await axios.patch('users/me/', data);
+    return response.data;
+  } catch (error) {
+    console.error('Erreur lors de la mise à jour du profil:', error);
+    throw error;
+  }
+};
+
+// Avatar envoyé à part : réponse 202, variantes produites en arrière-plan
+export const uploadAvatar = async (file) => {
+  try {
+    const formData = new FormData();
+    formData.append('avatar', file);
+    const response = await axios.post('users/me/avatar/', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
     });
     return response.data;
   } catch (error) {
-    console.error('Erreur lors de la mise à jour du profil:', error);
+    console.error("Erreur lors de l'envoi de l'avatar:", error);
     throw error;
   }
 };
 
+// Variante la plus proche de `size` (px) : {"64": {"webp": url, "jpeg": url}, ...}
+export const avatarVariant = (avatar, size) => {
+  if (!avatar) {
+    return null;
+  }
+  const sizes = Object.keys(avatar).map(Number).sort((a, b) => a - b);
+  if (!sizes.length) {
+    return null;
+  }
+  return avatar[sizes.find((value) => value >= size) || sizes[sizes.length - 1]];
+};
+
 export const deleteProfile = async () => {
   try {
     await axios.delete('users/me/');